@@ -0,0 +1,625 @@
+import argparse
+import mmap
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from monkey import compile_to_closure
+from monkey.builtins import BUILTINS
+from monkey.compiler import Compiler
+from monkey.environment import Environment
+from monkey.evaluator import evaluate, evaluate_statements
+from monkey.lexer import Lexer
+from monkey.object import Integer, Boolean, String, Array, ReturnValue
+from monkey.parser import Parser
+from monkey.purity import memoize
+from monkey.regex_lexer import RegexLexer
+from monkey.stream_lexer import read_tokens
+import monkey.stack_evaluator as stack_evaluator
+from monkey.stack_parser import StackParser
+from monkey.token import TokenType
+from monkey.token_buffer import tokenize
+from monkey.vm import VM
+
+FIBONACCI = '''
+let fibonacci = fn(x) {
+    if (x < 2) {
+        x
+    } else {
+        fibonacci(x - 1) + fibonacci(x - 2)
+    }
+};
+fibonacci(25);
+'''
+
+
+TAIL_CALL = '''
+let sum = fn(n, acc) {
+    if (n == 0) {
+        return acc;
+    }
+    return sum(n - 1, acc + n);
+};
+sum(1000000, 0);
+'''
+
+DEEP_RECURSION = '''
+let sum = fn(n) {
+    if (n == 0) {
+        0
+    } else {
+        n + sum(n - 1)
+    }
+};
+sum(100000);
+'''
+
+# 1,000,000 hash index expressions, half with a literal key and half with a
+# key bound to a variable; recursion stays 1,000 calls deep for the VM
+HASH_INDEX = '''
+let h = {"one": 1, "two": 2, "three": 3, 4: 4, true: 5};
+let key = "two";
+let lookup = fn(n, acc) {
+    if (n == 0) {
+        acc
+    } else {
+        lookup(n - 1, acc + h["one"] + h[key])
+    }
+};
+let repeat = fn(n, acc) {
+    if (n == 0) {
+        acc
+    } else {
+        repeat(n - 1, acc + lookup(500, 0))
+    }
+};
+repeat(1000, 0);
+'''
+
+# Pushes 1,000,000 elements onto one array, 1,000 at a time
+PUSH = '''
+let fill = fn(array, n) {
+    if (n == 0) {
+        array
+    } else {
+        fill(push(array, n), n - 1)
+    }
+};
+let repeat = fn(array, n) {
+    if (n == 0) {
+        array
+    } else {
+        repeat(fill(array, 1000), n - 1)
+    }
+};
+len(repeat([], 1000));
+'''
+
+# Sets 100,000 keys on one hash, 1,000 at a time
+HASH_SET = '''
+let fill = fn(table, n, end) {
+    if (n == end) {
+        table
+    } else {
+        fill(set(table, n, n * 2), n + 1, end)
+    }
+};
+let repeat = fn(table, n) {
+    if (n == 0) {
+        table
+    } else {
+        repeat(fill(table, n * 1000, n * 1000 + 1000), n - 1)
+    }
+};
+let table = repeat({}, 100);
+[len(keys(table)), table[50000]];
+'''
+
+# Sums a 100,000-element array by recursing on first/rest
+TRAVERSE = '''
+let fill = fn(array, n) {
+    if (n == 0) {
+        array
+    } else {
+        fill(push(array, n), n - 1)
+    }
+};
+let repeat = fn(array, n) {
+    if (n == 0) {
+        array
+    } else {
+        repeat(fill(array, 1000), n - 1)
+    }
+};
+let sum = fn(array, acc) {
+    if (len(array) == 0) {
+        return acc;
+    }
+    return sum(rest(array), acc + first(array));
+};
+sum(repeat([], 100), 0);
+'''
+
+# One expression per node type, from the cheapest nodes to the ones with the
+# most children; `a` and `f` are bound by DISPATCH_SETUP
+# Builds a 10 MB string from 1,000,000 ten-character pieces, 1,000 at a time
+CONCAT = '''
+let build = fn(s, n) {
+    if (n == 0) {
+        s
+    } else {
+        build(s + "abcdefghij", n - 1)
+    }
+};
+let repeat = fn(s, n) {
+    if (n == 0) {
+        s
+    } else {
+        repeat(build(s, 1000), n - 1)
+    }
+};
+let s = repeat("", 1000);
+[len(s), len(join([s, s], ""))];
+'''
+
+# Squares, filters and sums 100,000 integers with functions written in Monkey
+MONKEY_PIPELINE = '''
+let fill = fn(array, n) {
+    if (n == 0) {
+        array
+    } else {
+        fill(push(array, n), n - 1)
+    }
+};
+let map = fn(array, f, acc) {
+    if (len(array) == 0) {
+        acc
+    } else {
+        map(rest(array), f, push(acc, f(first(array))))
+    }
+};
+let filter = fn(array, f, acc) {
+    if (len(array) == 0) {
+        acc
+    } else {
+        let x = first(array);
+        filter(rest(array), f, if (f(x)) { push(acc, x) } else { acc })
+    }
+};
+let reduce = fn(array, f, acc) {
+    if (len(array) == 0) {
+        acc
+    } else {
+        reduce(rest(array), f, f(acc, first(array)))
+    }
+};
+let numbers = fill([], 100000);
+reduce(filter(map(numbers, fn(x) { x * x }, []), fn(x) { x > 1000 }, []), fn(acc, x) { acc + x }, 0);
+'''
+
+# The same pipeline with the native map, filter, reduce and range builtins
+NATIVE_PIPELINE = '''
+let numbers = range(1, 100001);
+reduce(filter(map(numbers, fn(x) { x * x }), fn(x) { x > 1000 }), fn(acc, x) { acc + x }, 0);
+'''
+
+# Doubles, filters and sums `count` integers; `source` is a lazy range or,
+# wrapped in collect, an array that every stage copies
+PIPELINE = '''
+let source = {source};
+reduce(filter(map(source, fn(x) {{ x * 2 }}), fn(x) {{ x / 3 * 3 == x }}), fn(acc, x) {{ acc + x }}, 0);
+'''
+
+# Scales, adds, sums and takes the maximum of 1,000,000 integers
+NUMERIC = '''
+let a = {source};
+let b = a + a + a + a;
+[sum(b), max(b), dot(a, b)];
+'''
+
+# The same computation on boxed integers with reduce and map
+BOXED_NUMERIC = '''
+let a = collect(range(1000000));
+let b = map(a, fn(x) { x * 3 + x });
+let dot = reduce(range(len(a)), fn(acc, i) { acc + a[i] * b[i] }, 0);
+[reduce(b, fn(acc, x) { acc + x }, 0), reduce(b, fn(acc, x) { if (x > acc) { x } else { acc } }, 0), dot];
+'''
+
+DISPATCH_SAMPLES = (
+    "5",
+    "a",
+    "-5",
+    "5 + 5",
+    "if (true) { 5 }",
+    "f()",
+    "[]",
+    "{}",
+    "a[0]",
+)
+
+DISPATCH_SETUP = "let a = [1]; let f = fn() { 1 };"
+
+
+def run_eval(program):
+    return evaluate(program, Environment())
+
+
+def run_stack(program):
+    return stack_evaluator.evaluate(program, Environment())
+
+
+def run_closure(program):
+    return compile_to_closure(program)(Environment())
+
+
+def run_vm(program):
+    compiler = Compiler()
+    compiler.compile(program)
+    return VM(compiler.bytecode()).run()
+
+
+ENGINES = {
+    "eval": run_eval,
+    "stack": run_stack,
+    "closure": run_closure,
+    "vm": run_vm,
+}
+
+
+def parse(code):
+    return Parser(Lexer(code)).parse_program()
+
+
+def benchmark_dispatch(arguments) -> None:
+    env = Environment()
+    evaluate(parse(DISPATCH_SETUP), env)
+
+    for sample in DISPATCH_SAMPLES:
+        node = parse(sample).statements[0].expression
+        # Addressed like a line typed after the setup, in the same globals
+        env.global_resolver().resolve_statement(node)
+        duration = timeit.timeit(lambda: evaluate(node, env), number=arguments.iterations)
+        print(f"{type(node).__name__:<18} {sample:<18} {duration / arguments.iterations * 1e9:8.0f} ns/evaluate")
+
+
+def benchmark_fibonacci(arguments) -> None:
+    # The tree-walking evaluator nests several Python frames per Monkey call
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(FIBONACCI), arguments)
+
+
+def benchmark_tail_call(arguments) -> None:
+    # No recursion limit bump: tail calls must run in constant stack depth
+    run_program(parse(TAIL_CALL), arguments)
+
+
+def benchmark_deep_recursion(arguments) -> None:
+    # Non-tail recursion 100,000 calls deep: only engines that do not recurse
+    # through Python for Monkey calls get through it
+    run_program(parse(DEEP_RECURSION), arguments)
+
+
+def benchmark_hash_index(arguments) -> None:
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(HASH_INDEX), arguments)
+
+
+def benchmark_memory(arguments) -> None:
+    five = Integer(5)
+    factories = (
+        lambda: Integer(5),
+        lambda: Boolean(True),
+        lambda: String("five"),
+        lambda: ReturnValue(five),
+        lambda: Environment(2),
+    )
+    for factory in factories:
+        # Average traced memory of many live instances, dict included if any
+        tracemalloc.start()
+        instances = [factory() for _ in range(10000)]
+        size = (tracemalloc.get_traced_memory()[0] - sys.getsizeof(instances)) / len(instances)
+        tracemalloc.stop()
+        print(f"{type(instances[0]).__name__:<12} {size:6.0f} bytes")
+
+    sys.setrecursionlimit(100000)
+    program = parse(FIBONACCI)
+    engine = ENGINES[arguments.engine]
+
+    start = time.perf_counter()
+    engine(program)
+    duration = time.perf_counter() - start
+
+    # Count Integer objects created by a second, instrumented run
+    allocations = 0
+    integer_init = Integer.__init__
+
+    def counting_init(self, value):
+        nonlocal allocations
+        allocations += 1
+        integer_init(self, value)
+
+    Integer.__init__ = counting_init
+    tracemalloc.start()
+    try:
+        engine(program)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        Integer.__init__ = integer_init
+
+    print(f"engine={arguments.engine}, duration={duration:.3f}s, integers={allocations}, "
+          f"rate={allocations / duration:,.0f} integers/s, peak={peak / 1024:.0f}KiB")
+
+
+def benchmark_push(arguments) -> None:
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(PUSH), arguments)
+
+
+def benchmark_hash_set(arguments) -> None:
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(HASH_SET), arguments)
+
+
+def benchmark_traverse(arguments) -> None:
+    # Needs tail calls: run with the eval or closure engine
+    run_program(parse(TRAVERSE), arguments)
+
+
+def benchmark_concat(arguments) -> None:
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(CONCAT), arguments)
+
+
+def benchmark_join(arguments) -> None:
+    pieces = Array([String("abcdefghij") for _ in range(1000000)])
+    separator = String("")
+
+    start = time.perf_counter()
+    result = BUILTINS["join"].function([pieces, separator])
+    duration = time.perf_counter() - start
+
+    print(f"result={result.length}, duration={duration:.3f}s")
+
+
+def benchmark_higher_order(arguments) -> None:
+    # The Monkey version needs tail calls: run with the eval or closure engine
+    run_program(parse(MONKEY_PIPELINE), arguments)
+    run_program(parse(NATIVE_PIPELINE), arguments)
+
+
+def benchmark_sequence(arguments) -> None:
+    for count in (100000, 1000000):
+        for source in (f"range({count})", f"collect(range({count}))"):
+            program = parse(PIPELINE.format(source=source))
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = ENGINES[arguments.engine](program)
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"engine={arguments.engine}, source={source}, result={result.inspect()}, "
+                  f"duration={duration:.3f}s, peak={peak / 1024:.0f}KiB")
+
+
+def benchmark_numeric(arguments) -> None:
+    for label, code in (("ints", NUMERIC.format(source="ints(range(1000000))")), ("boxed", BOXED_NUMERIC)):
+        start = time.perf_counter()
+        result = ENGINES[arguments.engine](parse(code))
+        duration = time.perf_counter() - start
+
+        # A second run under tracemalloc, which slows allocation down too
+        # much to time the first
+        tracemalloc.start()
+        ENGINES[arguments.engine](parse(code))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"engine={arguments.engine}, arrays={label}, result={result.inspect()}, "
+              f"duration={duration:.3f}s, peak={peak / 1024:.0f}KiB")
+
+
+def benchmark_memo(arguments) -> None:
+    sys.setrecursionlimit(100000)
+
+    run_program(parse(FIBONACCI), arguments)
+
+    program = parse(FIBONACCI)
+    print(f"memoized={memoize(program)}")
+    run_program(program, arguments)
+
+
+def benchmark_lexer(arguments) -> None:
+    # About 4 MB of source mixing every kind of token
+    code = (FIBONACCI + TAIL_CALL + HASH_INDEX + MONKEY_PIPELINE) * 4000
+    size = len(code.encode()) / 1e6
+
+    for name, lexer_class in (("Lexer", Lexer), ("RegexLexer", RegexLexer)):
+        lexer = lexer_class(code)
+        count = 0
+        start = time.perf_counter()
+        while lexer.next_token().token_type is not TokenType.EOF:
+            count += 1
+        duration = time.perf_counter() - start
+
+        print(f"lexer={name}, tokens={count}, duration={duration:.3f}s, throughput={size / duration:.2f}MB/s")
+
+
+def benchmark_token_buffer(arguments) -> None:
+    code = (FIBONACCI + TAIL_CALL + HASH_INDEX + MONKEY_PIPELINE) * 4000
+
+    tracemalloc.start()
+    lexer = Lexer(code)
+    tokens = [lexer.next_token()]
+    while tokens[-1].token_type is not TokenType.EOF:
+        tokens.append(lexer.next_token())
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"tokens=Token list, count={len(tokens)}, bytes/token={size / len(tokens):.1f}")
+    del tokens
+
+    start = time.perf_counter()
+    buffer = tokenize(code)
+    duration = time.perf_counter() - start
+    print(f"tokens=TokenBuffer, count={len(buffer)}, bytes/token={buffer.nbytes() / len(buffer):.1f}, "
+          f"tokenize={duration:.3f}s")
+
+    for name, source in (("Lexer", Lexer(code)), ("TokenBuffer", buffer)):
+        start = time.perf_counter()
+        Parser(source).parse_program()
+        duration = time.perf_counter() - start
+        print(f"parse from={name}, duration={duration:.3f}s")
+
+
+def benchmark_stream(arguments) -> None:
+    # About 5 MB of data-heavy script
+    row = 'let row = [12345, 67890, "some text", {"key": true}];\n'
+    with tempfile.TemporaryFile() as file:
+        for _ in range(5000000 // len(row) // 1000):
+            file.write(row.encode() * 1000)
+        file.flush()
+        size = file.tell() / 1e6
+
+        def read_all():
+            file.seek(0)
+            lexer = Lexer(file.read().decode())
+            count = 0
+            while lexer.next_token().token_type is not TokenType.EOF:
+                count += 1
+            return count
+
+        def read_mapped():
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                return sum(1 for _ in read_tokens(source)) - 1
+
+        for name, read in (("Lexer(file.read())", read_all), ("read_tokens(mmap)", read_mapped)):
+            start = time.perf_counter()
+            count = read()
+            duration = time.perf_counter() - start
+
+            tracemalloc.start()
+            read()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"lexer={name}, size={size:.0f}MB, tokens={count}, duration={duration:.3f}s, "
+                  f"peak={peak / 1024:.0f}KiB")
+
+
+def benchmark_statements(arguments) -> None:
+    # A long batch script: 50,000 independent statements
+    code = "".join(f'let row = [{i}, {i + 1}, "text {i}", {{"key": {i}}}]; row[0] + row[1];\n' for i in range(25000))
+
+    def run_whole():
+        program = Parser(Lexer(code)).parse_program()
+        return [evaluate(program, Environment())]
+
+    def run_streaming():
+        env = Environment()
+        return evaluate_statements(Parser(Lexer(code)).iter_statements(env.global_resolver()), env)
+
+    for name, run in (("parse_program", run_whole), ("iter_statements", run_streaming)):
+        start = time.perf_counter()
+        first = None
+        for result in run():
+            if first is None:
+                first = time.perf_counter() - start
+        duration = time.perf_counter() - start
+
+        tracemalloc.start()
+        for result in run():
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"parse={name}, result={result.inspect()}, first result={first * 1000:.1f}ms, "
+              f"duration={duration:.3f}s, peak={peak / 1024:.0f}KiB")
+
+
+PRECEDENCE_SAMPLES = (
+    "a + b * c + d / e - f;",
+    "5 > 4 == 3 < 4;",
+    "3 + 4 * 5 == 3 * 1 + 4 * 5;",
+    "-(5 + 5) + !(true == true);",
+    "a + add(b * c) + d;",
+    "add(a, b, 1, 2 * 3, 4 + 5, add(6, 7 * 8));",
+    "a * [1, 2, 3, 4][b * c] * d;",
+    "add(a * b[2], b[1], 2 * [1, 2][1]);",
+)
+
+
+def benchmark_parser(arguments) -> None:
+    # Parse from token buffers so that lexing is not timed
+    samples = (
+        ("precedence x10000", "".join(PRECEDENCE_SAMPLES) * 10000),
+        ("nested (1 + x100", "(1 + " * 100 + "1" + ")" * 100),
+        ("nested (1 + x100000", "(1 + " * 100000 + "1" + ")" * 100000),
+        ("nested ( x100000", "(" * 100000 + "1" + ")" * 100000),
+    )
+
+    for name, code in samples:
+        for parser_class in (Parser, StackParser):
+            buffer = tokenize(code)
+            start = time.perf_counter()
+            try:
+                parser_class(buffer).parse_program()
+                outcome = f"duration={time.perf_counter() - start:.3f}s"
+            except RecursionError:
+                outcome = "RecursionError"
+
+            print(f"parser={parser_class.__name__}, input={name}, {outcome}")
+
+
+def run_program(program, arguments) -> None:
+    start = time.perf_counter()
+    result = ENGINES[arguments.engine](program)
+    duration = time.perf_counter() - start
+
+    print(f"engine={arguments.engine}, result={result.inspect()}, duration={duration:.3f}s")
+
+
+BENCHMARKS = {
+    "fibonacci": benchmark_fibonacci,
+    "dispatch": benchmark_dispatch,
+    "tail_call": benchmark_tail_call,
+    "deep_recursion": benchmark_deep_recursion,
+    "hash_index": benchmark_hash_index,
+    "memory": benchmark_memory,
+    "push": benchmark_push,
+    "traverse": benchmark_traverse,
+    "hash_set": benchmark_hash_set,
+    "concat": benchmark_concat,
+    "join": benchmark_join,
+    "higher_order": benchmark_higher_order,
+    "sequence": benchmark_sequence,
+    "numeric": benchmark_numeric,
+    "memo": benchmark_memo,
+    "lexer": benchmark_lexer,
+    "token_buffer": benchmark_token_buffer,
+    "stream": benchmark_stream,
+    "statements": benchmark_statements,
+    "parser": benchmark_parser,
+}
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description="Benchmark the Monkey engines")
+    argument_parser.add_argument("benchmark", nargs="?", choices=BENCHMARKS.keys(), default="fibonacci")
+    argument_parser.add_argument("--engine", choices=ENGINES.keys(), default="vm")
+    argument_parser.add_argument("--iterations", type=int, default=200000)
+    arguments = argument_parser.parse_args()
+
+    BENCHMARKS[arguments.benchmark](arguments)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from monkey.closure_compiler import compile_to_closure
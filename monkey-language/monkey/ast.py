@@ -25,6 +25,8 @@ class Expression(Node):
 class Program():
     def __init__(self) -> None:
         self.statements: typing.List[Statement] = []
+        # The monkey.resolver.Resolver that assigned every identifier an address
+        self.resolver = None
 
     def token_literal(self) -> str:
         if len(self.statements) > 0:
@@ -43,6 +45,13 @@ class Identifier(Expression):
     def __init__(self, token: Token, value: str) -> None:
         self.token: Token = token
         self.value: str = value
+        # Lexical address assigned by monkey.resolver: how many function
+        # scopes up the binding lives and its slot there
+        self.depth: int = None
+        self.slot: int = None
+        # Where to read the name instead while a let binding it has not run,
+        # as in `if (c) { let x = 2; } x`: the enclosing scopes' binding
+        self.fallback: Identifier = None
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -139,6 +148,8 @@ class IntegerLiteral(Expression):
     def __init__(self, token: Token) -> None:
         self.token: Token = token
         self.value: int
+        # The monkey.object.Integer every evaluation returns, made by the parser
+        self.object: typing.Any = None
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -171,6 +182,8 @@ class StringLiteral(Expression):
     def __init__(self, token: Token, value: str) -> None:
         self.token: Token = token
         self.value: str = value
+        # The monkey.object.String every evaluation returns, made by the parser
+        self.object: typing.Any = None
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -188,6 +201,8 @@ class FunctionLiteral(Expression):
         self.token: Token = token
         self.parameters: typing.List[Identifier] = []
         self.body: BlockStatement
+        # Number of parameter and let slots, assigned by monkey.resolver
+        self.num_slots: int = 0
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -228,6 +243,8 @@ class HashLiteral(Expression):
     def __init__(self, token: Token) -> None:
         self.token: Token = token  # the '{' token
         self.pairs: typing.List[Identifier] = {}
+        # monkey.object.HashKey of each literal key, computed by the parser
+        self.constant_keys: typing.Dict[Expression, typing.Any] = {}
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -305,6 +322,9 @@ class CallExpression(Expression):
         self.token: Token = token
         self.function: Expression = function
         self.arguments: typing.List[Expression] = []
+        # Set by monkey.resolver when the call's value is returned directly
+        # from the enclosing function
+        self.tail: bool = False
 
     def expression_node(self) -> None:
         # Just for debugging
@@ -1,17 +1,41 @@
+import array
+import collections
+import functools
+import typing
+from operator import mul
+
 from monkey.object import (
-    Builtin, Integer, String, Array, Error, ObjectType, Null
+    Object, Builtin, Integer, String, Array, IntArray, Hash, HashPair, Hashable, Sequence, Error, ObjectType,
+    Function, Closure, Call, new_integer,
+    TRUE, FALSE, NULL,
 )
 
 
+def _caller_for(function: Object) -> typing.Optional[Call]:
+    # Functions and closures carry the call of the engine that made them
+    if type(function) is Builtin:
+        return function.function
+    if type(function) is Function or type(function) is Closure:
+        return function.prepare_call(function)
+    return None
+
+
 def len_builtin(args):
     if len(args) != 1:
         return Error(f"wrong number of arguments. got={len(args)}, want=1")
 
     argument = args[0]
+    if type(argument) is IntArray:
+        return new_integer(len(argument.values))
     if isinstance(argument, Array):
-        return Integer(len(argument.elements))
+        return new_integer(len(argument.elements))
     if isinstance(argument, String):
-        return Integer(len(argument.value))
+        return new_integer(argument.length)
+    if isinstance(argument, Sequence):
+        collected = argument.collect()
+        if type(collected) is Error:
+            return collected
+        return new_integer(len(collected.elements))
     else:
         return Error(f"argument to 'len' not supported, got={argument.object_type()}")
 
@@ -27,7 +51,7 @@ def first_builtin(args):
     if len(array.elements) > 0:
         return array.elements[0]
 
-    return Null()
+    return NULL
 
 
 def last_builtin(args):
@@ -41,7 +65,7 @@ def last_builtin(args):
     if len(array.elements) > 0:
         return array.elements[-1]
 
-    return Null()
+    return NULL
 
 
 def rest_builtin(args):
@@ -53,10 +77,9 @@ def rest_builtin(args):
         return Error(f"argument to 'rest' must be ObjectType.ARRAY, got {array.object_type()}")
 
     if len(array.elements) > 0:
-        rest_elements = array.elements[1:]
-        return rest_elements
+        return Array(array.elements.rest())
 
-    return Null()
+    return NULL
 
 
 def push_builtin(args):
@@ -69,17 +92,424 @@ def push_builtin(args):
     if array.object_type() != ObjectType.ARRAY:
         return Error(f"argument to 'push' must be ObjectType.ARRAY, got {array.object_type()}")
 
-    new_array = array.elements[:]
-    new_array.append(new_element)
+    return Array(array.elements.push(new_element))
+
+
+def set_builtin(args):
+    if len(args) != 3:
+        return Error(f"wrong number of arguments. got={len(args)}, want=3")
+
+    hash_object, key, value = args
+    if hash_object.object_type() != ObjectType.HASH:
+        return Error(f"argument to 'set' must be ObjectType.HASH, got {hash_object.object_type()}")
+    if not isinstance(key, Hashable):
+        return Error(f"unusable as hash key: {key.object_type()}")
+
+    return Hash(hash_object.pairs.set(key.hash_key(), HashPair(key, value)))
+
+
+def delete_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    hash_object, key = args
+    if hash_object.object_type() != ObjectType.HASH:
+        return Error(f"argument to 'delete' must be ObjectType.HASH, got {hash_object.object_type()}")
+    if not isinstance(key, Hashable):
+        return Error(f"unusable as hash key: {key.object_type()}")
+
+    return Hash(hash_object.pairs.delete(key.hash_key()))
+
+
+def has_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    hash_object, key = args
+    if hash_object.object_type() != ObjectType.HASH:
+        return Error(f"argument to 'has' must be ObjectType.HASH, got {hash_object.object_type()}")
+    if not isinstance(key, Hashable):
+        return Error(f"unusable as hash key: {key.object_type()}")
+
+    return TRUE if key.hash_key() in hash_object.pairs else FALSE
+
+
+def keys_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    hash_object = args[0]
+    if hash_object.object_type() != ObjectType.HASH:
+        return Error(f"argument to 'keys' must be ObjectType.HASH, got {hash_object.object_type()}")
+
+    return Array([pair.key for pair in hash_object.pairs.values()])
+
+
+def values_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    hash_object = args[0]
+    if hash_object.object_type() != ObjectType.HASH:
+        return Error(f"argument to 'values' must be ObjectType.HASH, got {hash_object.object_type()}")
+
+    return Array([pair.value for pair in hash_object.pairs.values()])
+
+
+def join_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    array, separator = args
+    if array.object_type() != ObjectType.ARRAY:
+        return Error(f"argument to 'join' must be ObjectType.ARRAY, got {array.object_type()}")
+    if separator.object_type() != ObjectType.STRING:
+        return Error(f"separator for 'join' must be ObjectType.STRING, got {separator.object_type()}")
+
+    pieces = []
+    for element in array.elements:
+        if element.object_type() != ObjectType.STRING:
+            return Error(f"elements of 'join' must be ObjectType.STRING, got {element.object_type()}")
+        pieces.append(element.value)
+
+    return String(separator.value.join(pieces))
+
+
+def map_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    array, function = args
+    if array.object_type() != ObjectType.ARRAY and array.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to 'map' must be ObjectType.ARRAY or ObjectType.SEQUENCE, got {array.object_type()}")
+    call = _caller_for(function)
+    if call is None:
+        return Error(f"not a function: {function.object_type()}")
+
+    if type(array) is Sequence:
+        return array.with_stage(call, False)
+
+    results = []
+    for element in array.elements:
+        result = call([element])
+        if type(result) is Error:
+            return result
+        results.append(result)
+
+    return Array(results)
+
+
+def filter_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    array, function = args
+    if array.object_type() != ObjectType.ARRAY and array.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to 'filter' must be ObjectType.ARRAY or ObjectType.SEQUENCE, got {array.object_type()}")
+    call = _caller_for(function)
+    if call is None:
+        return Error(f"not a function: {function.object_type()}")
+
+    if type(array) is Sequence:
+        return array.with_stage(call, True)
+
+    results = []
+    for element in array.elements:
+        result = call([element])
+        if type(result) is Error:
+            return result
+        if result is not FALSE and result is not NULL:
+            results.append(element)
+
+    return Array(results)
+
+
+def reduce_builtin(args):
+    if len(args) != 3:
+        return Error(f"wrong number of arguments. got={len(args)}, want=3")
+
+    array, function, accumulator = args
+    if array.object_type() != ObjectType.ARRAY and array.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to 'reduce' must be ObjectType.ARRAY or ObjectType.SEQUENCE, got {array.object_type()}")
+    call = _caller_for(function)
+    if call is None:
+        return Error(f"not a function: {function.object_type()}")
+
+    # A sequence is consumed one element at a time and never materialized
+    elements = array if type(array) is Sequence else array.elements
+    for element in elements:
+        if type(element) is Error:
+            return element
+        accumulator = call([accumulator, element])
+        if type(accumulator) is Error:
+            return accumulator
+
+    return accumulator
+
+
+def range_builtin(args):
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+
+    for argument in args:
+        if type(argument) is not Integer:
+            return Error(f"argument to 'range' must be ObjectType.INTEGER, got {argument.object_type()}")
+
+    if len(args) == 1:
+        bounds = (0, args[0].value)
+    else:
+        bounds = (args[0].value, args[1].value)
+
+    return Sequence(lambda: map(new_integer, range(*bounds)))
+
+
+def lazy_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    array = args[0]
+    if array.object_type() != ObjectType.ARRAY:
+        return Error(f"argument to 'lazy' must be ObjectType.ARRAY, got {array.object_type()}")
+
+    return Sequence(lambda: iter(array.elements))
+
+
+def collect_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    sequence = args[0]
+    if sequence.object_type() == ObjectType.ARRAY:
+        return sequence
+    if sequence.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to 'collect' must be ObjectType.SEQUENCE, got {sequence.object_type()}")
+
+    return sequence.collect()
+
+
+def sort_builtin(args):
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+
+    array = args[0]
+    if array.object_type() != ObjectType.ARRAY:
+        return Error(f"argument to 'sort' must be ObjectType.ARRAY, got {array.object_type()}")
+    elements = list(array.elements)
+
+    if len(args) == 1:
+        # Without a comparison function only integers or only strings sort
+        types = {type(element) for element in elements}
+        if len(types) > 1 or types - {Integer, String}:
+            return Error("argument to 'sort' must hold only integers or only strings")
+        elements.sort(key=lambda element: element.value)
+        return Array(elements)
+
+    # sort(array, less): less(a, b) is true when a belongs before b
+    function = args[1]
+    call = _caller_for(function)
+    if call is None:
+        return Error(f"not a function: {function.object_type()}")
+
+    failure = []
+
+    def compare(left: Object, right: Object) -> int:
+        # list.sort only ever asks whether left < right
+        if failure:
+            return 0
+        result = call([left, right])
+        if type(result) is Error:
+            failure.append(result)
+            return 0
+        return -1 if result is not FALSE and result is not NULL else 0
+
+    elements.sort(key=functools.cmp_to_key(compare))
+    if failure:
+        return failure[0]
+    return Array(elements)
+
+
+def _integer_values(name: str, collection: Object) -> typing.Union[typing.Sequence[int], Error]:
+    # The native values of an array or sequence that holds only integers
+    if type(collection) is IntArray:
+        return collection.values
+    if collection.object_type() != ObjectType.ARRAY and collection.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to '{name}' must be ObjectType.ARRAY, got {collection.object_type()}")
+
+    values = []
+    for element in collection if type(collection) is Sequence else collection.elements:
+        if type(element) is Error:
+            return element
+        if type(element) is not Integer:
+            return Error(f"argument to '{name}' must hold only integers, got {element.object_type()}")
+        values.append(element.value)
+    return values
+
+
+def ints_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    collection = args[0]
+    if type(collection) is IntArray:
+        return collection
+    if collection.object_type() != ObjectType.ARRAY and collection.object_type() != ObjectType.SEQUENCE:
+        return Error(f"argument to 'ints' must be ObjectType.ARRAY, got {collection.object_type()}")
+
+    # Filled one element at a time, so a sequence is never boxed as a whole
+    values = array.array("q")
+    for element in collection if type(collection) is Sequence else collection.elements:
+        if type(element) is Error:
+            return element
+        if type(element) is not Integer:
+            return Error(f"argument to 'ints' must hold only integers, got {element.object_type()}")
+        try:
+            values.append(element.value)
+        except (OverflowError, TypeError):
+            return Error("argument to 'ints' must hold only 64-bit integers")
+
+    return IntArray(values)
+
+
+def sum_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    values = _integer_values("sum", args[0])
+    if type(values) is Error:
+        return values
+
+    return new_integer(sum(values))
+
+
+def min_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
 
-    return new_array
+    values = _integer_values("min", args[0])
+    if type(values) is Error:
+        return values
+    if len(values) == 0:
+        return NULL
+
+    return new_integer(min(values))
+
+
+def max_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    values = _integer_values("max", args[0])
+    if type(values) is Error:
+        return values
+    if len(values) == 0:
+        return NULL
+
+    return new_integer(max(values))
+
+
+def dot_builtin(args):
+    if len(args) != 2:
+        return Error(f"wrong number of arguments. got={len(args)}, want=2")
+
+    left = _integer_values("dot", args[0])
+    if type(left) is Error:
+        return left
+    right = _integer_values("dot", args[1])
+    if type(right) is Error:
+        return right
+    if len(left) != len(right):
+        return Error(f"arguments to 'dot' must have the same length, got {len(left)} and {len(right)}")
+
+    return new_integer(sum(map(mul, left, right)))
+
+
+# Entries a memoized function keeps before evicting the least recently used
+MEMO_SIZE = 1024
+
+
+class Memo():
+    """
+    A function wrapped with a bounded LRU cache of its results, keyed on the
+    hash keys of its arguments. Calls with an argument that is not hashable
+    go straight to the function; calls that fail are not cached.
+    """
+    __slots__ = ("function", "call", "size", "cache", "hits", "misses", "evictions")
+
+    def __init__(self, function: Object, call: Call, size: int) -> None:
+        self.function = function
+        self.call = call
+        self.size = size
+        self.cache: typing.OrderedDict[typing.Tuple, Object] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, arguments: typing.List[Object]) -> Object:
+        for argument in arguments:
+            if not isinstance(argument, Hashable):
+                return self.call(arguments)
+
+        key = tuple(argument.hash_key() for argument in arguments)
+        cache = self.cache
+        result = cache.get(key, None)
+        if result is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = self.call(arguments)
+        if type(result) is Error:
+            return result
+
+        cache[key] = result
+        if len(cache) > self.size:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return result
+
+
+def memo_builtin(args):
+    if len(args) not in (1, 2):
+        return Error(f"wrong number of arguments. got={len(args)}, want=1 or 2")
+
+    function = args[0]
+    call = _caller_for(function)
+    if call is None:
+        return Error(f"not a function: {function.object_type()}")
+
+    size = MEMO_SIZE
+    if len(args) == 2:
+        if type(args[1]) is not Integer or args[1].value < 1:
+            return Error(f"cache size for 'memo' must be a positive ObjectType.INTEGER, got {args[1].inspect()}")
+        size = args[1].value
+
+    return Builtin(Memo(function, call, size))
+
+
+def memo_stats_builtin(args):
+    if len(args) != 1:
+        return Error(f"wrong number of arguments. got={len(args)}, want=1")
+
+    function = args[0]
+    if type(function) is not Builtin or type(function.function) is not Memo:
+        return Error(f"argument to 'memo_stats' must be a memoized function, got {function.object_type()}")
+
+    memo = function.function
+    stats = {"hits": memo.hits, "misses": memo.misses, "evictions": memo.evictions, "size": len(memo.cache)}
+    pairs = {}
+    for name, value in stats.items():
+        key = String(name)
+        pairs[key.hash_key()] = HashPair(key, new_integer(value))
+
+    return Hash(pairs)
 
 
 def puts_builtin(args):
     for arg in args:
         print(arg.inspect())
 
-    return Null()
+    return NULL
 
 
 BUILTINS = {
@@ -89,4 +519,36 @@ BUILTINS = {
     "rest": Builtin(rest_builtin),
     "push": Builtin(push_builtin),
     "puts": Builtin(puts_builtin),
+    "set": Builtin(set_builtin),
+    "delete": Builtin(delete_builtin),
+    "keys": Builtin(keys_builtin),
+    "values": Builtin(values_builtin),
+    "has": Builtin(has_builtin),
+    "join": Builtin(join_builtin),
+    "map": Builtin(map_builtin),
+    "filter": Builtin(filter_builtin),
+    "reduce": Builtin(reduce_builtin),
+    "range": Builtin(range_builtin),
+    "sort": Builtin(sort_builtin),
+    "lazy": Builtin(lazy_builtin),
+    "collect": Builtin(collect_builtin),
+    "ints": Builtin(ints_builtin),
+    "sum": Builtin(sum_builtin),
+    "min": Builtin(min_builtin),
+    "max": Builtin(max_builtin),
+    "dot": Builtin(dot_builtin),
+    "memo": Builtin(memo_builtin),
+    "memo_stats": Builtin(memo_stats_builtin),
 }
+
+# Builtins whose result depends only on their arguments and that have no
+# side effects; monkey.purity lets pure functions call only these. The
+# higher-order builtins are left out because they call back into functions
+# the analysis cannot see.
+PURE_BUILTINS = frozenset({
+    "len", "first", "last", "rest", "push", "set", "delete", "keys", "values", "has", "join", "range",
+    "lazy", "collect", "ints", "sum", "min", "max", "dot",
+})
+
+# Builtins by the slot monkey.resolver and monkey.compiler give them
+BUILTIN_FUNCTIONS = list(BUILTINS.values())
@@ -0,0 +1,441 @@
+import typing
+
+import monkey.ast as ast
+from monkey.builtins import BUILTINS, BUILTIN_FUNCTIONS
+from monkey.environment import Environment, new_call_environment, new_enclosed_environment
+from monkey.evaluator import (
+    TRUE, FALSE, NULL, INTEGER_INFIX_OPERATORS, EvaluationError, ReturnSignal,
+    _fail, _apply_function, _check_arguments, _eval_infix_expression, _eval_prefix_expression,
+    _eval_index_expression,
+)
+from monkey.object import (
+    Object, Hashable,
+    Integer, HashPair, Hash, new_array,
+    TailCall, Error, Function, Builtin, Call, new_integer
+)
+from monkey.resolver import GLOBAL, BUILTIN, resolve
+
+# A compiled node: takes the environment to run in and returns the same
+# object `evaluate` would return for that node. Like the evaluator, it raises
+# EvaluationError on errors and ReturnSignal on return statements.
+CompiledNode = typing.Callable[[Environment], Object]
+
+
+def compile_to_closure(program: ast.Program) -> CompiledNode:
+    """
+    Walks the program once and returns a tree of Python closures, each
+    specialized for its node's operator and child shapes. Calling the result
+    with an Environment runs the program without re-dispatching on node types.
+    """
+    if program.resolver is None:
+        resolve(program)
+    return _compile_program(program)
+
+
+def _compile(node: ast.Node) -> CompiledNode:
+    if type(node) is ast.ExpressionStatement:
+        return _compile(node.expression)
+    elif type(node) is ast.BlockStatement:
+        return _compile_block_statement(node)
+    elif type(node) is ast.ReturnStatement:
+        return _compile_return_statement(node)
+    elif type(node) is ast.LetStatement:
+        return _compile_let_statement(node)
+    elif type(node) is ast.Identifier:
+        return _compile_identifier(node)
+    elif type(node) is ast.IntegerLiteral:
+        return _compile_constant(node.object)
+    elif type(node) is ast.BooleanLiteral:
+        return _compile_constant(TRUE if node.value else FALSE)
+    elif type(node) is ast.StringLiteral:
+        return _compile_constant(node.object)
+    elif type(node) is ast.PrefixExpression:
+        return _compile_prefix_expression(node)
+    elif type(node) is ast.InfixExpression:
+        return _compile_infix_expression(node)
+    elif type(node) is ast.IfExpression:
+        return _compile_if_expression(node)
+    elif type(node) is ast.FunctionLiteral:
+        return _compile_function_literal(node)
+    elif type(node) is ast.CallExpression:
+        return _compile_call_expression(node)
+    elif type(node) is ast.ArrayLiteral:
+        return _compile_array_literal(node)
+    elif type(node) is ast.HashLiteral:
+        return _compile_hash_literal(node)
+    elif type(node) is ast.IndexExpression:
+        return _compile_index_expression(node)
+    else:
+        return _compile_constant(None)
+
+
+def _compile_program(program: ast.Program) -> CompiledNode:
+    resolver = program.resolver
+    statements = [_compile(statement) for statement in program.statements]
+
+    def run_program(env: Environment) -> Object:
+        result = None
+        env.resolve(program)
+        if program.resolver is not resolver:
+            # Resolved again to share the globals of earlier programs
+            return _compile_program(program)(env)
+
+        try:
+            for statement in statements:
+                result = statement(env)
+        except ReturnSignal as signal:
+            return signal.value
+        except EvaluationError as error:
+            return error.error
+
+        return result
+
+    return run_program
+
+
+def _compile_tail(node: ast.Node) -> CompiledNode:
+    # The node's value is the function's result: a return statement there
+    # can just produce its value instead of raising ReturnSignal
+    if type(node) is ast.BlockStatement:
+        return _compile_block_statement(node, True)
+    elif type(node) is ast.ReturnStatement:
+        return _compile(node.return_value)
+    elif type(node) is ast.ExpressionStatement and type(node.expression) is ast.IfExpression:
+        return _compile_if_expression(node.expression, True)
+    else:
+        return _compile(node)
+
+
+def _compile_block_statement(block: ast.BlockStatement, tail: bool = False) -> CompiledNode:
+    statements = [_compile(statement) for statement in block.statements]
+    if tail and statements:
+        statements[-1] = _compile_tail(block.statements[-1])
+
+    if len(statements) == 1:
+        return statements[0]
+
+    def run_block(env: Environment) -> Object:
+        result = None
+        for statement in statements:
+            result = statement(env)
+        return result
+
+    return run_block
+
+
+def _compile_return_statement(node: ast.ReturnStatement) -> CompiledNode:
+    value = _compile(node.return_value)
+
+    # `return f(x)` carries a TailCall to the trampoline in _call_compiled_function
+    def run_return(env: Environment) -> Object:
+        raise ReturnSignal(value(env))
+
+    return run_return
+
+
+def _compile_let_statement(node: ast.LetStatement) -> CompiledNode:
+    slot = node.name.slot
+    value = _compile(node.value)
+
+    if node.name.depth == GLOBAL:
+        def run_global_let(env: Environment) -> Object:
+            env.globals.slots[slot] = value(env)
+
+        return run_global_let
+
+    def run_let(env: Environment) -> Object:
+        env.slots[slot] = value(env)
+
+    return run_let
+
+
+def _compile_identifier(node: ast.Identifier) -> CompiledNode:
+    depth = node.depth
+    slot = node.slot
+    not_found = f"identifier not found: {node.value}"
+
+    if depth == BUILTIN:
+        builtin = BUILTIN_FUNCTIONS[slot]
+        shadowed = None
+
+        def run_builtin(env: Environment) -> Object:
+            nonlocal shadowed
+            if node.depth == BUILTIN:
+                return builtin
+            # A later program bound the name: see Resolver.bind_global
+            if shadowed is None:
+                shadowed = _compile_identifier(node)
+            return shadowed(env)
+
+        return run_builtin
+
+    if depth == GLOBAL:
+        # Not bound yet: the name only shadows the builtin once it is
+        builtin = BUILTINS.get(node.value, None)
+
+        def run_global(env: Environment) -> Object:
+            slots = env.globals.slots
+            value = slots[slot] if slot < len(slots) else None
+            if value is not None:
+                return value
+            if builtin is None:
+                _fail(not_found)
+            return builtin
+
+        return run_global
+
+    # Read while the let binding the name has not run: see ast.Identifier
+    fallback = _compile_identifier(node.fallback) if node.fallback is not None else None
+
+    if depth == 0:
+        def run_local(env: Environment) -> Object:
+            value = env.slots[slot]
+            if value is not None:
+                return value
+            if fallback is not None:
+                return fallback(env)
+            _fail(not_found)
+
+        return run_local
+
+    def run_outer(env: Environment) -> Object:
+        for _ in range(depth):
+            env = env.outer
+        value = env.slots[slot]
+        if value is not None:
+            return value
+        if fallback is not None:
+            return fallback(env)
+        _fail(not_found)
+
+    return run_outer
+
+
+def _compile_constant(value: Object) -> CompiledNode:
+    # Literal objects are never mutated, so one instance serves every run
+    def run_constant(env: Environment) -> Object:
+        return value
+
+    return run_constant
+
+
+def _compile_prefix_expression(node: ast.PrefixExpression) -> CompiledNode:
+    operator = node.operator
+    right = _compile(node.right)
+
+    if operator == "-":
+        def run_minus(env: Environment) -> Object:
+            value = right(env)
+            if type(value) is Integer:
+                return new_integer(-value.value)
+            return _eval_prefix_expression(operator, value)
+
+        return run_minus
+
+    def run_prefix(env: Environment) -> Object:
+        return _eval_prefix_expression(operator, right(env))
+
+    return run_prefix
+
+
+def _compile_infix_expression(node: ast.InfixExpression) -> CompiledNode:
+    operator = node.operator
+    left = _compile(node.left)
+
+    # `n - 1`, `x < 2`, ...: fold the integer constant into the closure
+    if type(node.right) is ast.IntegerLiteral and operator in INTEGER_CONSTANT_OPERATIONS:
+        return INTEGER_CONSTANT_OPERATIONS[operator](operator, left, node.right.object)
+
+    right = _compile(node.right)
+    if operator in INTEGER_OPERATIONS:
+        return INTEGER_OPERATIONS[operator](operator, left, right)
+
+    def run_infix(env: Environment) -> Object:
+        left_value = left(env)
+        return _eval_infix_expression(operator, left_value, right(env))
+
+    return run_infix
+
+
+def _integer_operation(native: typing.Callable[[int, int], Object]):
+    def specialize(operator: str, left: CompiledNode, right: CompiledNode) -> CompiledNode:
+        def run_operation(env: Environment) -> Object:
+            left_value = left(env)
+            right_value = right(env)
+            if type(left_value) is Integer and type(right_value) is Integer:
+                return native(left_value.value, right_value.value)
+            return _eval_infix_expression(operator, left_value, right_value)
+
+        return run_operation
+
+    return specialize
+
+
+def _integer_constant_operation(native: typing.Callable[[int, int], Object]):
+    def specialize(operator: str, left: CompiledNode, constant: Integer) -> CompiledNode:
+        constant_value = constant.value
+
+        def run_operation(env: Environment) -> Object:
+            left_value = left(env)
+            if type(left_value) is Integer:
+                return native(left_value.value, constant_value)
+            return _eval_infix_expression(operator, left_value, constant)
+
+        return run_operation
+
+    return specialize
+
+
+INTEGER_OPERATIONS = {
+    operator: _integer_operation(native) for operator, native in INTEGER_INFIX_OPERATORS.items()
+}
+
+INTEGER_CONSTANT_OPERATIONS = {
+    operator: _integer_constant_operation(native) for operator, native in INTEGER_INFIX_OPERATORS.items()
+}
+
+
+def _compile_if_expression(node: ast.IfExpression, tail: bool = False) -> CompiledNode:
+    condition = _compile(node.condition)
+    consequence = _compile_block_statement(node.consequence, tail)
+
+    if getattr(node, "alternative", None) is not None:
+        alternative = _compile_block_statement(node.alternative, tail)
+    else:
+        alternative = _compile_constant(NULL)
+
+    def run_if(env: Environment) -> Object:
+        value = condition(env)
+        if value is FALSE or value is NULL:
+            return alternative(env)
+        return consequence(env)
+
+    return run_if
+
+
+def _compile_function_literal(node: ast.FunctionLiteral) -> CompiledNode:
+    parameters = node.parameters
+    body = node.body
+    num_slots = node.num_slots
+    compiled_body = _compile_tail(body)
+
+    def run_function_literal(env: Environment) -> Object:
+        return Function(parameters, body, env, num_slots, compiled_body, _prepare_call)
+
+    return run_function_literal
+
+
+def _compile_call_expression(node: ast.CallExpression) -> CompiledNode:
+    function = _compile(node.function)
+    arguments = [_compile(argument) for argument in node.arguments]
+    tail = node.tail
+
+    def run_call(env: Environment) -> Object:
+        callee = function(env)
+        values = [argument(env) for argument in arguments]
+
+        if type(callee) is Function:
+            if tail:
+                return TailCall(callee, values)
+            if callee.compiled_body is not None:
+                return _call_compiled_function(callee, values)
+        elif type(callee) is Builtin:
+            result = callee.function(values)
+            if type(result) is Error:
+                raise EvaluationError(result)
+            return result
+
+        return _apply_function(callee, values)
+
+    return run_call
+
+
+def _call_compiled_function(function: Function, arguments: typing.List[Object]) -> Object:
+    while True:
+        _check_arguments(function, arguments)
+        function_env = new_enclosed_environment(function.env, function.num_slots)
+        slots = function_env.slots
+        for index in range(len(function.parameters)):
+            slots[index] = arguments[index]
+
+        try:
+            result = function.compiled_body(function_env)
+        except ReturnSignal as signal:
+            result = signal.value
+
+        if type(result) is not TailCall:
+            return result
+
+        # Trampoline: run the tail call in this frame instead of recursing
+        function = result.function
+        arguments = result.arguments
+        if function.compiled_body is None:
+            return _apply_function(function, arguments)
+
+
+def _prepare_call(function: Function) -> Call:
+    body = function.compiled_body
+    outer = function.env
+    num_parameters = len(function.parameters)
+    padding = [None] * (function.num_slots - num_parameters)
+
+    # Called once per element by map, filter, ...: the arguments list becomes
+    # the new scope's slots instead of being copied in one by one
+    def call(arguments: typing.List[Object]) -> Object:
+        if len(arguments) != num_parameters:
+            return _call_compiled_function(function, arguments)
+
+        function_env = new_call_environment(outer, arguments + padding)
+        try:
+            result = body(function_env)
+        except ReturnSignal as signal:
+            result = signal.value
+
+        if type(result) is TailCall:
+            return _call_compiled_function(result.function, result.arguments)
+        return result
+
+    return call
+
+
+def _compile_array_literal(node: ast.ArrayLiteral) -> CompiledNode:
+    elements = [_compile(element) for element in node.elements]
+
+    def run_array_literal(env: Environment) -> Object:
+        return new_array([element(env) for element in elements])
+
+    return run_array_literal
+
+
+def _compile_hash_literal(node: ast.HashLiteral) -> CompiledNode:
+    pairs = [(_compile(key), _compile(value), node.constant_keys.get(key, None)) for key, value in node.pairs.items()]
+
+    def run_hash_literal(env: Environment) -> Object:
+        hashed_pairs = {}
+
+        for key, value, hashed in pairs:
+            key_value = key(env)
+            if not isinstance(key_value, Hashable):
+                _fail(f"unusable as hash key: {key_value.object_type()}")
+
+            value_value = value(env)
+
+            if hashed is None:
+                hashed_pairs[key_value.hash_key()] = HashPair(key_value, value_value)
+            else:
+                hashed_pairs[hashed] = HashPair(key_value, value_value)
+
+        return Hash(hashed_pairs)
+
+    return run_hash_literal
+
+
+def _compile_index_expression(node: ast.IndexExpression) -> CompiledNode:
+    left = _compile(node.left)
+    index = _compile(node.index)
+
+    def run_index(env: Environment) -> Object:
+        left_value = left(env)
+        return _eval_index_expression(left_value, index(env))
+
+    return run_index
@@ -0,0 +1,113 @@
+import typing
+
+# Instructions are a flat list of ints: every opcode is followed directly by
+# its operands, so the VM never has to decode multi-byte operands.
+Instructions = typing.List[int]
+
+CONSTANT = 1
+POP = 2
+# Binary operators are numbered contiguously so the VM can range-check them
+ADD = 3
+SUB = 4
+MUL = 5
+DIV = 6
+EQUAL = 7
+NOT_EQUAL = 8
+GREATER_THAN = 9
+LESS_THAN = 10
+TRUE = 11
+FALSE = 12
+MINUS = 13
+BANG = 14
+JUMP_NOT_TRUTHY = 15
+JUMP = 16
+NULL = 17
+GET_GLOBAL = 18
+SET_GLOBAL = 19
+ARRAY = 20
+HASH = 21
+INDEX = 22
+CALL = 23
+RETURN_VALUE = 24
+RETURN = 25
+GET_LOCAL = 26
+SET_LOCAL = 27
+GET_BUILTIN = 28
+CLOSURE = 29
+GET_FREE = 30
+CURRENT_CLOSURE = 31
+
+
+class Definition():
+    def __init__(self, name: str, operand_count: int) -> None:
+        self.name = name
+        self.operand_count = operand_count
+
+
+DEFINITIONS: typing.Dict[int, Definition] = {
+    CONSTANT: Definition("OpConstant", 1),
+    POP: Definition("OpPop", 0),
+    ADD: Definition("OpAdd", 0),
+    SUB: Definition("OpSub", 0),
+    MUL: Definition("OpMul", 0),
+    DIV: Definition("OpDiv", 0),
+    EQUAL: Definition("OpEqual", 0),
+    NOT_EQUAL: Definition("OpNotEqual", 0),
+    GREATER_THAN: Definition("OpGreaterThan", 0),
+    LESS_THAN: Definition("OpLessThan", 0),
+    TRUE: Definition("OpTrue", 0),
+    FALSE: Definition("OpFalse", 0),
+    MINUS: Definition("OpMinus", 0),
+    BANG: Definition("OpBang", 0),
+    JUMP_NOT_TRUTHY: Definition("OpJumpNotTruthy", 1),
+    JUMP: Definition("OpJump", 1),
+    NULL: Definition("OpNull", 0),
+    GET_GLOBAL: Definition("OpGetGlobal", 1),
+    SET_GLOBAL: Definition("OpSetGlobal", 1),
+    ARRAY: Definition("OpArray", 1),
+    HASH: Definition("OpHash", 1),
+    INDEX: Definition("OpIndex", 0),
+    CALL: Definition("OpCall", 1),
+    RETURN_VALUE: Definition("OpReturnValue", 0),
+    RETURN: Definition("OpReturn", 0),
+    GET_LOCAL: Definition("OpGetLocal", 1),
+    SET_LOCAL: Definition("OpSetLocal", 1),
+    GET_BUILTIN: Definition("OpGetBuiltin", 1),
+    CLOSURE: Definition("OpClosure", 2),  # constant index, free variable count
+    GET_FREE: Definition("OpGetFree", 1),
+    CURRENT_CLOSURE: Definition("OpCurrentClosure", 0),
+}
+
+
+def lookup(op: int) -> Definition:
+    try:
+        return DEFINITIONS[op]
+    except KeyError:
+        raise ValueError(f"opcode {op} undefined")
+
+
+def make(op: int, *operands: int) -> Instructions:
+    definition = lookup(op)
+    if len(operands) != definition.operand_count:
+        raise ValueError(
+            f"operand len {len(operands)} does not match defined {definition.operand_count} for {definition.name}")
+
+    return [op, *operands]
+
+
+def instructions_string(instructions: Instructions) -> str:
+    output = []
+
+    position = 0
+    while position < len(instructions):
+        definition = lookup(instructions[position])
+        operands = instructions[position + 1:position + 1 + definition.operand_count]
+
+        line = f"{position:04d} {definition.name}"
+        for operand in operands:
+            line += f" {operand}"
+        output.append(line)
+
+        position += 1 + definition.operand_count
+
+    return "\n".join(output)
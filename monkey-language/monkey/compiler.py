@@ -0,0 +1,284 @@
+import typing
+
+import monkey.ast as ast
+import monkey.code as code
+from monkey.builtins import BUILTINS
+from monkey.object import Object, CompiledFunction
+from monkey.symbol_table import Symbol, SymbolScope, SymbolTable, new_enclosed_symbol_table
+
+INFIX_OPCODES = {
+    '+': code.ADD,
+    '-': code.SUB,
+    '*': code.MUL,
+    '/': code.DIV,
+    '>': code.GREATER_THAN,
+    '<': code.LESS_THAN,
+    '==': code.EQUAL,
+    '!=': code.NOT_EQUAL,
+}
+
+PREFIX_OPCODES = {
+    '!': code.BANG,
+    '-': code.MINUS,
+}
+
+
+class Bytecode():
+    def __init__(self, instructions: code.Instructions, constants: typing.List[Object],
+                 global_names: typing.List[str]) -> None:
+        self.instructions = instructions
+        self.constants = constants
+        # Only needed to report unbound globals by name at runtime
+        self.global_names = global_names
+
+
+class EmittedInstruction():
+    def __init__(self, opcode: int, position: int) -> None:
+        self.opcode = opcode
+        self.position = position
+
+
+class CompilationScope():
+    def __init__(self) -> None:
+        self.instructions: code.Instructions = []
+        self.last_instruction: EmittedInstruction = None
+        self.previous_instruction: EmittedInstruction = None
+
+
+def new_symbol_table() -> SymbolTable:
+    symbol_table = SymbolTable()
+    for index, name in enumerate(BUILTINS):
+        symbol_table.define_builtin(index, name)
+    return symbol_table
+
+
+class Compiler():
+    def __init__(self, symbol_table: SymbolTable = None, constants: typing.List[Object] = None) -> None:
+        self.constants: typing.List[Object] = constants if constants is not None else []
+        self.symbol_table = symbol_table if symbol_table is not None else new_symbol_table()
+        self.scopes: typing.List[CompilationScope] = [CompilationScope()]
+        self.scope_index = 0
+
+    def compile(self, node: ast.Node) -> None:
+        if type(node) is ast.Program:
+            # Top-level lets shadow builtins in the whole program, even where
+            # they are read before they are bound, as in monkey.resolver
+            self._define_globals(node.statements)
+            for statement in node.statements:
+                self.compile(statement)
+        elif type(node) is ast.ExpressionStatement:
+            self.compile(node.expression)
+            self.emit(code.POP)
+        elif type(node) is ast.BlockStatement:
+            for statement in node.statements:
+                self.compile(statement)
+        elif type(node) is ast.LetStatement:
+            # The value is compiled before the name is defined, so
+            # `let x = x + 1` still sees the outer x, as in the evaluator.
+            if type(node.value) is ast.FunctionLiteral:
+                self._compile_function_literal(node.value, node.name.value)
+            else:
+                self.compile(node.value)
+
+            symbol = self.symbol_table.define(node.name.value)
+            if symbol.scope == SymbolScope.GLOBAL:
+                self.emit(code.SET_GLOBAL, symbol.index)
+            else:
+                self.emit(code.SET_LOCAL, symbol.index)
+        elif type(node) is ast.ReturnStatement:
+            self.compile(node.return_value)
+            self.emit(code.RETURN_VALUE)
+        elif type(node) is ast.Identifier:
+            symbol = self.symbol_table.resolve(node.value)
+            if symbol is None:
+                # Unknown names become globals that are reported as
+                # "identifier not found" if they are still unbound when read.
+                symbol = self._root_symbol_table().define(node.value)
+            self._load_symbol(symbol)
+        elif type(node) is ast.IntegerLiteral:
+            self.emit(code.CONSTANT, self.add_constant(node.object))
+        elif type(node) is ast.StringLiteral:
+            self.emit(code.CONSTANT, self.add_constant(node.object))
+        elif type(node) is ast.BooleanLiteral:
+            self.emit(code.TRUE if node.value else code.FALSE)
+        elif type(node) is ast.PrefixExpression:
+            self.compile(node.right)
+            self.emit(PREFIX_OPCODES[node.operator])
+        elif type(node) is ast.InfixExpression:
+            self.compile(node.left)
+            self.compile(node.right)
+            self.emit(INFIX_OPCODES[node.operator])
+        elif type(node) is ast.IfExpression:
+            self._compile_if_expression(node)
+        elif type(node) is ast.FunctionLiteral:
+            self._compile_function_literal(node, None)
+        elif type(node) is ast.CallExpression:
+            self.compile(node.function)
+            for argument in node.arguments:
+                self.compile(argument)
+            self.emit(code.CALL, len(node.arguments))
+        elif type(node) is ast.ArrayLiteral:
+            for element in node.elements:
+                self.compile(element)
+            self.emit(code.ARRAY, len(node.elements))
+        elif type(node) is ast.HashLiteral:
+            for key, value in node.pairs.items():
+                self.compile(key)
+                self.compile(value)
+            self.emit(code.HASH, len(node.pairs) * 2)
+        elif type(node) is ast.IndexExpression:
+            self.compile(node.left)
+            self.compile(node.index)
+            self.emit(code.INDEX)
+
+    def bytecode(self) -> Bytecode:
+        root = self._root_symbol_table()
+        global_names = [None] * root.num_definitions
+        for symbol in root.store.values():
+            if symbol.scope == SymbolScope.GLOBAL:
+                global_names[symbol.index] = symbol.name
+
+        return Bytecode(self.current_instructions(), self.constants, global_names)
+
+    def add_constant(self, obj: Object) -> int:
+        self.constants.append(obj)
+        return len(self.constants) - 1
+
+    def emit(self, op: int, *operands: int) -> int:
+        instruction = code.make(op, *operands)
+        position = self._add_instruction(instruction)
+        self._set_last_instruction(op, position)
+        return position
+
+    def current_instructions(self) -> code.Instructions:
+        return self.scopes[self.scope_index].instructions
+
+    def enter_scope(self) -> None:
+        self.scopes.append(CompilationScope())
+        self.scope_index += 1
+        self.symbol_table = new_enclosed_symbol_table(self.symbol_table)
+
+    def leave_scope(self) -> code.Instructions:
+        instructions = self.current_instructions()
+
+        self.scopes.pop()
+        self.scope_index -= 1
+        self.symbol_table = self.symbol_table.outer
+
+        return instructions
+
+    def _compile_if_expression(self, node: ast.IfExpression) -> None:
+        self.compile(node.condition)
+
+        # Emit with a bogus offset that is patched once the target is known
+        jump_not_truthy_position = self.emit(code.JUMP_NOT_TRUTHY, 9999)
+
+        self._compile_branch(node.consequence)
+
+        jump_position = self.emit(code.JUMP, 9999)
+        self._change_operand(jump_not_truthy_position, len(self.current_instructions()))
+
+        if getattr(node, "alternative", None) is None:
+            self.emit(code.NULL)
+        else:
+            self._compile_branch(node.alternative)
+
+        self._change_operand(jump_position, len(self.current_instructions()))
+
+    def _compile_branch(self, block: ast.BlockStatement) -> None:
+        # A branch leaves its last expression value on the stack
+        self.compile(block)
+
+        if self._last_instruction_is(code.POP):
+            self._remove_last_pop()
+        elif not self._last_instruction_is(code.RETURN_VALUE):
+            self.emit(code.NULL)
+
+    def _compile_function_literal(self, node: ast.FunctionLiteral, name: typing.Optional[str]) -> None:
+        self.enter_scope()
+
+        if name is not None:
+            self.symbol_table.define_function_name(name)
+
+        for parameter in node.parameters:
+            self.symbol_table.define(parameter.value)
+
+        self.compile(node.body)
+
+        if self._last_instruction_is(code.POP):
+            self._replace_last_pop_with_return()
+        if not self._last_instruction_is(code.RETURN_VALUE):
+            self.emit(code.RETURN)
+
+        free_symbols = self.symbol_table.free_symbols
+        num_locals = self.symbol_table.num_definitions
+        local_names = [None] * num_locals
+        for symbol in self.symbol_table.store.values():
+            if symbol.scope == SymbolScope.LOCAL:
+                local_names[symbol.index] = symbol.name
+        instructions = self.leave_scope()
+
+        for symbol in free_symbols:
+            self._load_symbol(symbol)
+
+        function = CompiledFunction(instructions, num_locals, len(node.parameters), local_names,
+                                    [symbol.name for symbol in free_symbols])
+        self.emit(code.CLOSURE, self.add_constant(function), len(free_symbols))
+
+    def _load_symbol(self, symbol: Symbol) -> None:
+        if symbol.scope == SymbolScope.GLOBAL:
+            self.emit(code.GET_GLOBAL, symbol.index)
+        elif symbol.scope == SymbolScope.LOCAL:
+            self.emit(code.GET_LOCAL, symbol.index)
+        elif symbol.scope == SymbolScope.BUILTIN:
+            self.emit(code.GET_BUILTIN, symbol.index)
+        elif symbol.scope == SymbolScope.FREE:
+            self.emit(code.GET_FREE, symbol.index)
+        elif symbol.scope == SymbolScope.FUNCTION:
+            self.emit(code.CURRENT_CLOSURE)
+
+    def _define_globals(self, statements: typing.List[ast.Statement]) -> None:
+        # Lets in top-level if blocks bind globals too
+        for statement in statements:
+            if type(statement) is ast.LetStatement:
+                self._root_symbol_table().define(statement.name.value)
+            elif type(statement) is ast.ExpressionStatement and type(statement.expression) is ast.IfExpression:
+                self._define_globals(statement.expression.consequence.statements)
+                alternative = getattr(statement.expression, "alternative", None)
+                if alternative is not None:
+                    self._define_globals(alternative.statements)
+
+    def _root_symbol_table(self) -> SymbolTable:
+        symbol_table = self.symbol_table
+        while symbol_table.outer is not None:
+            symbol_table = symbol_table.outer
+        return symbol_table
+
+    def _add_instruction(self, instruction: code.Instructions) -> int:
+        instructions = self.current_instructions()
+        position = len(instructions)
+        instructions.extend(instruction)
+        return position
+
+    def _set_last_instruction(self, op: int, position: int) -> None:
+        scope = self.scopes[self.scope_index]
+        scope.previous_instruction = scope.last_instruction
+        scope.last_instruction = EmittedInstruction(op, position)
+
+    def _last_instruction_is(self, op: int) -> bool:
+        last = self.scopes[self.scope_index].last_instruction
+        return last is not None and last.opcode == op
+
+    def _remove_last_pop(self) -> None:
+        scope = self.scopes[self.scope_index]
+        del scope.instructions[scope.last_instruction.position:]
+        scope.last_instruction = scope.previous_instruction
+
+    def _replace_last_pop_with_return(self) -> None:
+        scope = self.scopes[self.scope_index]
+        scope.instructions[scope.last_instruction.position] = code.RETURN_VALUE
+        scope.last_instruction.opcode = code.RETURN_VALUE
+
+    def _change_operand(self, position: int, operand: int) -> None:
+        instructions = self.current_instructions()
+        instructions[position + 1] = operand
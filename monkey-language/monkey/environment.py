@@ -1,23 +1,82 @@
+import typing
+
+import monkey.ast as ast
 from monkey.object import Object
+from monkey.resolver import Resolver
 
 
 class Environment():
-    def __init__(self) -> None:
-        self.store = {}
-        self.outer: Environment = None
+    __slots__ = ("slots", "outer", "globals", "resolver")
+
+    def __init__(self, size: int = 0, outer: 'Environment' = None) -> None:
+        # One slot per parameter and let binding, as numbered by monkey.resolver
+        self.slots: typing.List[Object] = [None] * size
+        self.outer: Environment = outer
+
+        if outer is None:
+            self.globals: Environment = self
+            # Numbers the global slots and remembers which builtins are
+            # shadowed, for every program run here, such as REPL lines
+            self.resolver: Resolver = None
+        else:
+            self.globals = outer.globals
+
+    def global_resolver(self) -> Resolver:
+        globals = self.globals
+        if globals.resolver is None:
+            globals.resolver = Resolver()
+        return globals.resolver
+
+    def resolve(self, node: ast.Node) -> None:
+        # A node resolved for another environment, or not at all, is resolved
+        # again, so that it agrees with the programs that ran here before.
+        # Nodes other than programs are resolved as top-level statements.
+        globals = self.globals
+        resolved_by = getattr(node, "resolver", None)
+        if resolved_by is None or resolved_by is not globals.resolver:
+            if globals.resolver is None and resolved_by is not None:
+                globals.resolver = resolved_by
+
+            resolver = self.global_resolver()
+            if resolved_by is not resolver:
+                if type(node) is ast.Program:
+                    resolver.resolve(node)
+                else:
+                    resolver.resolve_statement(node)
+        self.reserve_globals()
+
+    def reserve_globals(self) -> None:
+        resolver = self.globals.resolver
+        if resolver is None:
+            return
+
+        slots = self.globals.slots
+        if len(slots) < len(resolver.global_slots):
+            slots.extend([None] * (len(resolver.global_slots) - len(slots)))
 
     def get_variable(self, name: str):
-        obj = self.store.get(name, None)
-        if obj is None and self.outer != None:
-            obj = self.outer.store.get(name, None)
-        return obj
+        resolver = self.globals.resolver
+        slot = resolver.global_slots.get(name, None) if resolver is not None else None
+        if slot is None or slot >= len(self.globals.slots):
+            return None
+        return self.globals.slots[slot]
 
     def set_variable(self, name: str, value: Object):
-        self.store[name] = value
+        slot = self.global_resolver().bind_global(name)
+        self.reserve_globals()
+        self.globals.slots[slot] = value
         return value
 
 
-def new_enclosed_environment(outer: Environment) -> Environment:
-    env = Environment()
+def new_enclosed_environment(outer: Environment, size: int = 0) -> Environment:
+    return Environment(size, outer)
+
+
+def new_call_environment(outer: Environment, slots: typing.List[Object]) -> Environment:
+    # Takes over `slots` as is, without the checks of __init__: for the calls
+    # builtins such as map make once per element
+    env = Environment.__new__(Environment)
+    env.slots = slots
     env.outer = outer
+    env.globals = outer.globals
     return env
@@ -1,176 +1,240 @@
+import array
 import typing
+from operator import add, mul
+
 import monkey.ast as ast
-from monkey.builtins import BUILTINS
-from monkey.environment import Environment, new_enclosed_environment
+from monkey.builtins import BUILTINS, BUILTIN_FUNCTIONS
+from monkey.environment import Environment, new_call_environment, new_enclosed_environment
 from monkey.object import (
     Object, ObjectType, Hashable,
-    Integer, Boolean, String, Null, Array, HashPair, Hash,
-    ReturnValue, Error, Function, Builtin
+    Integer, Boolean, String, Array, IntArray, HashPair, Hash,
+    TailCall, Error, Function, Builtin, Call, new_integer, new_array, concat_strings,
+    TRUE, FALSE, NULL,
 )
+from monkey.resolver import GLOBAL, BUILTIN
+
+
+class EvaluationError(Exception):
+    """
+    Raised where evaluation fails. Nothing between the failure and the
+    program boundary checks for errors; _eval_program turns the exception back
+    into the Error object it carries.
+    """
+
+    def __init__(self, error: Error) -> None:
+        super().__init__(error.message)
+        self.error: Error = error
+
+
+class ReturnSignal(Exception):
+    """Raised by a return statement and caught by the enclosing call or program."""
 
-TRUE = Boolean(True)
-FALSE = Boolean(False)
-NULL = Null()
+    def __init__(self, value: Object) -> None:
+        self.value: Object = value
+
+
+def _fail(message: str) -> typing.NoReturn:
+    raise EvaluationError(Error(message))
 
 
 def evaluate(node: ast.Node, env: Environment) -> Object:
-    # Statements
-    if type(node) is ast.Program:
-        return _eval_program(node, env)
-    elif type(node) is ast.ExpressionStatement:
-        return evaluate(node.expression, env)
-    elif type(node) is ast.BlockStatement:
-        return _eval_block_statement(node, env)
-    elif type(node) is ast.ReturnStatement:
-        value = evaluate(node.return_value, env)
-
-        if _is_error(value):
-            return value
-        return ReturnValue(value)
-    elif type(node) is ast.LetStatement:
-        value = evaluate(node.value, env)
-        if _is_error(value):
-            return value
-        env.set_variable(node.name.value, value)
-
-    elif type(node) is ast.Identifier:
-        return _eval_identifier(node, env)
+    """
+    Evaluates a program, or any other node as a top-level statement. A node
+    resolved for another environment is resolved again for env first, as its
+    global addresses would be another environment's.
+    """
+    if type(node) is not ast.Program:
+        env.resolve(node)
+    return _evaluate(node, env)
+
+
+def _evaluate(node: ast.Node, env: Environment) -> Object:
+    # Every node type costs one dictionary lookup, however far down the
+    # table it is registered
+    evaluator = EVALUATORS.get(type(node), None)
+    if evaluator is None:
+        return None
+    return evaluator(node, env)
 
-    # Expressions
-    elif type(node) is ast.IntegerLiteral:
-        return Integer(node.value)
-    elif type(node) is ast.BooleanLiteral:
-        return _native_bool_to_boolean_object(node.value)
-    elif type(node) is ast.StringLiteral:
-        return String(node.value)
-    elif type(node) is ast.PrefixExpression:
-        right = evaluate(node.right, env)
-        if _is_error(right):
-            return right
-        return _eval_prefix_expression(node.operator, right)
-    elif type(node) is ast.InfixExpression:
-        left = evaluate(node.left, env)
-        if _is_error(left):
-            return left
-
-        right = evaluate(node.right, env)
-        if _is_error(right):
-            return right
-
-        return _eval_infix_expression(node.operator, left, right)
-    elif type(node) is ast.IfExpression:
-        return _eval_if_expression(node, env)
-    elif type(node) is ast.FunctionLiteral:
-        parameters = node.parameters
-        body = node.body
-        return Function(parameters, body, env)
-    elif type(node) is ast.CallExpression:
-        function = evaluate(node.function, env)
-        if _is_error(function):
-            return function
-        arguments = _eval_expressions(node.arguments, env)
-        if len(arguments) == 1 and _is_error(arguments[0]):
-            return arguments[0]
-        return _apply_function(function, arguments)
-    elif type(node) is ast.ArrayLiteral:
-        elements = _eval_expressions(node.elements, env)
-        if len(elements) == 1 and _is_error(elements[0]):
-            return elements[0]
-        return Array(elements)
-    elif type(node) is ast.HashLiteral:
-        return _eval_hash_literal(node, env)
-    elif type(node) is ast.IndexExpression:
-        left = evaluate(node.left, env)
-        if _is_error(left):
-            return left
-        index = evaluate(node.index, env)
-        if _is_error(index):
-            return index
-        return _eval_index_expression(left, index)
+
+def _eval_expression_statement(node: ast.ExpressionStatement, env: Environment) -> Object:
+    return _evaluate(node.expression, env)
+
+
+def _eval_return_statement(node: ast.ReturnStatement, env: Environment) -> Object:
+    # `return f(x)` carries a TailCall to the trampoline in _apply_function
+    raise ReturnSignal(_evaluate(node.return_value, env))
+
+
+def _eval_let_statement(node: ast.LetStatement, env: Environment) -> Object:
+    value = _evaluate(node.value, env)
+
+    name = node.name
+    if name.depth == GLOBAL:
+        env.globals.slots[name.slot] = value
     else:
-        return None
+        env.slots[name.slot] = value
+
+
+def _eval_integer_literal(node: ast.IntegerLiteral, env: Environment) -> Object:
+    return node.object
+
+
+def _eval_boolean_literal(node: ast.BooleanLiteral, env: Environment) -> Object:
+    return _native_bool_to_boolean_object(node.value)
+
+
+def _eval_string_literal(node: ast.StringLiteral, env: Environment) -> Object:
+    return node.object
+
+
+def _eval_prefix_node(node: ast.PrefixExpression, env: Environment) -> Object:
+    return _eval_prefix_expression(node.operator, _evaluate(node.right, env))
+
+
+def _eval_infix_node(node: ast.InfixExpression, env: Environment) -> Object:
+    left = _evaluate(node.left, env)
+    return _eval_infix_expression(node.operator, left, _evaluate(node.right, env))
+
+
+def _eval_function_literal(node: ast.FunctionLiteral, env: Environment) -> Object:
+    parameters = node.parameters
+    body = node.body
+    return Function(parameters, body, env, node.num_slots, None, _prepare_call)
+
+
+def _eval_call_expression(node: ast.CallExpression, env: Environment) -> Object:
+    function = _evaluate(node.function, env)
+    arguments = _eval_expressions(node.arguments, env)
+    if node.tail and type(function) is Function:
+        return TailCall(function, arguments)
+    return _apply_function(function, arguments)
+
+
+def _eval_array_literal(node: ast.ArrayLiteral, env: Environment) -> Object:
+    return new_array(_eval_expressions(node.elements, env))
+
+
+def _eval_index_node(node: ast.IndexExpression, env: Environment) -> Object:
+    left = _evaluate(node.left, env)
+    return _eval_index_expression(left, _evaluate(node.index, env))
 
 
 def _apply_function(function: Object, arguments: typing.List[Object]) -> Object:
     if isinstance(function, Function):
-        extended_env = _extended_function_env(function, arguments)
-        evaluated = evaluate(function.body, extended_env)
-        return _unwrap_return_value(evaluated)
+        # Calls in tail position come back as TailCall instead of recursing,
+        # so the callee runs in this same Python frame
+        while True:
+            try:
+                evaluated = _evaluate(function.body, _extended_function_env(function, arguments))
+            except ReturnSignal as signal:
+                evaluated = signal.value
+
+            if type(evaluated) is not TailCall:
+                return evaluated
+            function = evaluated.function
+            arguments = evaluated.arguments
 
     elif isinstance(function, Builtin):
-        return function.function(arguments)
+        result = function.function(arguments)
+        if type(result) is Error:
+            raise EvaluationError(result)
+        return result
 
     else:
-        return Error(f"not a function: {function.object_type()}")
+        _fail(f"not a function: {function.object_type()}")
 
 
-def _extended_function_env(function: Function, arguments: typing.List[Object]) -> Environment:
-    env = new_enclosed_environment(function.env)
+def _prepare_call(function: Function) -> Call:
+    outer = function.env
+    body = function.body
+    num_parameters = len(function.parameters)
+    padding = [None] * (function.num_slots - num_parameters)
 
-    for index in range(len(function.parameters)):
-        env.set_variable(function.parameters[index].value, arguments[index])
+    # Called once per element by map, filter, ...: the arguments list becomes
+    # the new scope's slots instead of being copied in one by one
+    def call(arguments: typing.List[Object]) -> Object:
+        if len(arguments) != num_parameters:
+            return _apply_function(function, arguments)
 
-    return env
+        function_env = new_call_environment(outer, arguments + padding)
+        try:
+            result = _evaluate(body, function_env)
+        except ReturnSignal as signal:
+            result = signal.value
 
+        if type(result) is TailCall:
+            return _apply_function(result.function, result.arguments)
+        return result
 
-def _unwrap_return_value(obj: Object) -> Object:
-    if isinstance(obj, ReturnValue):
-        return obj.value
-    return obj
+    return call
 
 
-def _eval_program(program: ast.Program, env: Environment) -> Object:
-    result: Object
+def _check_arguments(function: Function, arguments: typing.List[Object]) -> None:
+    # Extra arguments are ignored, as they always were; missing ones are an error
+    if len(arguments) < len(function.parameters):
+        _fail(f"wrong number of arguments: want={len(function.parameters)}, got={len(arguments)}")
 
-    for statement in program.statements:
-        result = evaluate(statement, env)
 
-        if isinstance(result, ReturnValue):
-            return result.value
-        elif isinstance(result, Error):
-            return result
+def _extended_function_env(function: Function, arguments: typing.List[Object]) -> Environment:
+    _check_arguments(function, arguments)
+    env = new_enclosed_environment(function.env, function.num_slots)
 
-    return result
+    # Parameters occupy the first slots of the function scope
+    for index in range(len(function.parameters)):
+        env.slots[index] = arguments[index]
 
+    return env
 
-def _eval_block_statement(block: ast.BlockStatement, env: Environment) -> Object:
+
+def _eval_program(program: ast.Program, env: Environment) -> Object:
     result: Object
 
-    for statement in block.statements:
-        result = evaluate(statement, env)
+    env.resolve(program)
 
-        if result.object_type() == ObjectType.RETURN_VALUE or result.object_type() == ObjectType.ERROR:
-            return result
+    try:
+        for statement in program.statements:
+            result = _evaluate(statement, env)
+    except ReturnSignal as signal:
+        return signal.value
+    except EvaluationError as error:
+        return error.error
 
     return result
 
 
-def _eval_statements(statements: typing.List[ast.Statement], env: Environment) -> Object:
-    result = None
-
+def evaluate_statements(statements: typing.Iterable[ast.Statement], env: Environment) -> typing.Iterator[Object]:
+    """
+    Runs top-level statements as they arrive and yields each one's result.
+    Statements not resolved by env.global_resolver() are resolved again, so
+    Parser.iter_statements(env.global_resolver()) resolves each just once.
+    Like a program, it stops after a top-level return or an error.
+    """
     for statement in statements:
-        result = evaluate(statement, env)
+        env.resolve(statement)
 
-        if isinstance(result, ReturnValue):
-            return result
-
-    return result
+        try:
+            yield _evaluate(statement, env)
+        except ReturnSignal as signal:
+            yield signal.value
+            return
+        except EvaluationError as error:
+            yield error.error
+            return
 
 
-def _eval_expressions(expressions: typing.List[ast.Expression], env: Environment) -> Object:
-    result: typing.List[Object] = []
+def _eval_block_statement(block: ast.BlockStatement, env: Environment) -> Object:
+    # Let statements evaluate to None
+    result = None
 
-    for expression in expressions:
-        evaluated = evaluate(expression, env)
-        if evaluated is None:
-            return evaluated
+    for statement in block.statements:
+        result = _evaluate(statement, env)
 
-        if _is_error(evaluated):
-            return evaluated
+    return result
 
-        result.append(evaluated)
 
-    return result
+def _eval_expressions(expressions: typing.List[ast.Expression], env: Environment) -> typing.List[Object]:
+    return [_evaluate(expression, env) for expression in expressions]
 
 
 def _native_bool_to_boolean_object(input: bool) -> Boolean:
@@ -181,24 +245,35 @@ def _native_bool_to_boolean_object(input: bool) -> Boolean:
 
 
 def _eval_identifier(node: ast.Identifier, env: Environment) -> Object:
-    value = env.get_variable(node.value)
-    if value is not None:
-        return value
+    depth = node.depth
+    if depth == 0:
+        value = env.slots[node.slot]
+    elif depth == GLOBAL:
+        slots = env.globals.slots
+        value = slots[node.slot] if node.slot < len(slots) else None
+    elif depth == BUILTIN:
+        return BUILTIN_FUNCTIONS[node.slot]
+    else:
+        for _ in range(depth):
+            env = env.outer
+        value = env.slots[node.slot]
 
-    value = BUILTINS.get(node.value, None)
     if value is not None:
         return value
+    if node.fallback is not None:
+        return _eval_identifier(node.fallback, env)
+    if depth == GLOBAL and node.value in BUILTINS:
+        # Not bound yet: the name only shadows the builtin once it is
+        return BUILTINS[node.value]
 
-    return Error(f"identifier not found: {node.value}")
+    _fail(f"identifier not found: {node.value}")
 
 
 def _eval_prefix_expression(operator: str, right: Object) -> Object:
-    if operator == "!":
-        return _eval_bang_operator_expression(right)
-    elif operator == "-":
-        return _eval_minus_prefix_operator_expression(right)
-    else:
+    operation = PREFIX_OPERATORS.get(operator, None)
+    if operation is None:
         return NULL
+    return operation(right)
 
 
 def _eval_bang_operator_expression(right: Object) -> Object:
@@ -214,80 +289,114 @@ def _eval_bang_operator_expression(right: Object) -> Object:
 
 def _eval_minus_prefix_operator_expression(right: Object) -> Object:
     if right.object_type() != ObjectType.INTEGER:
-        return Error(f"unknown operator: -{right.object_type()}")
+        _fail(f"unknown operator: -{right.object_type()}")
 
     value = right.value
-    return Integer(-value)
+    return new_integer(-value)
 
 
 def _eval_infix_expression(operator: str, left: Object, right: Object) -> Object:
-    if left.object_type() == ObjectType.INTEGER and right.object_type() == ObjectType.INTEGER:
+    if type(left) is Integer and type(right) is Integer:
         return _eval_integer_infix_expression(operator, left, right)
-    if left.object_type() == ObjectType.STRING and right.object_type() == ObjectType.STRING:
+    if type(left) is String and type(right) is String:
         return _eval_string_infix_expression(operator, left, right)
+    elif isinstance(left, Array) and operator in INT_ARRAY_INFIX_OPERATORS:
+        return _eval_int_array_infix_expression(operator, left, right)
     elif operator == '==':
         return _native_bool_to_boolean_object(left == right)
     elif operator == '!=':
         return _native_bool_to_boolean_object(left != right)
-    elif left.object_type() != right.object_type():
-        return Error(f"type mismatch: {left.object_type()} {operator} {right.object_type()}")
     else:
-        return Error(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
+        _fail_infix_expression(operator, left, right)
+
+
+def _fail_infix_expression(operator: str, left: Object, right: Object) -> None:
+    if left.object_type() != right.object_type():
+        _fail(f"type mismatch: {left.object_type()} {operator} {right.object_type()}")
+    _fail(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
 
 
 def _eval_integer_infix_expression(operator: str, left: Object, right: Object) -> Object:
-    if operator == '+':
-        return Integer(left.value + right.value)
-    elif operator == '-':
-        return Integer(left.value - right.value)
-    elif operator == '*':
-        return Integer(left.value * right.value)
-    elif operator == '/':
-        return Integer(left.value / right.value)
-    elif operator == '<':
-        return _native_bool_to_boolean_object(left.value < right.value)
-    elif operator == '>':
-        return _native_bool_to_boolean_object(left.value > right.value)
-    elif operator == '==':
-        return _native_bool_to_boolean_object(left.value == right.value)
-    elif operator == '!=':
-        return _native_bool_to_boolean_object(left.value != right.value)
-    else:
-        return Error(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
+    operation = INTEGER_INFIX_OPERATORS.get(operator, None)
+    if operation is None:
+        _fail(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
+    return operation(left.value, right.value)
 
 
 def _eval_string_infix_expression(operator: str, left: Object, right: Object) -> Object:
-    if operator == '+':
-        return String(left.value + right.value)
-    else:
-        return Error(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
+    operation = STRING_INFIX_OPERATORS.get(operator, None)
+    if operation is None:
+        _fail(f"unknown operator: {left.object_type()} {operator} {right.object_type()}")
+    return operation(left, right)
+
+
+def _eval_int_array_infix_expression(operator: str, left: Array, right: Object) -> Object:
+    # Element by element against another array of integers. Whether the
+    # arrays are stored unboxed does not matter.
+    left_values = _integer_values(left)
+    if left_values is None or not isinstance(right, Array):
+        _fail_infix_expression(operator, left, right)
+
+    values = _integer_values(right)
+    if values is None:
+        _fail_infix_expression(operator, left, right)
+    if len(values) != len(left_values):
+        _fail(f"length mismatch: {len(left_values)} {operator} {len(values)}")
+
+    operation = INT_ARRAY_INFIX_OPERATORS[operator]
+    try:
+        return IntArray(array.array("q", map(operation, left_values, values)))
+    except (OverflowError, TypeError):
+        # Results past 64 bits need boxed integers
+        return Array([new_integer(value) for value in map(operation, left_values, values)])
+
+
+def _integer_values(array_object: Array) -> typing.Optional[typing.Sequence[int]]:
+    if type(array_object) is IntArray:
+        return array_object.values
+
+    values = []
+    for element in array_object.elements:
+        if type(element) is not Integer:
+            return None
+        values.append(element.value)
+    return values
 
 
 def _eval_if_expression(if_expression: ast.IfExpression, env: Environment) -> Object:
-    condition = evaluate(if_expression.condition, env)
-    if _is_error(condition):
-        return condition
+    condition = _evaluate(if_expression.condition, env)
 
     if _is_truthy(condition):
-        return evaluate(if_expression.consequence, env)
+        return _evaluate(if_expression.consequence, env)
     elif hasattr(if_expression, "alternative") and if_expression.alternative != None:
-        return evaluate(if_expression.alternative, env)
+        return _evaluate(if_expression.alternative, env)
     else:
         return NULL
 
 
 def _eval_index_expression(left: Object, index: Object) -> Object:
+    if left.object_type() == ObjectType.SEQUENCE:
+        left = left.collect()
+        if type(left) is Error:
+            raise EvaluationError(left)
+
     if left.object_type() == ObjectType.ARRAY and index.object_type() == ObjectType.INTEGER:
         return _eval_array_index_expression(left, index)
     elif left.object_type() == ObjectType.HASH:
         return _eval_hash_index_expression(left, index)
     else:
-        return Error(f"index operator not supported: {left.object_type()}")
+        _fail(f"index operator not supported: {left.object_type()}")
 
 
 def _eval_array_index_expression(array: Object, index: Object) -> Object:
     array_object = array
     idx = index.value
+
+    if type(array_object) is IntArray:
+        values = array_object.values
+        if idx < 0 or idx >= len(values):
+            return NULL
+        return new_integer(values[idx])
     maximum = len(array_object.elements) - 1
 
     if idx < 0 or idx > maximum:
@@ -298,7 +407,7 @@ def _eval_array_index_expression(array: Object, index: Object) -> Object:
 
 def _eval_hash_index_expression(hash_object: Object, index: Object) -> Object:
     if not isinstance(index, Hashable):
-        return Error(f"unusable as hash key: {index.object_type()}")
+        _fail(f"unusable as hash key: {index.object_type()}")
 
     pair = hash_object.pairs.get(index.hash_key(), None)
     if pair is None:
@@ -309,20 +418,18 @@ def _eval_hash_index_expression(hash_object: Object, index: Object) -> Object:
 
 def _eval_hash_literal(node: ast.HashLiteral, env: Environment) -> Object:
     pairs = {}
+    constant_keys = node.constant_keys
 
     for node_key, node_value in node.pairs.items():
-        key = evaluate(node_key, env)
-        if _is_error(key) or key is None:
-            return key
-
+        key = _evaluate(node_key, env)
         if not isinstance(key, Hashable):
-            return Error(f"unusable as hash key: {key.type}")
+            _fail(f"unusable as hash key: {key.object_type()}")
 
-        value = evaluate(node_value, env)
-        if _is_error(value) or value is None:
-            return value
+        value = _evaluate(node_value, env)
 
-        hashed = key.hash_key()
+        hashed = constant_keys.get(node_key, None)
+        if hashed is None:
+            hashed = key.hash_key()
         pairs[hashed] = HashPair(key, value)
 
     return Hash(pairs)
@@ -339,7 +446,53 @@ def _is_truthy(obj: Object) -> bool:
         return True
 
 
-def _is_error(obj: Object) -> bool:
-    if obj:
-        return obj.object_type() == Error
-    return False
+EVALUATORS: typing.Dict[type, typing.Callable[[ast.Node, Environment], Object]] = {
+    # Statements
+    ast.Program: _eval_program,
+    ast.ExpressionStatement: _eval_expression_statement,
+    ast.BlockStatement: _eval_block_statement,
+    ast.ReturnStatement: _eval_return_statement,
+    ast.LetStatement: _eval_let_statement,
+    ast.Identifier: _eval_identifier,
+
+    # Expressions
+    ast.IntegerLiteral: _eval_integer_literal,
+    ast.BooleanLiteral: _eval_boolean_literal,
+    ast.StringLiteral: _eval_string_literal,
+    ast.PrefixExpression: _eval_prefix_node,
+    ast.InfixExpression: _eval_infix_node,
+    ast.IfExpression: _eval_if_expression,
+    ast.FunctionLiteral: _eval_function_literal,
+    ast.CallExpression: _eval_call_expression,
+    ast.ArrayLiteral: _eval_array_literal,
+    ast.HashLiteral: _eval_hash_literal,
+    ast.IndexExpression: _eval_index_node,
+}
+
+PREFIX_OPERATORS: typing.Dict[str, typing.Callable[[Object], Object]] = {
+    '!': _eval_bang_operator_expression,
+    '-': _eval_minus_prefix_operator_expression,
+}
+
+# Operations on the native values of two integers
+INTEGER_INFIX_OPERATORS: typing.Dict[str, typing.Callable[[int, int], Object]] = {
+    '+': lambda left, right: new_integer(left + right),
+    '-': lambda left, right: new_integer(left - right),
+    '*': lambda left, right: new_integer(left * right),
+    '/': lambda left, right: new_integer(left / right),
+    '<': lambda left, right: TRUE if left < right else FALSE,
+    '>': lambda left, right: TRUE if left > right else FALSE,
+    '==': lambda left, right: TRUE if left == right else FALSE,
+    '!=': lambda left, right: TRUE if left != right else FALSE,
+}
+
+# Element-wise operations on the native values of two integer arrays
+INT_ARRAY_INFIX_OPERATORS: typing.Dict[str, typing.Callable[[int, int], int]] = {
+    '+': add,
+    '*': mul,
+}
+
+# Operations on two String objects, which may still be unflattened ropes
+STRING_INFIX_OPERATORS: typing.Dict[str, typing.Callable[[String, String], Object]] = {
+    '+': concat_strings,
+}
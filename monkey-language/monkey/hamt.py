@@ -0,0 +1,263 @@
+import typing
+
+# Each trie level consumes 5 bits of the key's hash
+BITS = 5
+MASK = (1 << BITS) - 1
+HASH_MASK = (1 << 64) - 1
+
+# Nodes store their entries flat as [key, value, key, value, ...]. A None key
+# marks an entry whose value is a child node one level further down.
+# PersistentMap stores each value as an (insertion order, value) pair.
+Entries = typing.List[typing.Any]
+Entry = typing.Tuple[int, typing.Any]
+
+# Insertion counter values left unused by deletes before the map renumbers
+MAX_UNUSED_ORDERS = 32
+
+
+class PersistentMap():
+    """
+    Immutable hash map stored as a hash array mapped trie. Lookups, set and
+    delete touch one node per level, O(log32 n); set and delete copy only the
+    nodes on the path to the key and share every other node with the original.
+    Keys are iterated in insertion order, as in a dict: every entry keeps the
+    counter value it was first set with, and items() places each entry at
+    its counter value. Deleting renumbers the entries once most counter
+    values are unused, so iterating stays proportional to the count.
+    """
+    __slots__ = ("count", "root", "next_order")
+
+    def __init__(self, count: int = 0, root: '_BitmapNode' = None, next_order: int = 0) -> None:
+        self.count = count
+        self.root = root
+        self.next_order = next_order
+
+    @classmethod
+    def from_dict(cls, items: typing.Dict[typing.Any, typing.Any]) -> 'PersistentMap':
+        result = EMPTY
+        for key, value in items.items():
+            result = result.set(key, value)
+        return result
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: typing.Any) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        for key, _ in self.items():
+            yield key
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())})"
+
+    def get(self, key: typing.Any, default: typing.Any = None) -> typing.Any:
+        if self.root is None:
+            return default
+        entry = self.root.find(0, hash(key) & HASH_MASK, key, None)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def items(self) -> typing.Iterator[typing.Tuple[typing.Any, typing.Any]]:
+        if self.root is None:
+            return
+
+        ordered: typing.List[typing.Optional[typing.Tuple[typing.Any, typing.Any]]] = [None] * self.next_order
+        for key, (order, value) in self.root.items():
+            ordered[order] = (key, value)
+        for item in ordered:
+            if item is not None:
+                yield item
+
+    def values(self) -> typing.Iterator[typing.Any]:
+        for _, value in self.items():
+            yield value
+
+    def set(self, key: typing.Any, value: typing.Any) -> 'PersistentMap':
+        root = self.root if self.root is not None else _EMPTY_NODE
+        new_root, added = root.assoc(0, hash(key) & HASH_MASK, key, (self.next_order, value))
+        if new_root is root:
+            return self
+        if added:
+            return PersistentMap(self.count + 1, new_root, self.next_order + 1)
+        return PersistentMap(self.count, new_root, self.next_order)
+
+    def delete(self, key: typing.Any) -> 'PersistentMap':
+        if self.root is None:
+            return self
+
+        new_root = self.root.without(0, hash(key) & HASH_MASK, key)
+        if new_root is self.root:
+            return self
+
+        result = PersistentMap(self.count - 1, new_root, self.next_order)
+        if result.next_order > 2 * result.count + MAX_UNUSED_ORDERS:
+            return PersistentMap.from_dict(dict(result.items()))
+        return result
+
+
+class _BitmapNode():
+    # One bit per possible 5-bit hash fragment; entries hold only the set ones
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Entries) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def find(self, shift: int, key_hash: int, key: typing.Any, default: typing.Any) -> typing.Any:
+        bit = 1 << ((key_hash >> shift) & MASK)
+        if not self.bitmap & bit:
+            return default
+
+        index = 2 * _popcount(self.bitmap & (bit - 1))
+        entry_key = self.entries[index]
+        if entry_key is None:
+            return self.entries[index + 1].find(shift + BITS, key_hash, key, default)
+        if entry_key == key:
+            return self.entries[index + 1]
+        return default
+
+    def assoc(self, shift: int, key_hash: int, key: typing.Any,
+              value: Entry) -> typing.Tuple['_BitmapNode', bool]:
+        bit = 1 << ((key_hash >> shift) & MASK)
+        index = 2 * _popcount(self.bitmap & (bit - 1))
+
+        if not self.bitmap & bit:
+            entries = self.entries[:index] + [key, value] + self.entries[index:]
+            return _BitmapNode(self.bitmap | bit, entries), True
+
+        entry_key = self.entries[index]
+        entry_value = self.entries[index + 1]
+
+        if entry_key is None:
+            child, added = entry_value.assoc(shift + BITS, key_hash, key, value)
+            if child is entry_value:
+                return self, False
+            return self._with_entry(index, None, child), added
+
+        if entry_key == key:
+            if entry_value[1] is value[1]:
+                return self, False
+            # Replacing a value keeps the key's place in the iteration order
+            return self._with_entry(index, key, (entry_value[0], value[1])), False
+
+        # Two keys share this fragment: push both one level down
+        child = _create_node(shift + BITS, entry_key, entry_value, key_hash, key, value)
+        return self._with_entry(index, None, child), True
+
+    def without(self, shift: int, key_hash: int, key: typing.Any) -> typing.Optional['_BitmapNode']:
+        bit = 1 << ((key_hash >> shift) & MASK)
+        if not self.bitmap & bit:
+            return self
+
+        index = 2 * _popcount(self.bitmap & (bit - 1))
+        entry_key = self.entries[index]
+
+        if entry_key is None:
+            child = self.entries[index + 1]
+            new_child = child.without(shift + BITS, key_hash, key)
+            if new_child is child:
+                return self
+            if new_child is not None:
+                return self._with_entry(index, None, new_child)
+        elif entry_key != key:
+            return self
+
+        if self.bitmap == bit:
+            return None
+        return _BitmapNode(self.bitmap ^ bit, self.entries[:index] + self.entries[index + 2:])
+
+    def items(self) -> typing.Iterator[typing.Tuple[typing.Any, typing.Any]]:
+        entries = self.entries
+        for index in range(0, len(entries), 2):
+            if entries[index] is None:
+                yield from entries[index + 1].items()
+            else:
+                yield entries[index], entries[index + 1]
+
+    def _with_entry(self, index: int, key: typing.Any, value: typing.Any) -> '_BitmapNode':
+        entries = self.entries[:]
+        entries[index] = key
+        entries[index + 1] = value
+        return _BitmapNode(self.bitmap, entries)
+
+
+class _CollisionNode():
+    # Keys whose full hashes are equal, compared one by one
+    __slots__ = ("key_hash", "entries")
+
+    def __init__(self, key_hash: int, entries: Entries) -> None:
+        self.key_hash = key_hash
+        self.entries = entries
+
+    def find(self, shift: int, key_hash: int, key: typing.Any, default: typing.Any) -> typing.Any:
+        index = self._index_of(key)
+        if index < 0:
+            return default
+        return self.entries[index + 1]
+
+    def assoc(self, shift: int, key_hash: int, key: typing.Any,
+              value: Entry) -> typing.Tuple[typing.Any, bool]:
+        if key_hash != self.key_hash:
+            # Nest this node under a bitmap node and add the key beside it
+            bit = 1 << ((self.key_hash >> shift) & MASK)
+            return _BitmapNode(bit, [None, self]).assoc(shift, key_hash, key, value)
+
+        index = self._index_of(key)
+        if index < 0:
+            return _CollisionNode(self.key_hash, self.entries + [key, value]), True
+        entry_value = self.entries[index + 1]
+        if entry_value[1] is value[1]:
+            return self, False
+
+        entries = self.entries[:]
+        entries[index + 1] = (entry_value[0], value[1])
+        return _CollisionNode(self.key_hash, entries), False
+
+    def without(self, shift: int, key_hash: int, key: typing.Any) -> typing.Optional['_CollisionNode']:
+        index = self._index_of(key)
+        if index < 0:
+            return self
+        if len(self.entries) == 2:
+            return None
+        return _CollisionNode(self.key_hash, self.entries[:index] + self.entries[index + 2:])
+
+    def items(self) -> typing.Iterator[typing.Tuple[typing.Any, typing.Any]]:
+        for index in range(0, len(self.entries), 2):
+            yield self.entries[index], self.entries[index + 1]
+
+    def _index_of(self, key: typing.Any) -> int:
+        for index in range(0, len(self.entries), 2):
+            if self.entries[index] == key:
+                return index
+        return -1
+
+
+def _popcount(bits: int) -> int:
+    # int.bit_count() needs Python 3.10
+    return bin(bits).count("1")
+
+
+def _create_node(shift: int, key1: typing.Any, value1: typing.Any, key2_hash: int, key2: typing.Any,
+                 value2: typing.Any) -> typing.Any:
+    key1_hash = hash(key1) & HASH_MASK
+    if key1_hash == key2_hash:
+        return _CollisionNode(key1_hash, [key1, value1, key2, value2])
+
+    node, _ = _EMPTY_NODE.assoc(shift, key1_hash, key1, value1)
+    node, _ = node.assoc(shift, key2_hash, key2, value2)
+    return node
+
+
+_MISSING = object()
+_EMPTY_NODE = _BitmapNode(0, [])
+
+EMPTY = PersistentMap()
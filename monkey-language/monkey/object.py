@@ -1,8 +1,10 @@
+import array
 import enum
-import hashlib
 import typing
 
 from monkey.ast import Identifier, Expression, BlockStatement
+from monkey.hamt import PersistentMap
+from monkey.vector import PersistentVector
 
 
 class ObjectType(enum.Enum):
@@ -11,14 +13,19 @@ class ObjectType(enum.Enum):
     STRING = "STRING"
     NULL = "NULL"
     RETURN_VALUE = "RETURN_VALUE"
+    TAIL_CALL = "TAIL_CALL"
     ERROR = "ERROR"
     FUNCTION = "FUNCTION"
     BUILTIN = "BUILTIN"
     ARRAY = "ARRAY"
     HASH = "HASH"
+    SEQUENCE = "SEQUENCE"
+    COMPILED_FUNCTION = "COMPILED_FUNCTION"
 
 
 class Object:
+    __slots__ = ()
+
     def object_type(self) -> ObjectType:
         raise NotImplementedError()
 
@@ -27,34 +34,41 @@ class Object:
 
 
 class HashKey:
-    def __init__(self, type: ObjectType, value: int):
+    __slots__ = ("type", "value", "hash")
+
+    def __init__(self, type: ObjectType, value: typing.Hashable):
         self.type = type
         self.value = value
+        # Python's own hash of the value, tagged with the type so that 1 and
+        # true do not collide; computed once and returned on every dict probe
+        self.hash: int = hash((type, value))
 
     def __eq__(self, other: typing.Any) -> bool:
-        if isinstance(other, HashKey) and other.type == self.type and other.value == self.value:
+        if type(other) is HashKey and other.type is self.type and other.value == self.value:
             return True
 
         return False
 
     def __ne__(self, other: typing.Any) -> bool:
-        if isinstance(other, HashKey) and other.type == self.type and other.value == self.value:
-            return False
-
-        return True
+        return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        return hash(f"{self.type}-{self.value}")
+        return self.hash
 
 
 class Hashable:
+    __slots__ = ()
+
     def hash_key(self) -> HashKey:
         raise NotImplementedError()
 
 
 class Integer(Object, Hashable):
+    __slots__ = ("value", "cached_key")
+
     def __init__(self, value: int) -> None:
         self.value: int = value
+        self.cached_key: HashKey = None
 
     def object_type(self) -> ObjectType:
         return ObjectType.INTEGER
@@ -63,12 +77,29 @@ class Integer(Object, Hashable):
         return str(self.value)
 
     def hash_key(self) -> HashKey:
-        return HashKey(self.object_type(), self.value)
+        if self.cached_key is None:
+            self.cached_key = HashKey(ObjectType.INTEGER, self.value)
+        return self.cached_key
+
+
+# Every integer result in this range is one of these preallocated objects
+SMALL_INTEGER_MIN = -128
+SMALL_INTEGER_MAX = 1024
+SMALL_INTEGERS: typing.List[Integer] = [Integer(value) for value in range(SMALL_INTEGER_MIN, SMALL_INTEGER_MAX + 1)]
+
+
+def new_integer(value: int) -> Integer:
+    if SMALL_INTEGER_MIN <= value <= SMALL_INTEGER_MAX and type(value) is int:
+        return SMALL_INTEGERS[value - SMALL_INTEGER_MIN]
+    return Integer(value)
 
 
 class Boolean(Object, Hashable):
+    __slots__ = ("value", "cached_key")
+
     def __init__(self, value: bool) -> None:
         self.value: bool = value
+        self.cached_key: HashKey = None
 
     def object_type(self) -> ObjectType:
         return ObjectType.BOOLEAN
@@ -77,16 +108,35 @@ class Boolean(Object, Hashable):
         return str(self.value).lower()
 
     def hash_key(self) -> HashKey:
-        value = 0  # False
-        if self.value:
-            value = 1  # True
+        if self.cached_key is None:
+            value = 0  # False
+            if self.value:
+                value = 1  # True
 
-        return HashKey(self.object_type(), value)
+            self.cached_key = HashKey(ObjectType.BOOLEAN, value)
+        return self.cached_key
 
 
 class String(Object, Hashable):
+    """
+    A string is either flat, holding its Python str, or a rope node joining two
+    strings. Concatenating long strings builds rope nodes in O(1); the text is
+    assembled once, the first time `value` is read, and kept from then on.
+    """
+    __slots__ = ("flat", "left", "right", "length", "cached_key")
+
     def __init__(self, value: str) -> None:
-        self.value: str = value
+        self.flat: typing.Optional[str] = value
+        self.left: typing.Optional[String] = None
+        self.right: typing.Optional[String] = None
+        self.length: int = len(value)
+        self.cached_key: HashKey = None
+
+    @property
+    def value(self) -> str:
+        if self.flat is None:
+            self._flatten()
+        return self.flat
 
     def object_type(self) -> ObjectType:
         return ObjectType.STRING
@@ -95,10 +145,53 @@ class String(Object, Hashable):
         return self.value
 
     def hash_key(self) -> HashKey:
-        return HashKey(self.object_type(), hashlib.sha256(self.value.encode()).hexdigest())
+        # Strings are immutable, so the key is computed once per object
+        if self.cached_key is None:
+            self.cached_key = HashKey(ObjectType.STRING, self.value)
+        return self.cached_key
+
+    def _flatten(self) -> None:
+        # Ropes built by repeated `s + piece` are as deep as they are long, so
+        # walk them with an explicit stack instead of recursing
+        pieces: typing.List[str] = []
+        stack: typing.List[String] = [self]
+        while stack:
+            node = stack.pop()
+            while node.flat is None:
+                stack.append(node.right)
+                node = node.left
+            pieces.append(node.flat)
+
+        self.flat = "".join(pieces)
+        self.left = None
+        self.right = None
+
+
+# Concatenations shorter than this are copied instead of becoming rope nodes
+ROPE_THRESHOLD = 256
+
+
+def concat_strings(left: String, right: String) -> String:
+    length = left.length + right.length
+    if length < ROPE_THRESHOLD:
+        return String(left.value + right.value)
+    if right.length == 0:
+        return left
+    if left.length == 0:
+        return right
+
+    rope = String.__new__(String)
+    rope.flat = None
+    rope.left = left
+    rope.right = right
+    rope.length = length
+    rope.cached_key = None
+    return rope
 
 
 class Null(Object):
+    __slots__ = ("value",)
+
     def __init__(self) -> None:
         self.value = None
 
@@ -109,7 +202,15 @@ class Null(Object):
         return str(self.value)
 
 
+# The only Boolean and Null objects the engines produce, compared by identity
+TRUE = Boolean(True)
+FALSE = Boolean(False)
+NULL = Null()
+
+
 class ReturnValue(Object):
+    __slots__ = ("value",)
+
     def __init__(self, value: Object) -> None:
         self.value: Object = value
 
@@ -120,7 +221,23 @@ class ReturnValue(Object):
         return self.value.inspect()
 
 
+class TailCall(Object):
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function: Object, arguments: typing.List[Object]) -> None:
+        self.function: Object = function
+        self.arguments: typing.List[Object] = arguments
+
+    def object_type(self) -> ObjectType:
+        return ObjectType.TAIL_CALL
+
+    def inspect(self) -> str:
+        return f"tail call to {self.function.inspect()}"
+
+
 class Error(Object):
+    __slots__ = ("message",)
+
     def __init__(self, message: str) -> None:
         self.message: str = message
 
@@ -131,11 +248,26 @@ class Error(Object):
         return f"ERROR: {self.message}"
 
 
+# How builtins such as map call back into a function object: a call taking
+# only the arguments, which either returns an Error or raises the engine's
+# EvaluationError
+Call = typing.Callable[[typing.List['Object']], 'Object']
+
+
 class Function(Object):
-    def __init__(self, parameters, body, env) -> None:
+    __slots__ = ("parameters", "body", "env", "num_slots", "compiled_body", "prepare_call")
+
+    def __init__(self, parameters, body, env, num_slots=None, compiled_body=None, prepare_call=None) -> None:
         self.parameters: typing.List[Identifier] = parameters
         self.body: BlockStatement = body
         self.env = env
+        # Size of the slot array each call gets, parameters included
+        self.num_slots: int = num_slots if num_slots is not None else len(parameters)
+        # Set when the function was built by monkey.closure_compiler
+        self.compiled_body = compiled_body
+        # Given by the engine that built the function: looks it up once and
+        # returns its Call
+        self.prepare_call: typing.Callable[['Function'], Call] = prepare_call
 
     def object_type(self) -> ObjectType:
         return ObjectType.FUNCTION
@@ -154,6 +286,8 @@ class Function(Object):
 
 
 class Builtin(Object):
+    __slots__ = ("function",)
+
     def __init__(self, function) -> None:
         self.function = function
 
@@ -165,8 +299,13 @@ class Builtin(Object):
 
 
 class Array(Object):
-    def __init__(self, elements) -> None:
-        self.elements = elements
+    __slots__ = ("elements",)
+
+    def __init__(self, elements: typing.Sequence[Object]) -> None:
+        # Arrays are immutable; push and rest share structure with the original
+        if type(elements) is not PersistentVector:
+            elements = PersistentVector.from_list(elements)
+        self.elements: PersistentVector = elements
 
     def object_type(self) -> ObjectType:
         return ObjectType.ARRAY
@@ -179,22 +318,162 @@ class Array(Object):
         return f"[{', '.join(elements)}]"
 
 
+class IntArray(Array):
+    """
+    An array whose elements are all integers, stored unboxed in a typed
+    array of 64-bit values. It behaves as an Array everywhere: `elements`
+    boxes the values into Integer objects the first time a builtin needs
+    them. Vectorized builtins and operators work on `values` directly.
+    """
+    __slots__ = ("values", "boxed")
+
+    def __init__(self, values: array.array) -> None:
+        self.values: array.array = values
+        self.boxed: typing.Optional[PersistentVector] = None
+
+    @property
+    def elements(self) -> PersistentVector:
+        if self.boxed is None:
+            self.boxed = PersistentVector.from_list([new_integer(value) for value in self.values])
+        return self.boxed
+
+    def inspect(self) -> str:
+        return f"[{', '.join(map(str, self.values))}]"
+
+
+def new_array(elements: typing.List[Object]) -> Array:
+    # Integer-only arrays are stored unboxed unless a value is a float
+    # (from `/`) or does not fit in 64 bits
+    if elements and all(type(element) is Integer for element in elements):
+        try:
+            return IntArray(array.array("q", [element.value for element in elements]))
+        except (OverflowError, TypeError):
+            pass
+    return Array(elements)
+
+
+# One step of a lazy pipeline: a call into a Monkey function and whether it
+# filters elements (keeps those it returns truthy for) or maps them
+Stage = typing.Tuple[typing.Callable[[typing.List[Object]], Object], bool]
+
+
+class Sequence(Object):
+    """
+    A lazily computed run of elements: a source of elements plus the map and
+    filter stages applied to each one as it is pulled through. Adding a stage
+    creates a new Sequence and computes nothing; iterating runs all stages on
+    one element before fetching the next, so no intermediate array is built.
+    `collect` computes the elements once and keeps them.
+    """
+    __slots__ = ("source", "stages", "elements")
+
+    def __init__(self, source: typing.Callable[[], typing.Iterator[Object]],
+                 stages: typing.Tuple[Stage, ...] = ()) -> None:
+        # Returns a fresh iterator over the source elements on each call
+        self.source = source
+        self.stages = stages
+        self.elements: typing.Optional[PersistentVector] = None
+
+    def with_stage(self, call: typing.Callable[[typing.List[Object]], Object], is_filter: bool) -> 'Sequence':
+        return Sequence(self.source, self.stages + ((call, is_filter),))
+
+    def __iter__(self) -> typing.Iterator[Object]:
+        # A stage that fails yields its Error as the last element
+        if self.elements is not None:
+            yield from self.elements
+            return
+
+        stages = self.stages
+        for element in self.source():
+            for call, is_filter in stages:
+                result = call([element])
+                if type(result) is Error:
+                    yield result
+                    return
+                if not is_filter:
+                    element = result
+                elif result is FALSE or result is NULL:
+                    break
+            else:
+                yield element
+
+    def collect(self) -> Object:
+        if self.elements is None:
+            elements = []
+            for element in self:
+                if type(element) is Error:
+                    return element
+                elements.append(element)
+            self.elements = PersistentVector.from_list(elements)
+        return Array(self.elements)
+
+    def object_type(self) -> ObjectType:
+        return ObjectType.SEQUENCE
+
+    def inspect(self) -> str:
+        return self.collect().inspect()
+
+
 class HashPair:
+    __slots__ = ("key", "value")
+
     def __init__(self, key: Object, value: Object) -> None:
         self.key = key
         self.value = value
 
 
 class Hash(Object):
-    def __init__(self, pairs: typing.Dict[HashKey, HashPair]) -> None:
-        self.pairs = pairs
+    __slots__ = ("pairs",)
+
+    def __init__(self, pairs: typing.Mapping[HashKey, HashPair]) -> None:
+        # Hashes are immutable; set and delete share nodes with the original
+        if type(pairs) is not PersistentMap:
+            pairs = PersistentMap.from_dict(pairs)
+        self.pairs: PersistentMap = pairs
 
     def object_type(self) -> ObjectType:
         return ObjectType.HASH
 
     def inspect(self) -> str:
         pairs = []
-        for pair in self.pairs:
+        for pair in self.pairs.values():
             pairs.append(f"{pair.key.inspect()}: {pair.value.inspect()}")
 
-        return f"[{', '.join(pairs)}]"
+        return "{" + ', '.join(pairs) + "}"
+
+
+class CompiledFunction(Object):
+    __slots__ = ("instructions", "num_locals", "num_parameters", "local_names", "free_names")
+
+    def __init__(self, instructions: typing.List[int], num_locals: int = 0, num_parameters: int = 0,
+                 local_names: typing.List[str] = None, free_names: typing.List[str] = None) -> None:
+        self.instructions = instructions
+        self.num_locals = num_locals
+        self.num_parameters = num_parameters
+        # Only needed to report unbound locals and free variables by name
+        self.local_names = local_names or []
+        self.free_names = free_names or []
+
+    def object_type(self) -> ObjectType:
+        return ObjectType.COMPILED_FUNCTION
+
+    def inspect(self) -> str:
+        return f"CompiledFunction[{id(self)}]"
+
+
+class Closure(Object):
+    __slots__ = ("function", "free", "prepare_call")
+
+    def __init__(self, function: CompiledFunction, free: typing.List[Object],
+                 prepare_call: typing.Callable[['Closure'], Call] = None) -> None:
+        self.function = function
+        self.free = free
+        # Given by the VM that made the closure, like Function.prepare_call
+        self.prepare_call = prepare_call
+
+    def object_type(self) -> ObjectType:
+        # Closures are the VM's functions: type errors name them alike
+        return ObjectType.FUNCTION
+
+    def inspect(self) -> str:
+        return f"Closure[{id(self)}]"
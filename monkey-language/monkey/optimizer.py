@@ -0,0 +1,189 @@
+import typing
+
+import monkey.ast as ast
+from monkey.evaluator import (
+    TRUE, FALSE, EvaluationError, _eval_infix_expression, _eval_prefix_expression, _is_truthy,
+)
+from monkey.object import Object, Integer, Boolean, String
+from monkey.token import Token, TokenType
+
+LITERALS = (ast.IntegerLiteral, ast.BooleanLiteral, ast.StringLiteral)
+
+# Node attributes that are not child nodes: HashLiteral.constant_keys
+# refers to keys that are already counted in its pairs
+NON_CHILD_ATTRIBUTES = ("token", "constant_keys")
+
+
+class Optimizer():
+    """
+    Folds operators applied to literals, drops if branches whose condition is
+    a literal and statements that follow a return. Results are computed with
+    the evaluator's own operators, so optimized programs evaluate to exactly
+    the same objects; expressions that would raise an error are left alone.
+    """
+
+    def __init__(self) -> None:
+        self.removed_nodes = 0
+
+    def optimize(self, node: ast.Node) -> ast.Node:
+        if node is None:
+            return None
+
+        if type(node) is ast.Program or type(node) is ast.BlockStatement:
+            node.statements = self._optimize_statements(node.statements)
+        elif type(node) is ast.ExpressionStatement:
+            node.expression = self.optimize(node.expression)
+        elif type(node) is ast.ReturnStatement:
+            node.return_value = self.optimize(node.return_value)
+        elif type(node) is ast.LetStatement:
+            node.value = self.optimize(node.value)
+        elif type(node) is ast.PrefixExpression:
+            node.right = self.optimize(node.right)
+            if type(node.right) in LITERALS:
+                return self._fold(node, _eval_prefix_expression, node.operator, _literal_object(node.right))
+        elif type(node) is ast.InfixExpression:
+            node.left = self.optimize(node.left)
+            node.right = self.optimize(node.right)
+            if type(node.left) in LITERALS and type(node.right) in LITERALS:
+                return self._fold(node, _eval_infix_expression, node.operator, _literal_object(node.left),
+                                  _literal_object(node.right))
+        elif type(node) is ast.IfExpression:
+            return self._optimize_if_expression(node)
+        elif type(node) is ast.FunctionLiteral:
+            node.body = self.optimize(node.body)
+        elif type(node) is ast.CallExpression:
+            node.function = self.optimize(node.function)
+            node.arguments = [self.optimize(argument) for argument in node.arguments]
+        elif type(node) is ast.ArrayLiteral:
+            node.elements = [self.optimize(element) for element in node.elements]
+        elif type(node) is ast.HashLiteral:
+            node.pairs = {self.optimize(key): self.optimize(value) for key, value in node.pairs.items()}
+            node.constant_keys = {key: _literal_object(key).hash_key() for key in node.pairs if type(key) in LITERALS}
+        elif type(node) is ast.IndexExpression:
+            node.left = self.optimize(node.left)
+            node.index = self.optimize(node.index)
+
+        return node
+
+    def _optimize_statements(self, statements: typing.List[ast.Statement]) -> typing.List[ast.Statement]:
+        optimized: typing.List[ast.Statement] = []
+
+        for index, statement in enumerate(statements):
+            statement = self.optimize(statement)
+
+            # A block's statements run in the enclosing environment, so an
+            # if that always runs its block can be replaced by the block. An
+            # empty block is kept: its if evaluates to null.
+            if (type(statement) is ast.ExpressionStatement and _is_always_true(statement.expression)
+                    and statement.expression.consequence.statements):
+                inlined = statement.expression.consequence.statements
+                self.removed_nodes += _count_nodes(statement) - _count_nodes(inlined)
+                optimized.extend(inlined)
+            else:
+                optimized.append(statement)
+
+            if optimized and type(optimized[-1]) is ast.ReturnStatement:
+                for unreachable in statements[index + 1:]:
+                    self.removed_nodes += _count_nodes(unreachable)
+                break
+
+        return optimized
+
+    def _optimize_if_expression(self, node: ast.IfExpression) -> ast.Node:
+        node.condition = self.optimize(node.condition)
+        node.consequence = self.optimize(node.consequence)
+        node.alternative = self.optimize(getattr(node, "alternative", None))
+
+        if type(node.condition) not in LITERALS:
+            return node
+
+        if _is_truthy(_literal_object(node.condition)):
+            taken, dropped = node.consequence, node.alternative
+        else:
+            taken, dropped = node.alternative, node.consequence
+
+        if taken is None:
+            # Evaluates to NULL: keep an if that never runs its empty branch
+            self.removed_nodes += _count_nodes(dropped) - 1
+            node.condition = _literal_node(FALSE)
+            node.consequence = ast.BlockStatement(dropped.token)
+            node.alternative = None
+            return node
+
+        if len(taken.statements) == 1 and type(taken.statements[0]) is ast.ExpressionStatement:
+            expression = taken.statements[0].expression
+            self.removed_nodes += _count_nodes(node) - _count_nodes(expression)
+            return expression
+
+        # Keep the taken branch as `if (true) { ... }`, still usable as a value
+        self.removed_nodes += _count_nodes(dropped)
+        node.condition = _literal_node(TRUE)
+        node.consequence = taken
+        node.alternative = None
+        return node
+
+    def _fold(self, node: ast.Expression, operation: typing.Callable[..., Object], *operands) -> ast.Expression:
+        try:
+            result = operation(*operands)
+        except (EvaluationError, ArithmeticError):
+            # Such as division by zero: left to fail at runtime
+            return node
+
+        if type(result) not in (Integer, Boolean, String):
+            return node
+
+        folded = _literal_node(result)
+        self.removed_nodes += _count_nodes(node) - 1
+        return folded
+
+
+def optimize(program: ast.Program) -> int:
+    """Optimizes the program in place and returns how many nodes it removed."""
+    optimizer = Optimizer()
+    optimizer.optimize(program)
+    return optimizer.removed_nodes
+
+
+def _is_always_true(node: ast.Node) -> bool:
+    return (type(node) is ast.IfExpression and type(node.condition) is ast.BooleanLiteral and node.condition.value
+            and getattr(node, "alternative", None) is None)
+
+
+def _literal_object(node: ast.Expression) -> Object:
+    if type(node) is ast.IntegerLiteral:
+        return node.object
+    elif type(node) is ast.BooleanLiteral:
+        return TRUE if node.value else FALSE
+    else:
+        return node.object
+
+
+def _literal_node(obj: Object) -> ast.Expression:
+    if type(obj) is Integer:
+        literal = ast.IntegerLiteral(Token(TokenType.INT, str(obj.value)))
+        literal.value = obj.value
+        literal.object = obj
+        return literal
+    elif type(obj) is Boolean:
+        if obj.value:
+            return ast.BooleanLiteral(Token(TokenType.TRUE, "true"), True)
+        return ast.BooleanLiteral(Token(TokenType.FALSE, "false"), False)
+    else:
+        literal = ast.StringLiteral(Token(TokenType.STRING, obj.value), obj.value)
+        literal.object = obj
+        return literal
+
+
+def _count_nodes(node: typing.Any) -> int:
+    if isinstance(node, list):
+        return sum(_count_nodes(element) for element in node)
+    if isinstance(node, dict):
+        return sum(_count_nodes(key) + _count_nodes(value) for key, value in node.items())
+    if not isinstance(node, (ast.Node, ast.Program)):
+        return 0
+
+    count = 1
+    for name, value in vars(node).items():
+        if name not in NON_CHILD_ATTRIBUTES:
+            count += _count_nodes(value)
+    return count
@@ -3,6 +3,9 @@ import typing
 
 from monkey.token import Token, TokenType
 from monkey.lexer import Lexer
+from monkey.object import Boolean, String, new_integer
+from monkey.resolver import Resolver, resolve
+from monkey.token_buffer import TokenBuffer
 import monkey.ast as ast
 
 
@@ -32,7 +35,7 @@ PRECEDENCES = {
 
 
 class Parser():
-    def __init__(self, lexer: Lexer) -> None:
+    def __init__(self, lexer: typing.Union[Lexer, TokenBuffer]) -> None:
         self.lexer = lexer
         self.errors: typing.List[str] = []
         self.current_token = None
@@ -86,8 +89,30 @@ class Parser():
                 program.statements.append(statement)
             self.next_token()
 
+        resolve(program)
+
         return program
 
+    def iter_statements(self, resolver: Resolver = None) -> typing.Iterator[ast.Statement]:
+        """
+        Parses and resolves one top-level statement at a time, so each can be
+        run and dropped before the next is read. Stops at the first statement
+        with parse errors, which are in self.errors.
+        """
+        if resolver is None:
+            resolver = Resolver()
+
+        while not self.current_token_is(TokenType.EOF):
+            errors = len(self.errors)
+            statement = self.parse_statement()
+            if len(self.errors) > errors:
+                return
+            self.next_token()
+
+            if statement is not None:
+                resolver.resolve_statement(statement)
+                yield statement
+
     def parse_statement(self) -> ast.Statement:
         if self.current_token_is(TokenType.LET):
             return self.parse_let_statement()
@@ -188,6 +213,7 @@ class Parser():
             return None
 
         literal.value = value
+        literal.object = new_integer(value)
         return literal
 
     def parse_boolean_literal(self) -> ast.Expression:
@@ -196,7 +222,9 @@ class Parser():
         return literal
 
     def parse_string_literal(self) -> ast.Expression:
-        return ast.StringLiteral(self.current_token, self.current_token.literal)
+        literal = ast.StringLiteral(self.current_token, self.current_token.literal)
+        literal.object = String(literal.value)
+        return literal
 
     def parse_array_literal(self) -> ast.Expression:
         array = ast.ArrayLiteral(self.current_token)
@@ -218,6 +246,10 @@ class Parser():
             value = self.parse_expression(Precedence.LOWEST)
 
             _hash.pairs[key] = value
+            if type(key) in (ast.IntegerLiteral, ast.StringLiteral):
+                _hash.constant_keys[key] = key.object.hash_key()
+            elif type(key) is ast.BooleanLiteral:
+                _hash.constant_keys[key] = Boolean(key.value).hash_key()
 
             if not self.peek_token_is(TokenType.RBRACE) and not self.expect_peek(TokenType.COMMA):
                 return None
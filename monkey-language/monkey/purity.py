@@ -0,0 +1,165 @@
+import typing
+
+import monkey.ast as ast
+from monkey.builtins import PURE_BUILTINS
+from monkey.resolver import resolve
+from monkey.token import Token, TokenType
+
+
+class PurityChecker():
+    """
+    Decides whether a function literal is pure: whether each call with the
+    same arguments returns the same result and has no side effects, so its
+    results can be cached. The check is conservative. Besides its own
+    parameters and let bindings, a pure function may only use the names in
+    `callables`, which are pure builtins and other pure top-level functions,
+    and it may only call those names. Function literals nested in the body make it
+    impure, as do calls through anything other than such a name.
+    """
+
+    def __init__(self, callables: typing.AbstractSet[str]) -> None:
+        self.callables = callables
+
+    def is_pure(self, function: ast.FunctionLiteral) -> bool:
+        local_names = {parameter.value for parameter in function.parameters}
+        return self._check(function.body, local_names)
+
+    def _check(self, node: ast.Node, local_names: typing.Set[str]) -> bool:
+        if node is None:
+            return True
+
+        if type(node) is ast.BlockStatement:
+            return all(self._check(statement, local_names) for statement in node.statements)
+        elif type(node) is ast.ExpressionStatement:
+            return self._check(node.expression, local_names)
+        elif type(node) is ast.ReturnStatement:
+            return self._check(node.return_value, local_names)
+        elif type(node) is ast.LetStatement:
+            local_names.add(node.name.value)
+            return self._check(node.value, local_names)
+        elif type(node) is ast.Identifier:
+            return node.value in local_names or node.value in self.callables
+        elif type(node) is ast.PrefixExpression:
+            return self._check(node.right, local_names)
+        elif type(node) is ast.InfixExpression:
+            return self._check(node.left, local_names) and self._check(node.right, local_names)
+        elif type(node) is ast.IfExpression:
+            return (self._check(node.condition, local_names) and self._check(node.consequence, local_names)
+                    and self._check(getattr(node, "alternative", None), local_names))
+        elif type(node) is ast.CallExpression:
+            # Parameters and locals may hold any function, impure ones included
+            callee = node.function
+            if type(callee) is not ast.Identifier or callee.value in local_names:
+                return False
+            if callee.value not in self.callables:
+                return False
+            return all(self._check(argument, local_names) for argument in node.arguments)
+        elif type(node) is ast.ArrayLiteral:
+            return all(self._check(element, local_names) for element in node.elements)
+        elif type(node) is ast.HashLiteral:
+            return all(self._check(key, local_names) and self._check(value, local_names)
+                       for key, value in node.pairs.items())
+        elif type(node) is ast.IndexExpression:
+            return self._check(node.left, local_names) and self._check(node.index, local_names)
+        elif type(node) in (ast.IntegerLiteral, ast.BooleanLiteral, ast.StringLiteral):
+            return True
+
+        # Function literals, and anything this analysis does not know about
+        return False
+
+
+def _tail_calls_any(node: ast.Node, names: typing.Container[str]) -> bool:
+    # Pure function bodies hold no function literals, so every call marked
+    # as a tail call belongs to the function itself
+    if node is None:
+        return False
+
+    if type(node) is ast.CallExpression:
+        callee = node.function
+        if node.tail and type(callee) is ast.Identifier and callee.value in names:
+            return True
+        return _tail_calls_any(callee, names) or any(_tail_calls_any(argument, names)
+                                                     for argument in node.arguments or [])
+    elif type(node) is ast.BlockStatement:
+        return any(_tail_calls_any(statement, names) for statement in node.statements)
+    elif type(node) is ast.ExpressionStatement:
+        return _tail_calls_any(node.expression, names)
+    elif type(node) is ast.ReturnStatement:
+        return _tail_calls_any(node.return_value, names)
+    elif type(node) is ast.LetStatement:
+        return _tail_calls_any(node.value, names)
+    elif type(node) is ast.PrefixExpression:
+        return _tail_calls_any(node.right, names)
+    elif type(node) is ast.InfixExpression:
+        return _tail_calls_any(node.left, names) or _tail_calls_any(node.right, names)
+    elif type(node) is ast.IfExpression:
+        return (_tail_calls_any(node.condition, names) or _tail_calls_any(node.consequence, names)
+                or _tail_calls_any(getattr(node, "alternative", None), names))
+    elif type(node) is ast.ArrayLiteral:
+        return any(_tail_calls_any(element, names) for element in node.elements)
+    elif type(node) is ast.HashLiteral:
+        return any(_tail_calls_any(key, names) or _tail_calls_any(value, names) for key, value in node.pairs.items())
+    elif type(node) is ast.IndexExpression:
+        return _tail_calls_any(node.left, names) or _tail_calls_any(node.index, names)
+    return False
+
+
+def pure_functions(program: ast.Program) -> typing.List[str]:
+    """
+    Returns the names of the program's pure top-level functions: those bound
+    once by `let name = fn(...) {...}` whose bodies pass PurityChecker.
+    """
+    bindings: typing.Dict[str, typing.List[ast.Expression]] = {}
+    for statement in program.statements:
+        if type(statement) is ast.LetStatement:
+            bindings.setdefault(statement.name.value, []).append(statement.value)
+
+    candidates = {name: values[0] for name, values in bindings.items()
+                  if len(values) == 1 and type(values[0]) is ast.FunctionLiteral}
+    builtins = PURE_BUILTINS - bindings.keys()
+
+    # Assume every candidate is pure, then drop those that use an impure name
+    # until nothing changes; mutually recursive functions stay pure together
+    pure = set(candidates)
+    changed = True
+    while changed:
+        checker = PurityChecker(builtins | pure)
+        impure = {name for name in pure if not checker.is_pure(candidates[name])}
+        pure -= impure
+        changed = bool(impure)
+
+    return [name for name in candidates if name in pure]
+
+
+def memoize(program: ast.Program) -> typing.List[str]:
+    """
+    Wraps every pure top-level function in a call to the `memo` builtin, so
+    that its results and those of its recursive calls are cached. Run it on
+    a parsed program before running it. Returns the names of
+    the memoized functions.
+
+    Functions that tail call a top-level function are left alone: a call
+    through the `memo` builtin cannot be trampolined, so deep tail recursion
+    would run out of Python stack.
+    """
+    functions = {statement.name.value: statement.value for statement in program.statements
+                 if type(statement) is ast.LetStatement and type(statement.value) is ast.FunctionLiteral}
+    names = [name for name in pure_functions(program) if not _tail_calls_any(functions[name].body, functions)]
+    if not names:
+        return names
+
+    if any(type(statement) is ast.LetStatement and statement.name.value == "memo"
+           for statement in program.statements):
+        # `memo` would not name the builtin
+        return []
+
+    for statement in program.statements:
+        if type(statement) is ast.LetStatement and statement.name.value in names:
+            call = ast.CallExpression(Token(TokenType.LPAREN, "("),
+                                      ast.Identifier(Token(TokenType.IDENT, "memo"), "memo"))
+            call.arguments = [statement.value]
+            statement.value = call
+
+    # Give the new `memo` identifiers their builtin slot
+    resolve(program)
+    return names
@@ -0,0 +1,230 @@
+import typing
+
+import monkey.ast as ast
+from monkey.builtins import BUILTINS
+
+# Identifier.depth values that do not count function scopes
+GLOBAL = -1
+BUILTIN = -2
+
+BUILTIN_SLOTS: typing.Dict[str, int] = {name: index for index, name in enumerate(BUILTINS)}
+
+NESTED_EXPRESSIONS = (ast.PrefixExpression, ast.InfixExpression, ast.CallExpression, ast.ArrayLiteral,
+                      ast.IndexExpression)
+
+
+class Scope():
+    def __init__(self) -> None:
+        self.slots: typing.Dict[str, int] = {}
+        # Parameters take the first slots and are always bound
+        self.num_parameters: int = 0
+
+    def declare(self, name: str) -> int:
+        # Rebinding a name reuses its slot, like assigning to the same key
+        slot = self.slots.get(name, None)
+        if slot is None:
+            slot = len(self.slots)
+            self.slots[name] = slot
+        return slot
+
+
+class Resolver():
+    """
+    Assigns every identifier of a program a lexical address. Parameters and
+    let bindings inside functions become (depth, slot) pairs into the
+    fixed-size slot arrays of monkey.environment.Environment; everything else
+    is a global slot or, when no program resolved here binds the name, a
+    builtin. A name bound by a let is read from the enclosing scopes while
+    that let has not run, as the slot is the function's for its whole body.
+    Calls whose value a function returns directly are marked as tail calls.
+
+    A resolver can resolve several programs that share their globals, such
+    as the lines of a REPL: monkey.environment.Environment keeps one for the
+    programs it runs.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: typing.List[Scope] = []
+        # Global slot of every global name seen so far
+        self.global_slots: typing.Dict[str, int] = {}
+        # Names bound by top-level lets, which shadow the builtins
+        self.global_names: typing.Set[str] = set()
+        # Builtins used inside functions, readdressed if a later program
+        # shadows them, as functions may still be called after that
+        self.builtin_uses: typing.Dict[str, typing.List[ast.Identifier]] = {}
+
+    def resolve(self, node: ast.Node) -> None:
+        if node is None:
+            return
+
+        if type(node) is ast.Program:
+            self._collect_global_names(node.statements)
+            self._declare_functions(node.statements)
+            for statement in node.statements:
+                self.resolve(statement)
+            node.resolver = self
+        elif type(node) is ast.ExpressionStatement:
+            self.resolve(node.expression)
+        elif type(node) is ast.BlockStatement:
+            self._declare_functions(node.statements)
+            for statement in node.statements:
+                self.resolve(statement)
+        elif type(node) is ast.ReturnStatement:
+            self.resolve(node.return_value)
+        elif type(node) is ast.LetStatement:
+            # The value is resolved before the name is bound, so `let x = x + 1`
+            # still reads the outer x. Function values were bound up front by
+            # _declare_functions so they can call themselves and each other.
+            self.resolve(node.value)
+            self._declare(node.name)
+        elif type(node) is ast.Identifier:
+            self._resolve_identifier(node)
+        elif type(node) in NESTED_EXPRESSIONS:
+            self._resolve_nested_expression(node)
+        elif type(node) is ast.IfExpression:
+            self.resolve(node.condition)
+            self.resolve(node.consequence)
+            self.resolve(getattr(node, "alternative", None))
+        elif type(node) is ast.FunctionLiteral:
+            self._resolve_function_literal(node)
+        elif type(node) is ast.HashLiteral:
+            for key, value in node.pairs.items():
+                self.resolve(key)
+                self.resolve(value)
+
+    def _resolve_nested_expression(self, node: ast.Expression) -> None:
+        # These nest as deep as monkey.stack_parser lets them: walk them with
+        # an explicit stack, left to right as they are evaluated
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if type(node) is ast.PrefixExpression:
+                stack.append(node.right)
+            elif type(node) is ast.InfixExpression:
+                stack.append(node.right)
+                stack.append(node.left)
+            elif type(node) is ast.CallExpression:
+                stack.extend(reversed(node.arguments or []))
+                stack.append(node.function)
+            elif type(node) is ast.ArrayLiteral:
+                stack.extend(reversed(node.elements or []))
+            elif type(node) is ast.IndexExpression:
+                stack.append(node.index)
+                stack.append(node.left)
+            else:
+                self.resolve(node)
+
+    def resolve_statement(self, statement: ast.Statement) -> None:
+        # A top-level statement of a program read one statement at a time: a
+        # let only shadows a builtin for the statements after it, as in the REPL
+        self._collect_global_names([statement])
+        self._declare_functions([statement])
+        self.resolve(statement)
+        statement.resolver = self
+
+    def _resolve_function_literal(self, node: ast.FunctionLiteral) -> None:
+        scope = Scope()
+        self.scopes.append(scope)
+
+        for parameter in node.parameters or []:
+            parameter.depth = 0
+            parameter.slot = scope.declare(parameter.value)
+        scope.num_parameters = len(scope.slots)
+
+        self.resolve(node.body)
+        if node.body is not None:
+            self._mark_tail_calls(node.body, True)
+
+        self.scopes.pop()
+        node.num_slots = len(scope.slots)
+
+    def _mark_tail_calls(self, block: ast.BlockStatement, tail: bool) -> None:
+        # `tail` tells whether the block's value is the function's result.
+        # Returned calls are tail calls wherever the return statement is.
+        for index, statement in enumerate(block.statements):
+            if type(statement) is ast.ReturnStatement:
+                self._mark_tail_expression(statement.return_value, True)
+            elif type(statement) is ast.ExpressionStatement:
+                self._mark_tail_expression(statement.expression, tail and index == len(block.statements) - 1)
+
+    def _mark_tail_expression(self, expression: ast.Expression, tail: bool) -> None:
+        if type(expression) is ast.CallExpression:
+            expression.tail = tail
+        elif type(expression) is ast.IfExpression:
+            self._mark_tail_calls(expression.consequence, tail)
+            alternative = getattr(expression, "alternative", None)
+            if alternative is not None:
+                self._mark_tail_calls(alternative, tail)
+
+    def _resolve_identifier(self, node: ast.Identifier, num_scopes: int = None) -> None:
+        # Only the innermost `num_scopes` scopes are searched, when resolving a fallback
+        name = node.value
+        if num_scopes is None:
+            num_scopes = len(self.scopes)
+
+        for index in reversed(range(num_scopes)):
+            scope = self.scopes[index]
+            slot = scope.slots.get(name, None)
+            if slot is not None:
+                node.depth = len(self.scopes) - 1 - index
+                node.slot = slot
+                if slot >= scope.num_parameters:
+                    # The let may not have run yet, or at all, when the name is read
+                    node.fallback = ast.Identifier(node.token, name)
+                    self._resolve_identifier(node.fallback, index)
+                return
+
+        if name in BUILTIN_SLOTS and name not in self.global_names:
+            node.depth = BUILTIN
+            node.slot = BUILTIN_SLOTS[name]
+            if self.scopes:
+                self.builtin_uses.setdefault(name, []).append(node)
+        else:
+            node.depth = GLOBAL
+            node.slot = self.global_slot(name)
+
+    def _declare(self, identifier: ast.Identifier) -> None:
+        if self.scopes:
+            identifier.depth = 0
+            identifier.slot = self.scopes[-1].declare(identifier.value)
+        else:
+            identifier.depth = GLOBAL
+            identifier.slot = self.global_slot(identifier.value)
+
+    def _declare_functions(self, statements: typing.List[ast.Statement]) -> None:
+        for statement in statements:
+            if type(statement) is ast.LetStatement and type(getattr(statement, "value", None)) is ast.FunctionLiteral:
+                self._declare(statement.name)
+
+    def _collect_global_names(self, statements: typing.List[ast.Statement]) -> None:
+        # Top-level lets, including those in top-level if blocks, shadow builtins
+        for statement in statements:
+            if type(statement) is ast.LetStatement:
+                self.bind_global(statement.name.value)
+            elif type(statement) is ast.ExpressionStatement and type(statement.expression) is ast.IfExpression:
+                self._collect_global_names(statement.expression.consequence.statements)
+                alternative = getattr(statement.expression, "alternative", None)
+                if alternative is not None:
+                    self._collect_global_names(alternative.statements)
+
+    def global_slot(self, name: str) -> int:
+        slot = self.global_slots.get(name, None)
+        if slot is None:
+            slot = len(self.global_slots)
+            self.global_slots[name] = slot
+        return slot
+
+    def bind_global(self, name: str) -> int:
+        # From now on the name is a global, even where it was a builtin before
+        slot = self.global_slot(name)
+        if name not in self.global_names:
+            self.global_names.add(name)
+            for identifier in self.builtin_uses.pop(name, ()):
+                identifier.depth = GLOBAL
+                identifier.slot = slot
+        return slot
+
+
+def resolve(program: ast.Program) -> ast.Program:
+    Resolver().resolve(program)
+    return program
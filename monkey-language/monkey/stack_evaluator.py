@@ -0,0 +1,312 @@
+import typing
+
+import monkey.ast as ast
+from monkey.environment import Environment
+from monkey.evaluator import (
+    NULL, EvaluationError,
+    _eval_identifier, _eval_integer_literal, _eval_boolean_literal, _eval_string_literal,
+    _eval_function_literal, _eval_prefix_expression, _eval_infix_expression, _eval_index_expression,
+    _extended_function_env, _is_truthy,
+)
+from monkey.object import Object, Hashable, HashPair, Hash, Error, Function, Builtin, new_array
+
+# A pending step: a continuation function followed by its arguments. Steps
+# return an Error to abort the program and None to carry on.
+Step = typing.Tuple
+
+Stack = typing.List[Step]
+Values = typing.List[Object]
+
+
+def evaluate(node: ast.Node, env: Environment) -> Object:
+    """
+    Evaluates like monkey.evaluator.evaluate, but keeps pending work on a
+    heap-allocated stack of steps instead of recursing through Python. Monkey
+    recursion depth is therefore limited only by memory.
+    """
+    env.resolve(node)
+
+    stack: Stack = [(_eval_node, node, env)]
+    values: Values = []
+
+    try:
+        while stack:
+            step = stack.pop()
+            error = step[0](step, stack, values)
+            if error is not None:
+                return error
+    except EvaluationError as error:
+        # Raised by the evaluator's operator and identifier helpers
+        return error.error
+
+    return values[-1] if values else None
+
+
+def _eval_node(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    node = step[1]
+    evaluator = EVALUATORS.get(type(node), None)
+    if evaluator is None:
+        values.append(None)
+        return None
+    return evaluator(node, step[2], stack, values)
+
+
+def _push_value(value: Object, values: Values) -> typing.Optional[Error]:
+    if type(value) is Error:
+        return value
+    values.append(value)
+    return None
+
+
+# Node evaluators: each pushes the node's value, or the steps computing it
+
+def _eval_leaf(leaf_evaluator):
+    def evaluate_leaf(node: ast.Node, env: Environment, stack: Stack, values: Values) -> typing.Optional[Error]:
+        return _push_value(leaf_evaluator(node, env), values)
+
+    return evaluate_leaf
+
+
+def _eval_program(node: ast.Program, env: Environment, stack: Stack, values: Values) -> typing.Optional[Error]:
+    # A top-level return unwinds to here, like a return from a function
+    stack.append((_return_boundary, len(values)))
+    _push_statements(node.statements, env, stack, values)
+    return None
+
+
+def _eval_block_statement(node: ast.BlockStatement, env: Environment, stack: Stack,
+                          values: Values) -> typing.Optional[Error]:
+    _push_statements(node.statements, env, stack, values)
+    return None
+
+
+def _push_statements(statements: typing.List[ast.Statement], env: Environment, stack: Stack,
+                     values: Values) -> None:
+    # A sequence's value is the value of its last statement
+    if not statements:
+        values.append(None)
+        return
+
+    stack.append((_eval_node, statements[-1], env))
+    for statement in reversed(statements[:-1]):
+        stack.append((_discard,))
+        stack.append((_eval_node, statement, env))
+
+
+def _eval_expression_statement(node: ast.ExpressionStatement, env: Environment, stack: Stack,
+                               values: Values) -> typing.Optional[Error]:
+    stack.append((_eval_node, node.expression, env))
+    return None
+
+
+def _eval_return_statement(node: ast.ReturnStatement, env: Environment, stack: Stack,
+                           values: Values) -> typing.Optional[Error]:
+    stack.append((_return,))
+    stack.append((_eval_node, node.return_value, env))
+    return None
+
+
+def _eval_let_statement(node: ast.LetStatement, env: Environment, stack: Stack,
+                        values: Values) -> typing.Optional[Error]:
+    stack.append((_bind, node, env))
+    stack.append((_eval_node, node.value, env))
+    return None
+
+
+def _eval_prefix_node(node: ast.PrefixExpression, env: Environment, stack: Stack,
+                      values: Values) -> typing.Optional[Error]:
+    stack.append((_apply_prefix, node.operator))
+    stack.append((_eval_node, node.right, env))
+    return None
+
+
+def _eval_infix_node(node: ast.InfixExpression, env: Environment, stack: Stack,
+                     values: Values) -> typing.Optional[Error]:
+    stack.append((_apply_infix, node.operator))
+    stack.append((_eval_node, node.right, env))
+    stack.append((_eval_node, node.left, env))
+    return None
+
+
+def _eval_if_expression(node: ast.IfExpression, env: Environment, stack: Stack,
+                        values: Values) -> typing.Optional[Error]:
+    stack.append((_branch, node, env))
+    stack.append((_eval_node, node.condition, env))
+    return None
+
+
+def _eval_call_expression(node: ast.CallExpression, env: Environment, stack: Stack,
+                          values: Values) -> typing.Optional[Error]:
+    stack.append((_call, len(node.arguments)))
+    _push_expressions(node.arguments, env, stack)
+    stack.append((_eval_node, node.function, env))
+    return None
+
+
+def _eval_array_literal(node: ast.ArrayLiteral, env: Environment, stack: Stack,
+                        values: Values) -> typing.Optional[Error]:
+    stack.append((_build_array, len(node.elements)))
+    _push_expressions(node.elements, env, stack)
+    return None
+
+
+def _eval_hash_literal(node: ast.HashLiteral, env: Environment, stack: Stack,
+                       values: Values) -> typing.Optional[Error]:
+    stack.append((_build_hash, node))
+    for key, value in reversed(list(node.pairs.items())):
+        stack.append((_eval_node, value, env))
+        stack.append((_eval_node, key, env))
+    return None
+
+
+def _eval_index_node(node: ast.IndexExpression, env: Environment, stack: Stack,
+                     values: Values) -> typing.Optional[Error]:
+    stack.append((_apply_index,))
+    stack.append((_eval_node, node.index, env))
+    stack.append((_eval_node, node.left, env))
+    return None
+
+
+def _push_expressions(expressions: typing.List[ast.Expression], env: Environment, stack: Stack) -> None:
+    # Pushed in reverse so they are evaluated left to right
+    for expression in reversed(expressions):
+        stack.append((_eval_node, expression, env))
+
+
+# Continuations: run once the values they wait for are on the value stack
+
+def _discard(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    values.pop()
+    return None
+
+
+def _bind(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    node, env = step[1], step[2]
+    value = values.pop()
+
+    name = node.name
+    if name.depth == 0:
+        env.slots[name.slot] = value
+    else:
+        env.globals.slots[name.slot] = value
+
+    # Let statements evaluate to None
+    values.append(None)
+    return None
+
+
+def _apply_prefix(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    return _push_value(_eval_prefix_expression(step[1], values.pop()), values)
+
+
+def _apply_infix(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    right = values.pop()
+    left = values.pop()
+    return _push_value(_eval_infix_expression(step[1], left, right), values)
+
+
+def _apply_index(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    index = values.pop()
+    left = values.pop()
+    return _push_value(_eval_index_expression(left, index), values)
+
+
+def _branch(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    node, env = step[1], step[2]
+    condition = values.pop()
+
+    if _is_truthy(condition):
+        stack.append((_eval_node, node.consequence, env))
+    elif getattr(node, "alternative", None) is not None:
+        stack.append((_eval_node, node.alternative, env))
+    else:
+        values.append(NULL)
+    return None
+
+
+def _call(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    num_arguments = step[1]
+    arguments = values[len(values) - num_arguments:]
+    del values[len(values) - num_arguments:]
+    function = values.pop()
+
+    if isinstance(function, Function):
+        env = _extended_function_env(function, arguments)
+        stack.append((_return_boundary, len(values)))
+        stack.append((_eval_node, function.body, env))
+        return None
+    elif isinstance(function, Builtin):
+        return _push_value(function.function(arguments), values)
+    else:
+        return Error(f"not a function: {function.object_type()}")
+
+
+def _return(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    value = values.pop()
+
+    # Drop the rest of the function's pending work, up to its boundary
+    while True:
+        pending = stack.pop()
+        if pending[0] is _return_boundary:
+            break
+
+    del values[pending[1]:]
+    values.append(value)
+    return None
+
+
+def _return_boundary(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    # Reached without a return: the body's last value is the result
+    return None
+
+
+def _build_array(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    num_elements = step[1]
+    elements = values[len(values) - num_elements:]
+    del values[len(values) - num_elements:]
+    values.append(new_array(elements))
+    return None
+
+
+def _build_hash(step: Step, stack: Stack, values: Values) -> typing.Optional[Error]:
+    node = step[1]
+    num_elements = len(node.pairs) * 2
+    elements = values[len(values) - num_elements:]
+    del values[len(values) - num_elements:]
+
+    pairs = {}
+    for index, node_key in enumerate(node.pairs):
+        key = elements[index * 2]
+        if not isinstance(key, Hashable):
+            return Error(f"unusable as hash key: {key.object_type()}")
+        hashed = node.constant_keys.get(node_key, None)
+        if hashed is None:
+            hashed = key.hash_key()
+        pairs[hashed] = HashPair(key, elements[index * 2 + 1])
+
+    values.append(Hash(pairs))
+    return None
+
+
+EVALUATORS: typing.Dict[type, typing.Callable[[ast.Node, Environment, Stack, Values], typing.Optional[Error]]] = {
+    # Statements
+    ast.Program: _eval_program,
+    ast.ExpressionStatement: _eval_expression_statement,
+    ast.BlockStatement: _eval_block_statement,
+    ast.ReturnStatement: _eval_return_statement,
+    ast.LetStatement: _eval_let_statement,
+    ast.Identifier: _eval_leaf(_eval_identifier),
+
+    # Expressions
+    ast.IntegerLiteral: _eval_leaf(_eval_integer_literal),
+    ast.BooleanLiteral: _eval_leaf(_eval_boolean_literal),
+    ast.StringLiteral: _eval_leaf(_eval_string_literal),
+    ast.PrefixExpression: _eval_prefix_node,
+    ast.InfixExpression: _eval_infix_node,
+    ast.IfExpression: _eval_if_expression,
+    ast.FunctionLiteral: _eval_leaf(_eval_function_literal),
+    ast.CallExpression: _eval_call_expression,
+    ast.ArrayLiteral: _eval_array_literal,
+    ast.HashLiteral: _eval_hash_literal,
+    ast.IndexExpression: _eval_index_node,
+}
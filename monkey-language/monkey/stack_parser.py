@@ -0,0 +1,156 @@
+import typing
+
+from monkey.parser import Parser, Precedence, PRECEDENCES
+from monkey.token import TokenType
+import monkey.ast as ast
+
+# A pending expression: the precedence its enclosing expression is parsed
+# at, the kind of node waiting for it and that node (None for parentheses)
+Frame = typing.Tuple[int, str, typing.Optional[ast.Expression]]
+
+# Precedences are compared as plain ints: Enum attribute access is slow
+LOWEST = Precedence.LOWEST.value
+PREFIX = Precedence.PREFIX.value
+
+# What parse_expression does next: read an operand, apply infix operators to
+# it, or hand the finished value to the innermost frame
+OPERAND = "operand"
+INFIX = "infix"
+FINISH = "finish"
+
+
+class StackParser(Parser):
+    """
+    Parses like monkey.parser.Parser and builds the same AST, but parses
+    expressions with an explicit stack of pending frames instead of recursing
+    through Python for every operand. Prefix and infix operators, grouping
+    parentheses, calls, index expressions and array literals can therefore
+    nest as deep as memory allows. If and function expressions and hash
+    literals still recurse once per level through their parse methods.
+    """
+
+    def __init__(self, lexer) -> None:
+        super().__init__(lexer)
+
+        # One lookup per token: the kind of expression parse_expression
+        # builds itself, or None to call the registered parse method, and for
+        # infix operators their precedence
+        prefixes = {self.parse_prefix_expression: "prefix", self.parse_grouped_expression: "group",
+                    self.parse_array_literal: "array"}
+        infixes = {self.parse_infix_expression: "infix", self.parse_call_expression: "call",
+                   self.parse_index_expression: "index"}
+        self.prefix_table = {token_type: (prefixes.get(function, None), function)
+                             for token_type, function in self.prefix_parse_functions.items()}
+        self.infix_table = {token_type: (infixes.get(self.infix_parse_functions[token_type], None), precedence.value)
+                            for token_type, precedence in PRECEDENCES.items()
+                            if token_type in self.infix_parse_functions}
+
+    def parse_expression(self, precedence: Precedence) -> ast.Expression:
+        frames: typing.List[Frame] = []
+        level = precedence.value
+        left = None
+        state = OPERAND
+
+        while True:
+            if state is OPERAND:
+                token = self.current_token
+                kind, prefix = self.prefix_table.get(token.token_type, (None, None))
+
+                if kind is None:
+                    if prefix is None:
+                        # Like the recursive parser, skip the infix operators
+                        self.no_prefix_parse_function_error(token.token_type)
+                        left = None
+                        state = FINISH
+                        continue
+                    left = prefix()
+                elif kind == "array" and self.peek_token.token_type is TokenType.RBRACKET:
+                    self.next_token()
+                    left = ast.ArrayLiteral(token)
+                    left.elements = []
+                else:
+                    # Parse the operand inside first: leave a frame waiting for it
+                    if kind == "prefix":
+                        node = ast.PrefixExpression(token, token.literal)
+                    elif kind == "array":
+                        node = ast.ArrayLiteral(token)
+                        node.elements = []
+                    else:
+                        node = None
+                    frames.append((level, kind, node))
+                    level = PREFIX if kind == "prefix" else LOWEST
+                    self.next_token()
+                    continue
+
+                state = INFIX
+
+            elif state is INFIX:
+                state = FINISH
+
+                while True:
+                    # Semicolons and tokens without a precedence end the
+                    # expression, as in the recursive parser's loop condition
+                    peek_type = self.peek_token.token_type
+                    kind, operator_level = self.infix_table.get(peek_type, (None, LOWEST))
+                    if level >= operator_level:
+                        break
+
+                    self.next_token()
+                    token = self.current_token
+
+                    if kind is None:
+                        left = self.infix_parse_functions[peek_type](left)
+                    elif kind == "call" and self.peek_token.token_type is TokenType.RPAREN:
+                        self.next_token()
+                        left = ast.CallExpression(token, left)
+                        left.arguments = []
+                    else:
+                        if kind == "infix":
+                            node = ast.InfixExpression(token, token.literal, left)
+                        elif kind == "index":
+                            node = ast.IndexExpression(token, left)
+                        else:
+                            node = ast.CallExpression(token, left)
+                            node.arguments = []
+                        frames.append((level, kind, node))
+                        level = operator_level if kind == "infix" else LOWEST
+
+                        self.next_token()
+                        state = OPERAND
+                        break
+
+            else:
+                # `left` is the whole expression parsed at `level`
+                if not frames:
+                    return left
+
+                level, kind, node = frames.pop()
+                state = INFIX
+
+                if kind == "prefix" or kind == "infix":
+                    node.right = left
+                    left = node
+                elif kind == "group":
+                    if not self.expect_peek(TokenType.RPAREN):
+                        left = None
+                elif kind == "index":
+                    node.index = left
+                    left = node if self.expect_peek(TokenType.RBRACKET) else None
+                else:
+                    elements = node.arguments if kind == "call" else node.elements
+                    elements.append(left)
+
+                    if self.peek_token.token_type is TokenType.COMMA:
+                        self.next_token()
+                        self.next_token()
+                        frames.append((level, kind, node))
+                        level = LOWEST
+                        state = OPERAND
+                        continue
+
+                    if not self.expect_peek(TokenType.RPAREN if kind == "call" else TokenType.RBRACKET):
+                        if kind == "call":
+                            node.arguments = None
+                        else:
+                            node.elements = None
+                    left = node
@@ -0,0 +1,64 @@
+import codecs
+import typing
+
+from monkey.regex_lexer import TOKEN_PATTERN, match_token
+from monkey.token import Token, TokenType
+
+CHUNK_SIZE = 1 << 16
+
+
+class Readable(typing.Protocol):
+    # Text and binary files, io.StringIO and mmap.mmap all qualify
+    def read(self, size: int) -> typing.Union[str, bytes]: ...
+
+
+def read_tokens(stream: Readable, chunk_size: int = CHUNK_SIZE,
+                encoding: str = "utf-8") -> typing.Iterator[Token]:
+    """
+    Yields the tokens of a source read from `stream` `chunk_size` characters
+    (or bytes, which are decoded) at a time, ending with one EOF token. Only
+    the current chunk and the unfinished token carried over from the previous
+    one are held in memory, so a string literal longer than a chunk is the
+    only thing that makes the buffer grow.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    finished = False
+
+    while not finished:
+        chunk = stream.read(chunk_size)
+        finished = not chunk
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk, final=finished)
+
+        text = pending + chunk
+        position = 0
+        while True:
+            match = TOKEN_PATTERN.match(text, position)
+            end = match.end()
+            # A match that reaches the end of the text may go on in the next
+            # chunk: an identifier or number, `=` before `=`, or an open string
+            if end == len(text) and not finished:
+                break
+
+            token = match_token(match)
+            yield token
+            position = end
+
+            if finished and end == len(text) and token.token_type is TokenType.EOF:
+                return
+
+        pending = text[position:]
+
+
+class StreamLexer():
+    """
+    Lexer with the next_token() interface over read_tokens(), so a Parser can
+    read a program from a file or an mmap without loading it as one string.
+    """
+
+    def __init__(self, stream: Readable, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8") -> None:
+        self.tokens = read_tokens(stream, chunk_size, encoding)
+
+    def next_token(self) -> Token:
+        return next(self.tokens, Token(TokenType.EOF, ""))
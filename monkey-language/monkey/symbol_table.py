@@ -0,0 +1,84 @@
+import enum
+import typing
+
+
+class SymbolScope(enum.Enum):
+    GLOBAL = "GLOBAL"
+    LOCAL = "LOCAL"
+    BUILTIN = "BUILTIN"
+    FREE = "FREE"
+    FUNCTION = "FUNCTION"
+
+
+class Symbol():
+    def __init__(self, name: str, scope: SymbolScope, index: int) -> None:
+        self.name = name
+        self.scope = scope
+        self.index = index
+
+    def __eq__(self, other: typing.Any) -> bool:
+        return (isinstance(other, Symbol) and other.name == self.name
+                and other.scope == self.scope and other.index == self.index)
+
+    def __repr__(self) -> str:
+        return f"Symbol({self.name!r}, {self.scope}, {self.index})"
+
+
+class SymbolTable():
+    def __init__(self, outer: 'SymbolTable' = None) -> None:
+        self.outer = outer
+        self.store: typing.Dict[str, Symbol] = {}
+        self.num_definitions = 0
+        self.free_symbols: typing.List[Symbol] = []
+
+    def define(self, name: str) -> Symbol:
+        if self.outer is None:
+            scope = SymbolScope.GLOBAL
+        else:
+            scope = SymbolScope.LOCAL
+
+        # Rebinding a name reuses its slot, like assigning to the same key of
+        # the evaluator's environment store.
+        symbol = self.store.get(name, None)
+        if symbol is not None and symbol.scope == scope:
+            return symbol
+
+        symbol = Symbol(name, scope, self.num_definitions)
+        self.store[name] = symbol
+        self.num_definitions += 1
+        return symbol
+
+    def define_builtin(self, index: int, name: str) -> Symbol:
+        symbol = Symbol(name, SymbolScope.BUILTIN, index)
+        self.store[name] = symbol
+        return symbol
+
+    def define_function_name(self, name: str) -> Symbol:
+        symbol = Symbol(name, SymbolScope.FUNCTION, 0)
+        self.store[name] = symbol
+        return symbol
+
+    def define_free(self, original: Symbol) -> Symbol:
+        self.free_symbols.append(original)
+
+        symbol = Symbol(original.name, SymbolScope.FREE, len(self.free_symbols) - 1)
+        self.store[original.name] = symbol
+        return symbol
+
+    def resolve(self, name: str) -> typing.Optional[Symbol]:
+        symbol = self.store.get(name, None)
+        if symbol is not None or self.outer is None:
+            return symbol
+
+        symbol = self.outer.resolve(name)
+        if symbol is None:
+            return None
+
+        if symbol.scope in (SymbolScope.GLOBAL, SymbolScope.BUILTIN):
+            return symbol
+
+        return self.define_free(symbol)
+
+
+def new_enclosed_symbol_table(outer: SymbolTable) -> SymbolTable:
+    return SymbolTable(outer)
@@ -0,0 +1,109 @@
+from array import array
+import sys
+
+from monkey.regex_lexer import OPERATORS, TOKEN_PATTERN
+from monkey.token import Token, TokenType
+
+# A token's type is stored as its index in TOKEN_TYPES
+TOKEN_TYPES = tuple(TokenType)
+CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+KEYWORD_CODES = {literal: CODES[token_type] for literal, token_type in Token.KEYWORDS.items()}
+OPERATOR_CODES = {literal: CODES[token_type] for literal, token_type in OPERATORS.items()}
+IDENT, INT, STRING, ILLEGAL, EOF = (CODES[token_type] for token_type in (
+    TokenType.IDENT, TokenType.INT, TokenType.STRING, TokenType.ILLEGAL, TokenType.EOF))
+
+# Tokens whose literal is fixed by their type are shared by every buffer
+FIXED_TOKENS = {code: Token(TOKEN_TYPES[code], literal)
+                for literal, code in {**KEYWORD_CODES, **OPERATOR_CODES, "": EOF}.items()}
+
+
+class TokenBuffer():
+    """
+    The tokens of a whole source text packed into parallel arrays: a 2-byte
+    type code and the 4-byte start and end offsets of the literal, so that a
+    token takes 10 bytes instead of a Token object and its literal string.
+    Literals are sliced from the source only when a token is read, and
+    identifiers are interned, so every use of a name shares one string.
+
+    next_token() reads the tokens in order, like a lexer, so a Parser can
+    consume the buffer directly. Past the end it keeps returning EOF.
+    """
+    __slots__ = ("source", "types", "starts", "ends", "position")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.types = array('H')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def token_type(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def literal(self, index: int) -> str:
+        literal = self.source[self.starts[index]:self.ends[index]]
+        if self.types[index] == IDENT:
+            return sys.intern(literal)
+        return literal
+
+    def token(self, index: int) -> Token:
+        code = self.types[index]
+        token = FIXED_TOKENS.get(code)
+        if token is not None:
+            return token
+
+        literal = self.source[self.starts[index]:self.ends[index]]
+        if code == IDENT:
+            literal = sys.intern(literal)
+        return Token(TOKEN_TYPES[code], literal)
+
+    def next_token(self) -> Token:
+        position = self.position
+        # The last token is always EOF: stay on it
+        if position < len(self.types) - 1:
+            self.position = position + 1
+        return self.token(position)
+
+    def nbytes(self) -> int:
+        return sum(len(values) * values.itemsize for values in (self.types, self.starts, self.ends))
+
+
+def tokenize(source: str) -> TokenBuffer:
+    """
+    Lexes the whole source into a TokenBuffer, with the same tokens as
+    monkey.regex_lexer.RegexLexer.
+    """
+    buffer = TokenBuffer(source)
+    types, starts, ends = buffer.types, buffer.starts, buffer.ends
+
+    for match in TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        start, end = match.span(kind)
+
+        if kind == "IDENT":
+            code = KEYWORD_CODES.get(source[start:end], IDENT)
+        elif kind == "OPERATOR":
+            code = OPERATOR_CODES[source[start:end]]
+        elif kind == "INT":
+            code = INT
+        elif kind == "STRING":
+            code = STRING
+        elif kind == "EOF":
+            code = EOF
+            # A NUL character is not part of the literal
+            end = start
+        else:
+            code = ILLEGAL
+
+        types.append(code)
+        starts.append(start)
+        ends.append(end)
+
+        if end == len(source) and code == EOF:
+            break
+
+    return buffer
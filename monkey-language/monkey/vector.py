@@ -0,0 +1,152 @@
+import typing
+
+# Every trie node holds up to 32 children, selected by 5 bits of the index
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+Node = typing.List[typing.Any]
+
+
+class PersistentVector():
+    """
+    Immutable vector stored as a bit-partitioned trie of 32-wide nodes plus a
+    tail holding the last, partially filled leaf. Indexing walks at most
+    log32(n) levels; pushing copies the tail, or the one path of nodes the full
+    tail is moved into, and shares everything else with the original vector.
+
+    A vector can also be a view that starts `start` elements into its trie:
+    rest() returns one without copying, so walking an array with first/rest
+    is linear.
+
+    Vectors may share a tail list that is longer than their own tail: each
+    one only sees the first `count` elements. A vector that still ends where
+    its tail list ends owns that end, and push appends to the list in place
+    instead of copying it; pushing onto an older vector copies as usual.
+    """
+    __slots__ = ("count", "shift", "root", "tail", "start")
+
+    def __init__(self, count: int = 0, shift: int = BITS, root: Node = None, tail: Node = None,
+                 start: int = 0) -> None:
+        # Elements in the trie and tail, including the `start` hidden ones
+        self.count = count
+        self.shift = shift
+        self.root: Node = root if root is not None else []
+        self.tail: Node = tail if tail is not None else []
+        self.start = start
+
+    @classmethod
+    def from_list(cls, elements: typing.Sequence[typing.Any]) -> 'PersistentVector':
+        count = len(elements)
+        tail_offset = _tail_offset(count)
+
+        # Build the trie bottom-up from full leaves instead of pushing one by one
+        nodes = [elements[start:start + WIDTH] for start in range(0, tail_offset, WIDTH)]
+        shift = BITS
+        while len(nodes) > WIDTH:
+            nodes = [nodes[start:start + WIDTH] for start in range(0, len(nodes), WIDTH)]
+            shift += BITS
+
+        return cls(count, shift, nodes, list(elements[tail_offset:]))
+
+    def __len__(self) -> int:
+        return self.count - self.start
+
+    def __getitem__(self, index: int) -> typing.Any:
+        if index < 0:
+            index += self.count
+        else:
+            index += self.start
+        if not self.start <= index < self.count:
+            raise IndexError("vector index out of range")
+
+        return self._leaf_for(index)[index & MASK]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        tail_offset = _tail_offset(self.count)
+        start = self.start
+
+        if start < tail_offset:
+            leaf_start = start - (start & MASK)
+            yield from self._leaf_for(leaf_start)[start & MASK:]
+            for leaf_start in range(leaf_start + WIDTH, tail_offset, WIDTH):
+                yield from self._leaf_for(leaf_start)
+            yield from self.tail[:self.count - tail_offset]
+        else:
+            yield from self.tail[start - tail_offset:self.count - tail_offset]
+
+    def __repr__(self) -> str:
+        return f"PersistentVector({list(self)})"
+
+    def push(self, value: typing.Any) -> 'PersistentVector':
+        count = self.count
+        tail_size = count - _tail_offset(count)
+
+        if tail_size < WIDTH:
+            tail = self.tail
+            if len(tail) == tail_size:
+                # Nothing was pushed past this vector's end yet: extend in place
+                tail.append(value)
+            else:
+                tail = tail[:tail_size] + [value]
+            return PersistentVector(count + 1, self.shift, self.root, tail, self.start)
+
+        # The tail is full: it becomes a leaf of the trie and a new tail starts
+        shift = self.shift
+        if (count >> BITS) > (1 << shift):
+            root = [self.root, _new_path(shift, self.tail)]
+            shift += BITS
+        else:
+            root = _push_tail(shift, self.root, self.tail, count)
+
+        return PersistentVector(count + 1, shift, root, [value], self.start)
+
+    def rest(self) -> 'PersistentVector':
+        # Shares the whole trie; only the view's first index moves
+        return PersistentVector(self.count, self.shift, self.root, self.tail, min(self.start + 1, self.count))
+
+    def _leaf_for(self, index: int) -> Node:
+        if index >= _tail_offset(self.count):
+            return self.tail
+
+        node = self.root
+        level = self.shift
+        while level > 0:
+            node = node[(index >> level) & MASK]
+            level -= BITS
+        return node
+
+
+def _tail_offset(count: int) -> int:
+    # Index of the first element stored in the tail
+    if count < WIDTH:
+        return 0
+    return ((count - 1) >> BITS) << BITS
+
+
+def _new_path(level: int, node: Node) -> Node:
+    while level > 0:
+        node = [node]
+        level -= BITS
+    return node
+
+
+def _push_tail(level: int, parent: Node, tail: Node, count: int) -> Node:
+    index = ((count - 1) >> level) & MASK
+    node = parent[:]
+
+    if level == BITS:
+        child = tail
+    elif index < len(parent):
+        child = _push_tail(level - BITS, parent[index], tail, count)
+    else:
+        child = _new_path(level - BITS, tail)
+
+    if index < len(node):
+        node[index] = child
+    else:
+        node.append(child)
+    return node
+
+
+EMPTY = PersistentVector()
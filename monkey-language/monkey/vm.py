@@ -0,0 +1,328 @@
+import typing
+
+import monkey.code as code
+from monkey.builtins import BUILTINS, BUILTIN_FUNCTIONS
+from monkey.compiler import Bytecode
+from monkey.evaluator import (
+    TRUE, FALSE, NULL, EvaluationError,
+    _eval_infix_expression, _eval_bang_operator_expression, _eval_minus_prefix_operator_expression,
+    _eval_index_expression,
+)
+from monkey.object import (
+    Object, Hashable,
+    Integer, HashPair, Hash, new_array,
+    Error, Builtin, CompiledFunction, Closure, new_integer
+)
+
+GLOBALS_SIZE = 65536
+MAX_FRAMES = 100000
+
+INFIX_OPERATORS = {
+    code.ADD: '+',
+    code.SUB: '-',
+    code.MUL: '*',
+    code.DIV: '/',
+    code.GREATER_THAN: '>',
+    code.LESS_THAN: '<',
+    code.EQUAL: '==',
+    code.NOT_EQUAL: '!=',
+}
+
+
+class Frame():
+    __slots__ = ("closure", "ip", "base_pointer")
+
+    def __init__(self, closure: Closure, ip: int, base_pointer: int) -> None:
+        self.closure = closure
+        self.ip = ip
+        self.base_pointer = base_pointer
+
+
+def new_globals_store() -> typing.List[Object]:
+    return [None] * GLOBALS_SIZE
+
+
+class VM():
+    """
+    Runs a Compiler's bytecode with the same results as monkey.evaluator,
+    except that:
+
+    - functions inspect as Closure[...] rather than as their source;
+    - closures capture the values of their free variables when they are
+      made, so a later let of the same name in the enclosing function is
+      not seen: `let x = 1; let g = fn() { x }; let x = 2; g()` gives 1
+      inside a function, where the evaluator gives 2;
+    - for the same reason, local functions cannot call local functions
+      defined after them, such as mutually recursive isEven and isOdd;
+    - a local read before its let ran is "identifier not found", where the
+      evaluator reads the binding of the enclosing scopes.
+    """
+
+    def __init__(self, bytecode: Bytecode, globals: typing.List[Object] = None) -> None:
+        self.constants = bytecode.constants
+        self.global_names = bytecode.global_names
+        self.globals = globals if globals is not None else new_globals_store()
+
+        # The main program returns like any other function once it runs out
+        main_function = CompiledFunction(bytecode.instructions + code.make(code.RETURN))
+        # Builtins such as map call closures back on the VM that made them
+        self.prepare_call = lambda closure: lambda arguments: self.call_closure(closure, arguments)
+        self.main_closure = Closure(main_function, [], self.prepare_call)
+
+        self.stack: typing.List[Object] = []
+        self.last_popped: Object = None
+
+    def last_popped_stack_elem(self) -> Object:
+        return self.last_popped
+
+    def run(self) -> Object:
+        """
+        Runs the program and returns its result: the value of the last
+        expression statement, the value of a top-level return, or the first
+        Error raised, exactly as `evaluate` would for the same program.
+        """
+        try:
+            return self._execute(self.main_closure, [])
+        except EvaluationError as error:
+            # Raised by the evaluator's operator helpers
+            return self._halt(error.error)
+
+    def call_closure(self, closure: Closure, arguments: typing.List[Object]) -> Object:
+        """
+        Runs one call of `closure` to completion and returns its result or
+        Error. The call gets a stack of its own, so it can be made from a
+        builtin in the middle of running the program.
+        """
+        saved_stack = self.stack
+        saved_last_popped = self.last_popped
+        self.stack = []
+        try:
+            return self._execute(closure, arguments)
+        except EvaluationError as error:
+            return self._halt(error.error)
+        finally:
+            self.stack = saved_stack
+            self.last_popped = saved_last_popped
+
+    def _execute(self, closure: Closure, arguments: typing.List[Object]) -> Object:
+        constants = self.constants
+        globals = self.globals
+        prepare_call = self.prepare_call
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+
+        function = closure.function
+        if len(arguments) < function.num_parameters:
+            return self._halt(Error(
+                f"wrong number of arguments: want={function.num_parameters}, got={len(arguments)}"))
+        # Extra arguments are ignored, as in the evaluator
+        arguments = arguments[:function.num_parameters]
+
+        # The outermost call sits on the stack like any other callee
+        frames: typing.List[Frame] = []
+        push(closure)
+        stack.extend(arguments)
+        if function.num_locals > len(arguments):
+            stack.extend([None] * (function.num_locals - len(arguments)))
+        instructions = function.instructions
+        base_pointer = 1
+        ip = 0
+
+        while True:
+            op = instructions[ip]
+
+            if op == code.GET_LOCAL:
+                value = stack[base_pointer + instructions[ip + 1]]
+                if value is None:
+                    return self._halt(Error(
+                        f"identifier not found: {closure.function.local_names[instructions[ip + 1]]}"))
+                push(value)
+                ip += 2
+            elif op == code.CONSTANT:
+                push(constants[instructions[ip + 1]])
+                ip += 2
+            elif op == code.CURRENT_CLOSURE:
+                push(closure)
+                ip += 1
+            elif op == code.GET_GLOBAL:
+                index = instructions[ip + 1]
+                value = globals[index]
+                if value is None:
+                    # Not bound yet: the name only shadows the builtin once it is
+                    value = BUILTINS.get(self.global_names[index], None)
+                    if value is None:
+                        return self._halt(Error(f"identifier not found: {self.global_names[index]}"))
+                push(value)
+                ip += 2
+            elif op == code.GET_FREE:
+                value = closure.free[instructions[ip + 1]]
+                if value is None:
+                    return self._halt(Error(
+                        f"identifier not found: {closure.function.free_names[instructions[ip + 1]]}"))
+                push(value)
+                ip += 2
+            elif code.ADD <= op <= code.LESS_THAN:
+                right = pop()
+                left = pop()
+                if type(left) is Integer and type(right) is Integer:
+                    if op == code.ADD:
+                        result = new_integer(left.value + right.value)
+                    elif op == code.SUB:
+                        result = new_integer(left.value - right.value)
+                    elif op == code.LESS_THAN:
+                        result = TRUE if left.value < right.value else FALSE
+                    elif op == code.MUL:
+                        result = new_integer(left.value * right.value)
+                    elif op == code.GREATER_THAN:
+                        result = TRUE if left.value > right.value else FALSE
+                    elif op == code.EQUAL:
+                        result = TRUE if left.value == right.value else FALSE
+                    elif op == code.NOT_EQUAL:
+                        result = TRUE if left.value != right.value else FALSE
+                    else:
+                        result = new_integer(left.value / right.value)
+                else:
+                    result = _eval_infix_expression(INFIX_OPERATORS[op], left, right)
+                push(result)
+                ip += 1
+            elif op == code.JUMP_NOT_TRUTHY:
+                condition = pop()
+                if condition is FALSE or condition is NULL:
+                    ip = instructions[ip + 1]
+                else:
+                    ip += 2
+            elif op == code.JUMP:
+                ip = instructions[ip + 1]
+            elif op == code.CALL:
+                num_arguments = instructions[ip + 1]
+                ip += 2
+                callee = stack[-1 - num_arguments]
+
+                if type(callee) is Closure:
+                    function = callee.function
+                    if num_arguments != function.num_parameters:
+                        if num_arguments < function.num_parameters:
+                            return self._halt(Error(
+                                f"wrong number of arguments: want={function.num_parameters}, got={num_arguments}"))
+                        # Extra arguments are ignored, as in the evaluator
+                        del stack[len(stack) - (num_arguments - function.num_parameters):]
+                        num_arguments = function.num_parameters
+                    if len(frames) >= MAX_FRAMES:
+                        return self._halt(Error("stack overflow"))
+
+                    frames.append(Frame(closure, ip, base_pointer))
+                    closure = callee
+                    instructions = function.instructions
+                    base_pointer = len(stack) - num_arguments
+                    if function.num_locals > num_arguments:
+                        stack.extend([None] * (function.num_locals - num_arguments))
+                    ip = 0
+                elif type(callee) is Builtin:
+                    arguments = stack[len(stack) - num_arguments:]
+                    result = callee.function(arguments)
+                    del stack[len(stack) - num_arguments - 1:]
+                    if type(result) is Error:
+                        return self._halt(result)
+                    push(result if result is not None else NULL)
+                else:
+                    return self._halt(Error(f"not a function: {callee.object_type()}"))
+            elif op == code.RETURN_VALUE or op == code.RETURN:
+                return_value = pop() if op == code.RETURN_VALUE else NULL
+
+                if not frames:
+                    # Leaving the main program: an explicit return decides the
+                    # result, falling off the end yields the last popped value
+                    if op == code.RETURN and closure is self.main_closure:
+                        return_value = self.last_popped
+                    return self._halt(return_value)
+
+                del stack[base_pointer - 1:]
+                push(return_value)
+
+                frame = frames.pop()
+                closure = frame.closure
+                instructions = closure.function.instructions
+                base_pointer = frame.base_pointer
+                ip = frame.ip
+            elif op == code.POP:
+                self.last_popped = pop()
+                ip += 1
+            elif op == code.SET_LOCAL:
+                stack[base_pointer + instructions[ip + 1]] = pop()
+                ip += 2
+            elif op == code.SET_GLOBAL:
+                globals[instructions[ip + 1]] = pop()
+                # Only top-level lets set globals: as in the evaluator, a
+                # program that ends with one has no result
+                self.last_popped = None
+                ip += 2
+            elif op == code.TRUE:
+                push(TRUE)
+                ip += 1
+            elif op == code.FALSE:
+                push(FALSE)
+                ip += 1
+            elif op == code.NULL:
+                push(NULL)
+                ip += 1
+            elif op == code.GET_BUILTIN:
+                push(BUILTIN_FUNCTIONS[instructions[ip + 1]])
+                ip += 2
+            elif op == code.BANG:
+                push(_eval_bang_operator_expression(pop()))
+                ip += 1
+            elif op == code.MINUS:
+                right = pop()
+                if type(right) is Integer:
+                    push(new_integer(-right.value))
+                else:
+                    push(_eval_minus_prefix_operator_expression(right))
+                ip += 1
+            elif op == code.CLOSURE:
+                function = constants[instructions[ip + 1]]
+                num_free = instructions[ip + 2]
+                free = stack[len(stack) - num_free:]
+                del stack[len(stack) - num_free:]
+                push(Closure(function, free, prepare_call))
+                ip += 3
+            elif op == code.ARRAY:
+                num_elements = instructions[ip + 1]
+                elements = stack[len(stack) - num_elements:]
+                del stack[len(stack) - num_elements:]
+                push(new_array(elements))
+                ip += 2
+            elif op == code.HASH:
+                num_elements = instructions[ip + 1]
+                hash_object = self._build_hash(stack[len(stack) - num_elements:])
+                del stack[len(stack) - num_elements:]
+                if type(hash_object) is Error:
+                    return self._halt(hash_object)
+                push(hash_object)
+                ip += 2
+            elif op == code.INDEX:
+                index = pop()
+                left = pop()
+                push(_eval_index_expression(left, index))
+                ip += 1
+            else:
+                raise ValueError(f"opcode {op} undefined")
+
+    def _halt(self, result: Object) -> Object:
+        self.stack.clear()
+        self.last_popped = result
+        return result
+
+    def _build_hash(self, elements: typing.List[Object]) -> Object:
+        pairs = {}
+
+        for index in range(0, len(elements), 2):
+            key = elements[index]
+            value = elements[index + 1]
+
+            if not isinstance(key, Hashable):
+                return Error(f"unusable as hash key: {key.object_type()}")
+
+            pairs[key.hash_key()] = HashPair(key, value)
+
+        return Hash(pairs)
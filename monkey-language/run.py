@@ -0,0 +1,26 @@
+import sys
+
+from monkey.environment import Environment
+from monkey.evaluator import evaluate_statements
+from monkey.object import Error
+from monkey.parser import Parser
+from monkey.stream_lexer import StreamLexer
+from repl import print_parser_errors
+
+
+def run_file(path: str) -> None:
+    # Each statement runs as soon as it is parsed: output starts right away
+    # and only the statements still referenced stay in memory
+    with open(path, "rb") as source:
+        parser = Parser(StreamLexer(source))
+        env = Environment()
+        for result in evaluate_statements(parser.iter_statements(env.global_resolver()), env):
+            if type(result) is Error:
+                print(result.inspect())
+
+    if len(parser.errors) != 0:
+        print_parser_errors(parser.errors)
+
+
+if __name__ == "__main__":
+    run_file(sys.argv[1])
@@ -0,0 +1,45 @@
+from monkey import compile_to_closure
+from monkey.environment import Environment
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+import test.test_evaluator as test_evaluator
+
+
+class TestClosureCompiler(test_evaluator.TestEvaluator):
+    """Runs the whole evaluator suite through compile_to_closure."""
+
+    def test_repeated_runs(self):
+        code = '''
+            let fibonacci = fn(x) {
+                if (x < 2) { x } else { fibonacci(x - 1) + fibonacci(x - 2) }
+            };
+            fibonacci(15);
+        '''
+        program = Parser(Lexer(code)).parse_program()
+        run = compile_to_closure(program)
+
+        for _ in range(3):
+            self._test_integer_object(run(Environment()), 610)
+
+    def test_constant_operand_specialization(self):
+        specialization_tests = (
+            ("let x = 3; x - 1", 2),
+            ("let x = 3; x * 2", 6),
+            ("let x = 3; x / 3", 1),
+            ("let x = 3; x + 1 + 1", 5),
+        )
+
+        for (code, expected) in specialization_tests:
+            self._test_integer_object(self._test_eval(code), expected)
+
+        self._test_boolean_object(self._test_eval("let x = 3; x < 4"), True)
+        self.assertEqual(self._test_eval('"a" - 1').message,
+                         "type mismatch: ObjectType.STRING - ObjectType.INTEGER")
+
+    def _test_eval(self, code):
+        lexer = Lexer(code)
+        parser = Parser(lexer)
+        program = parser.parse_program()
+        env = Environment()
+
+        return compile_to_closure(program)(env)
@@ -0,0 +1,42 @@
+import monkey.code as code
+import unittest
+
+
+class TestCode(unittest.TestCase):
+
+    def test_make(self):
+        make_tests = (
+            (code.CONSTANT, (65534,), [code.CONSTANT, 65534]),
+            (code.ADD, (), [code.ADD]),
+            (code.GET_LOCAL, (255,), [code.GET_LOCAL, 255]),
+            (code.CLOSURE, (65534, 255), [code.CLOSURE, 65534, 255]),
+        )
+
+        for (op, operands, expected) in make_tests:
+            instruction = code.make(op, *operands)
+            self.assertEqual(instruction, expected,
+                             f"wrong instruction. got={instruction}, want={expected}")
+
+    def test_make_wrong_operand_count(self):
+        with self.assertRaises(ValueError):
+            code.make(code.CONSTANT)
+
+    def test_instructions_string(self):
+        instructions = [
+            *code.make(code.ADD),
+            *code.make(code.GET_LOCAL, 1),
+            *code.make(code.CONSTANT, 2),
+            *code.make(code.CONSTANT, 65535),
+            *code.make(code.CLOSURE, 65535, 255),
+        ]
+
+        expected = '\n'.join([
+            "0000 OpAdd",
+            "0001 OpGetLocal 1",
+            "0003 OpConstant 2",
+            "0005 OpConstant 65535",
+            "0007 OpClosure 65535 255",
+        ])
+
+        self.assertEqual(code.instructions_string(instructions), expected,
+                         f"instructions wrongly formatted. got={code.instructions_string(instructions)}")
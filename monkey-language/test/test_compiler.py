@@ -0,0 +1,312 @@
+import monkey.code as code
+from monkey.compiler import Compiler
+from monkey.lexer import Lexer
+from monkey.object import Integer, String, CompiledFunction
+from monkey.parser import Parser
+from monkey.symbol_table import Symbol, SymbolScope, SymbolTable
+import unittest
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_integer_arithmetic(self):
+        compiler_tests = (
+            (
+                "1 + 2",
+                [1, 2],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.ADD),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "1 < 2",
+                [1, 2],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.LESS_THAN),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "-1",
+                [1],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.MINUS),
+                    code.make(code.POP),
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_conditionals(self):
+        compiler_tests = (
+            (
+                "if (true) { 10 }; 3333;",
+                [10, 3333],
+                [
+                    code.make(code.TRUE),                  # 0000
+                    code.make(code.JUMP_NOT_TRUTHY, 7),    # 0001
+                    code.make(code.CONSTANT, 0),           # 0003
+                    code.make(code.JUMP, 8),               # 0005
+                    code.make(code.NULL),                  # 0007
+                    code.make(code.POP),                   # 0008
+                    code.make(code.CONSTANT, 1),           # 0009
+                    code.make(code.POP),                   # 0011
+                ],
+            ),
+            (
+                "if (true) { 10 } else { 20 }",
+                [10, 20],
+                [
+                    code.make(code.TRUE),                  # 0000
+                    code.make(code.JUMP_NOT_TRUTHY, 7),    # 0001
+                    code.make(code.CONSTANT, 0),           # 0003
+                    code.make(code.JUMP, 9),               # 0005
+                    code.make(code.CONSTANT, 1),           # 0007
+                    code.make(code.POP),                   # 0009
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_global_let_statements(self):
+        compiler_tests = (
+            (
+                "let one = 1; let two = one; two;",
+                [1],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.SET_GLOBAL, 0),
+                    code.make(code.GET_GLOBAL, 0),
+                    code.make(code.SET_GLOBAL, 1),
+                    code.make(code.GET_GLOBAL, 1),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "let one = 1; let one = one + 1;",
+                [1, 1],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.SET_GLOBAL, 0),
+                    code.make(code.GET_GLOBAL, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.ADD),
+                    code.make(code.SET_GLOBAL, 0),
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_string_array_and_hash_literals(self):
+        compiler_tests = (
+            (
+                '"mon" + "key"',
+                ["mon", "key"],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.ADD),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "[1, 2][0]",
+                [1, 2, 0],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.ARRAY, 2),
+                    code.make(code.CONSTANT, 2),
+                    code.make(code.INDEX),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "{1: 2}",
+                [1, 2],
+                [
+                    code.make(code.CONSTANT, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.HASH, 2),
+                    code.make(code.POP),
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_functions(self):
+        compiler_tests = (
+            (
+                "fn() { return 5 + 10 }",
+                [
+                    5,
+                    10,
+                    [
+                        code.make(code.CONSTANT, 0),
+                        code.make(code.CONSTANT, 1),
+                        code.make(code.ADD),
+                        code.make(code.RETURN_VALUE),
+                    ],
+                ],
+                [
+                    code.make(code.CLOSURE, 2, 0),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "fn() { }",
+                [
+                    [
+                        code.make(code.RETURN),
+                    ],
+                ],
+                [
+                    code.make(code.CLOSURE, 0, 0),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "fn(a) { let b = a; b }(1)",
+                [
+                    [
+                        code.make(code.GET_LOCAL, 0),
+                        code.make(code.SET_LOCAL, 1),
+                        code.make(code.GET_LOCAL, 1),
+                        code.make(code.RETURN_VALUE),
+                    ],
+                    1,
+                ],
+                [
+                    code.make(code.CLOSURE, 0, 0),
+                    code.make(code.CONSTANT, 1),
+                    code.make(code.CALL, 1),
+                    code.make(code.POP),
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_builtins_and_closures(self):
+        compiler_tests = (
+            (
+                "len([])",
+                [],
+                [
+                    code.make(code.GET_BUILTIN, 0),
+                    code.make(code.ARRAY, 0),
+                    code.make(code.CALL, 1),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "fn(a) { fn(b) { a + b } }",
+                [
+                    [
+                        code.make(code.GET_FREE, 0),
+                        code.make(code.GET_LOCAL, 0),
+                        code.make(code.ADD),
+                        code.make(code.RETURN_VALUE),
+                    ],
+                    [
+                        code.make(code.GET_LOCAL, 0),
+                        code.make(code.CLOSURE, 0, 1),
+                        code.make(code.RETURN_VALUE),
+                    ],
+                ],
+                [
+                    code.make(code.CLOSURE, 1, 0),
+                    code.make(code.POP),
+                ],
+            ),
+            (
+                "let countDown = fn(x) { countDown(x - 1); };",
+                [
+                    1,
+                    [
+                        code.make(code.CURRENT_CLOSURE),
+                        code.make(code.GET_LOCAL, 0),
+                        code.make(code.CONSTANT, 0),
+                        code.make(code.SUB),
+                        code.make(code.CALL, 1),
+                        code.make(code.RETURN_VALUE),
+                    ],
+                ],
+                [
+                    code.make(code.CLOSURE, 1, 0),
+                    code.make(code.SET_GLOBAL, 0),
+                ],
+            ),
+        )
+
+        self._run_compiler_tests(compiler_tests)
+
+    def test_symbol_table_resolve_free(self):
+        global_table = SymbolTable()
+        global_table.define("a")
+
+        first_local = SymbolTable(global_table)
+        first_local.define("c")
+
+        second_local = SymbolTable(first_local)
+        second_local.define("e")
+
+        expected = (
+            Symbol("a", SymbolScope.GLOBAL, 0),
+            Symbol("c", SymbolScope.FREE, 0),
+            Symbol("e", SymbolScope.LOCAL, 0),
+        )
+
+        for symbol in expected:
+            resolved = second_local.resolve(symbol.name)
+            self.assertEqual(resolved, symbol,
+                             f"wrong symbol for {symbol.name}. got={resolved}, want={symbol}")
+
+        self.assertEqual(second_local.free_symbols, [Symbol("c", SymbolScope.LOCAL, 0)],
+                         f"wrong free symbols. got={second_local.free_symbols}")
+        self.assertIsNone(second_local.resolve("unknown"), "unknown name resolved")
+
+    def _run_compiler_tests(self, compiler_tests):
+        for (source, expected_constants, expected_instructions) in compiler_tests:
+            program = Parser(Lexer(source)).parse_program()
+
+            compiler = Compiler()
+            compiler.compile(program)
+            bytecode = compiler.bytecode()
+
+            self._test_instructions(bytecode.instructions, expected_instructions)
+            self._test_constants(bytecode.constants, expected_constants)
+
+    def _test_instructions(self, actual, expected):
+        concatted = [operand for instruction in expected for operand in instruction]
+        self.assertEqual(actual, concatted,
+                         f"wrong instructions.\nwant=\n{code.instructions_string(concatted)}\n"
+                         f"got=\n{code.instructions_string(actual)}")
+
+    def _test_constants(self, actual, expected):
+        self.assertEqual(len(actual), len(expected),
+                         f"wrong number of constants. got={len(actual)}, want={len(expected)}")
+
+        for (constant, expected_constant) in zip(actual, expected):
+            if type(expected_constant) is int:
+                self.assertIsInstance(constant, Integer,
+                                      f"constant is not Integer. got={type(constant)}")
+                self.assertEqual(constant.value, expected_constant)
+            elif type(expected_constant) is str:
+                self.assertIsInstance(constant, String,
+                                      f"constant is not String. got={type(constant)}")
+                self.assertEqual(constant.value, expected_constant)
+            else:
+                self.assertIsInstance(constant, CompiledFunction,
+                                      f"constant is not CompiledFunction. got={type(constant)}")
+                self._test_instructions(constant.instructions, expected_constant)
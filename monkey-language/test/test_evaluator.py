@@ -1,11 +1,16 @@
+import contextlib
+import io
+
+from monkey import stack_evaluator
+from monkey.closure_compiler import compile_to_closure
 from monkey.environment import Environment
-from monkey.evaluator import evaluate, NULL, TRUE, FALSE
+from monkey.evaluator import evaluate, evaluate_statements, NULL, TRUE, FALSE
 from monkey.lexer import Lexer
 from monkey.object import (
     ObjectType, Object,
     Integer, Boolean, String,
     Error, Function,
-    Array, Hash
+    Array, IntArray, Hash
 )
 from monkey.parser import Parser
 import unittest
@@ -112,12 +117,38 @@ class TestEvaluator(unittest.TestCase):
                 ''',
                 10
             ),
+            ("let x = if (true) { return 5; }; 7", 5),
+            ("let f = fn() { let x = if (true) { return 5; }; 7 }; f() + 1", 6),
         )
 
         for (code, expected) in eval_return_statement_tests:
             evaluated = self._test_eval(code)
             self._test_integer_object(evaluated, expected)
 
+    def test_evaluate_statements(self):
+        evaluate_statements_tests = (
+            ("let a = 5; a * 2; let len = fn(x) { 1 }; len([1, 2]);", [None, 10, None, 1]),
+            ("1; return 2; 3;", [1, 2]),
+            ("1; -true; 3;", [1, "unknown operator: -ObjectType.BOOLEAN"]),
+            ('let a = len("ab"); let len = fn(x) { 99 }; a; len(1);', [None, None, 2, 99]),
+        )
+
+        for (code, expected) in evaluate_statements_tests:
+            parser = Parser(Lexer(code))
+            env = Environment()
+            results = list(evaluate_statements(parser.iter_statements(env.global_resolver()), env))
+
+            self.assertEqual(len(results), len(expected),
+                             f"wrong number of results for {code}. got={len(results)}, want={len(expected)}")
+            for result, want in zip(results, expected):
+                if want is None:
+                    self.assertIsNone(result, f"result is not None. got={result}")
+                elif type(want) is str:
+                    self.assertIsInstance(result, Error, f"result is not Error. got={result}")
+                    self.assertEqual(result.message, want, f"wrong error message. got={result.message}, want={want}")
+                else:
+                    self._test_integer_object(result, want)
+
     def test_let_statement(self):
         eval_let_statement_tests = (
             ("let a = 5; a;", 5),
@@ -130,6 +161,9 @@ class TestEvaluator(unittest.TestCase):
             evaluated = self._test_eval(code)
             self._test_integer_object(evaluated, expected)
 
+        evaluated = self._test_eval("1; let a = 1;")
+        self.assertIsNone(evaluated, f"program ending with a let has a result. got={evaluated}")
+
     def test_error_handling(self):
         error_handling_tests = (
             (
@@ -188,6 +222,28 @@ class TestEvaluator(unittest.TestCase):
             self.assertEqual(evaluated.message, expected,
                              f"wrong error message. got={evaluated.message}, expected={expected}")
 
+    def test_error_propagation(self):
+        error_propagation_tests = (
+            ("5 + (true + 1)", "type mismatch: ObjectType.BOOLEAN + ObjectType.INTEGER"),
+            ("let f = fn(x) { x + true; 10 }; f(1); 5", "type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN"),
+            ("let f = fn(x) { x }; f(-true)", "unknown operator: -ObjectType.BOOLEAN"),
+            ("[1, foobar, 3]", "identifier not found: foobar"),
+            ('{"a": len(1)}', "argument to 'len' not supported, got=ObjectType.INTEGER"),
+            ("let x = 1(2); x", "not a function: ObjectType.INTEGER"),
+            ("fn(a, b) { a }(1)", "wrong number of arguments: want=2, got=1"),
+            ("let f = fn(c) { if (c) { let y = 2; } y + 1 }; f(false)", "identifier not found: y"),
+            ("let f = fn(c) { if (c) { let y = 2; } fn() { y } }; f(false)()", "identifier not found: y"),
+            ("let f = fn(a, b) { a }; map([1], f)", "wrong number of arguments: want=2, got=1"),
+            ("if (5 > true) { 1 } else { 2 }", "type mismatch: ObjectType.INTEGER > ObjectType.BOOLEAN"),
+        )
+
+        for (code, expected) in error_propagation_tests:
+            evaluated = self._test_eval(code)
+            self.assertIsInstance(evaluated, Error,
+                                  f"no error object returned for {code}. got={type(evaluated)}")
+            self.assertEqual(evaluated.message, expected,
+                             f"wrong error message. got={evaluated.message}, expected={expected}")
+
     def test_function_object(self):
         code = "fn(x) { x + 2; };"
         evaluated = self._test_eval(code)
@@ -227,6 +283,131 @@ class TestEvaluator(unittest.TestCase):
         evaluated = self._test_eval(code)
         self._test_integer_object(evaluated, 4)
 
+    def test_nested_closures(self):
+        code = '''
+            let newAdderOuter = fn(a, b) {
+                let c = a + b;
+                fn(d) {
+                    let e = d + c;
+                    fn(f) { e + f + a; };
+                };
+            };
+            let newAdderInner = newAdderOuter(1, 2);
+            let adder = newAdderInner(3);
+            adder(8);
+        '''
+        evaluated = self._test_eval(code)
+        self._test_integer_object(evaluated, 15)
+
+    def test_recursive_local_functions(self):
+        code = '''
+            let wrapper = fn(n) {
+                let isEven = fn(x) { if (x == 0) { true } else { isOdd(x - 1) } };
+                let isOdd = fn(x) { if (x == 0) { false } else { isEven(x - 1) } };
+                isEven(n);
+            };
+            wrapper(10);
+        '''
+        evaluated = self._test_eval(code)
+        self._test_boolean_object(evaluated, True)
+
+    def test_shadowing(self):
+        shadowing_tests = (
+            ("let x = 1; let f = fn() { let x = x + 1; x }; f() + x;", 3),
+            ("let len = fn(a) { 42 }; len([1]);", 42),
+            ("let f = fn(len) { len }; f(7);", 7),
+            ('let a = len("ab"); let len = fn(x) { 99 }; a;', 2),
+            ("let x = 1; let f = fn(c) { if (c) { let x = 2; } x }; f(true);", 2),
+            ("let f = fn() { 1 }; let g = fn() { let a = f(); let f = fn() { 2 }; a + f() }; g();", 3),
+        )
+
+        for (code, expected) in shadowing_tests:
+            evaluated = self._test_eval(code)
+            self._test_integer_object(evaluated, expected)
+
+    def test_unbound_lets_read_enclosing_binding(self):
+        unbound_let_tests = (
+            ("let x = 1; let f = fn(c) { if (c) { let x = 2; } x }; f(false);", 1),
+            ("let x = 1; let f = fn(c) { if (c) { let x = 2; } fn() { x } }; f(false)();", 1),
+        )
+
+        for (code, expected) in unbound_let_tests:
+            evaluated = self._test_eval(code)
+            self._test_integer_object(evaluated, expected)
+
+    def test_closures_see_later_lets(self):
+        code = "let f = fn() { let x = 1; let g = fn() { x }; let x = 2; g() }; f();"
+        evaluated = self._test_eval(code)
+        self._test_integer_object(evaluated, 2)
+
+    def test_programs_share_an_environment(self):
+        # Like REPL lines: each program is parsed on its own
+        shared_environment_tests = (
+            (["let x = 5;", "x * 2;"], 10),
+            (["let len = fn(x) { 9 };", "len(1);"], 9),
+            (['let f = fn(x) { len(x) };', 'f("ab");', "let len = fn(x) { 9 };", 'f("ab");'], 9),
+            (['let a = len("ab"); let len = fn(x) { 99 }; a;', "a + len(1);"], 101),
+        )
+
+        engines = (
+            lambda program, env: evaluate(program, env),
+            lambda program, env: compile_to_closure(program)(env),
+            lambda program, env: stack_evaluator.evaluate(program, env),
+        )
+
+        for (lines, expected) in shared_environment_tests:
+            for run in engines:
+                env = Environment()
+                for line in lines:
+                    evaluated = run(Parser(Lexer(line)).parse_program(), env)
+                self._test_integer_object(evaluated, expected)
+
+    def test_evaluate_node_resolved_elsewhere(self):
+        # Each sample is resolved by its own program's resolver, not env's
+        samples = (("f()", 3), ("a[1]", 2), ("let b = a[0] + f(); b", 4))
+
+        for run in (evaluate, stack_evaluator.evaluate):
+            env = Environment()
+            run(Parser(Lexer("let a = [1, 2]; let f = fn() { 3 };")).parse_program(), env)
+            for (code, expected) in samples:
+                program = Parser(Lexer(code)).parse_program()
+                for statement in program.statements:
+                    evaluated = run(statement, env)
+                self._test_integer_object(evaluated, expected)
+
+    def test_tail_calls(self):
+        tail_call_tests = (
+            (
+                "let sum = fn(n, acc) { if (n == 0) { return acc; } return sum(n - 1, acc + n); }; sum(20000, 0);",
+                200010000,
+            ),
+            (
+                "let count = fn(n, acc) { if (n == 0) { acc } else { count(n - 1, acc + 1) } }; count(20000, 0);",
+                20000,
+            ),
+            (
+                '''
+                let isEven = fn(n) { if (n == 0) { true } else { isOdd(n - 1) } };
+                let isOdd = fn(n) { if (n == 0) { false } else { isEven(n - 1) } };
+                if (isEven(20001)) { 1 } else { 0 };
+                ''',
+                0,
+            ),
+        )
+
+        for (code, expected) in tail_call_tests:
+            evaluated = self._test_eval(code)
+            self._test_integer_object(evaluated, expected)
+
+    def test_literals_evaluate_to_shared_objects(self):
+        code = 'let f = fn() { [5, "five"] }; [f(), f()]'
+        evaluated = self._test_eval(code)
+
+        first, second = evaluated.elements[0].elements, evaluated.elements[1].elements
+        for index in range(2):
+            self.assertIs(first[index], second[index],
+                          f"literal evaluated to a new object. got={first[index].inspect()}")
+
     def test_eval_string_literal(self):
         code = '"Hello World!"'
         evaluated = self._test_eval(code)
@@ -247,6 +428,43 @@ class TestEvaluator(unittest.TestCase):
         self.assertEqual(evaluated.value, expected,
                          f"object has wrong value. got={evaluated.value}, want={expected}")
 
+    def test_long_string_concatenation(self):
+        code = """
+        let build = fn(s, n) { if (n == 0) { s } else { build(s + "abcdefghij", n - 1) } };
+        let s = build("", 1000);
+        [len(s), {s: 1}[build("", 1000)]]
+        """
+        self._test_array_object(self._test_eval(code), [10000, 1])
+
+        evaluated = self._test_eval('let s = "x" + "' + "y" * 300 + '"; s')
+        self.assertEqual(evaluated.value, "x" + "y" * 300,
+                         f"object has wrong value. got={evaluated.value}, want={'x' + 'y' * 300}")
+
+    def test_builtin_function_join(self):
+        builtin_functions_tests = (
+            ('join(["a", "b", "c"], ", ")', "a, b, c"),
+            ('join([], "-")', ""),
+            ('join(["a" + "b"], "")', "ab"),
+            ('join([1], "")', Error("elements of 'join' must be ObjectType.STRING, got ObjectType.INTEGER")),
+            ('join(["a"], 1)', Error("separator for 'join' must be ObjectType.STRING, got ObjectType.INTEGER")),
+            ('join("a", "")', Error("argument to 'join' must be ObjectType.ARRAY, got ObjectType.STRING")),
+            ('join([])', Error("wrong number of arguments. got=1, want=2")),
+        )
+
+        for (code, expected) in builtin_functions_tests:
+            evaluated = self._test_eval(code)
+
+            if type(expected) is str:
+                self.assertIsInstance(evaluated, String,
+                                      f"object is not String. got={type(evaluated)}")
+                self.assertEqual(evaluated.value, expected,
+                                 f"object has wrong value. got={evaluated.value}, want={expected}")
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
     def test_builtin_function_len(self):
         builtin_functions_tests = (
             ('len("")', 0),
@@ -296,6 +514,11 @@ class TestEvaluator(unittest.TestCase):
                 self.assertEqual(evaluated.message, expected.message,
                                  f"wrong error message. got={evaluated}, expected={expected}")
 
+    def test_builtin_nulls_are_falsy(self):
+        for code in ('first([])', 'last([])', 'rest([])', 'puts()'):
+            evaluated = self._test_eval(f"if ({code}) {{ 1 }} else {{ 2 }}")
+            self._test_integer_object(evaluated, 2)
+
     def test_builtin_function_last(self):
         builtin_functions_tests = (
             ('last([])', NULL),
@@ -335,17 +558,7 @@ class TestEvaluator(unittest.TestCase):
             evaluated = self._test_eval(code)
 
             if type(expected) is list:
-                for index in range(len(evaluated)):
-
-                    if type(expected) is int:
-                        self._test_integer_object(
-                            evaluated[index], expected[index])
-                    elif type(expected) is bool:
-                        self._test_boolean_object(
-                            evaluated[index], expected[index])
-                    elif type(expected) is str:
-                        self.assertEqual(evaluated[index].value, expected[index],
-                                         f"wrong string value. got={evaluated[index]}, expected={expected[index]}")
+                self._test_array_object(evaluated, expected)
             elif expected.object_type() == ObjectType.NULL:
                 self.assertEqual(evaluated.object_type(), expected.object_type(),
                                  f"wrong null value. got={evaluated.object_type()}, expected={expected.object_type()}")
@@ -369,23 +582,235 @@ class TestEvaluator(unittest.TestCase):
             evaluated = self._test_eval(code)
 
             if type(expected) is list:
-                for index in range(len(evaluated)):
-
-                    if type(expected) is int:
-                        self._test_integer_object(
-                            evaluated[index], expected[index])
-                    elif type(expected) is bool:
-                        self._test_boolean_object(
-                            evaluated[index], expected[index])
-                    elif type(expected) is str:
-                        self.assertEqual(evaluated[index].value, expected[index],
-                                         f"wrong string value. got={evaluated[index]}, expected={expected[index]}")
+                self._test_array_object(evaluated, expected)
             else:
                 self.assertIsInstance(evaluated, Error,
                                       f"object is not Error. got={type(evaluated)}")
                 self.assertEqual(evaluated.message, expected.message,
                                  f"wrong error message. got={evaluated}, expected={expected}")
 
+    def test_push_does_not_modify_array(self):
+        code = "let a = [1, 2]; let b = push(a, 3); let c = push(a, 4); [len(a), len(b), c[2], b[2]]"
+        self._test_array_object(self._test_eval(code), [2, 3, 4, 3])
+
+    def test_builtin_hash_functions(self):
+        builtin_functions_tests = (
+            ('let h = set({}, "a", 1); h["a"]', 1),
+            ('let h = {"a": 1}; let g = set(h, "b", 2); [len(keys(h)), len(keys(g)), g["b"]]', [1, 2, 2]),
+            ('set({"a": 1}, "a", 2)["a"]', 2),
+            ('has({"a": 1}, "a")', True),
+            ('has({"a": 1}, "b")', False),
+            ('let h = {"a": 1, 2: 2}; let g = delete(h, "a"); [has(h, "a"), has(g, "a"), has(g, 2)]',
+             [True, False, True]),
+            ('keys(delete({true: 1}, true))', []),
+            ('values(set({}, 1, 5))', [5]),
+            ('keys({"a": 1})', ["a"]),
+            ('keys({"apple": 1, "banana": 2, "cherry": 3, "date": 4})', ["apple", "banana", "cherry", "date"]),
+            ('values({"x": 3, "y": 1, "z": 2})', [3, 1, 2]),
+            ('keys(set(set({"a": 1, "b": 2}, "a", 3), "c", 4))', ["a", "b", "c"]),
+            ('keys(set(delete({"a": 1, "b": 2}, "a"), "a", 3))', ["b", "a"]),
+            ('set([], 1, 2)', Error("argument to 'set' must be ObjectType.HASH, got ObjectType.ARRAY")),
+            ('delete({}, [])', Error("unusable as hash key: ObjectType.ARRAY")),
+            ('has({}, fn(x) { x })', Error("unusable as hash key: ObjectType.FUNCTION")),
+            ('keys(1)', Error("argument to 'keys' must be ObjectType.HASH, got ObjectType.INTEGER")),
+            ('values({}, 1)', Error("wrong number of arguments. got=2, want=1")),
+        )
+
+        for (code, expected) in builtin_functions_tests:
+            evaluated = self._test_eval(code)
+
+            if type(expected) is bool:
+                self._test_boolean_object(evaluated, expected)
+            elif type(expected) is int:
+                self._test_integer_object(evaluated, expected)
+            elif type(expected) is list:
+                self._test_array_object(evaluated, expected)
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
+    def test_builtin_higher_order_functions(self):
+        builtin_functions_tests = (
+            ('map([1, 2, 3], fn(x) { x * 2 })', [2, 4, 6]),
+            ('map([], fn(x) { x })', []),
+            ('map(["a", "b"], len)', [1, 1]),
+            ('filter([1, 2, 3, 4], fn(x) { x > 2 })', [3, 4]),
+            ('filter([1, 2], fn(x) { if (x > 1) { x } })', [2]),
+            ('reduce([1, 2, 3, 4], fn(acc, x) { acc + x }, 10)', 20),
+            ('reduce([], fn(acc, x) { acc + x }, 0)', 0),
+            ('collect(range(4))', [0, 1, 2, 3]),
+            ('collect(range(2, 5))', [2, 3, 4]),
+            ('collect(range(0))', []),
+            ('sort([3, 1, 2])', [1, 2, 3]),
+            ('sort(["b", "c", "a"])', ["a", "b", "c"]),
+            ('sort([1, 3, 2], fn(a, b) { a > b })', [3, 2, 1]),
+            ('let n = 10; collect(map(range(3), fn(x) { x + n }))', [10, 11, 12]),
+            ('let f = fn(x) { if (x > 1) { return x; } 0 }; map([1, 2], f)', [0, 2]),
+            ('map([1], 1)', Error("not a function: ObjectType.INTEGER")),
+            ('map(1, fn(x) { x })', Error("argument to 'map' must be ObjectType.ARRAY or ObjectType.SEQUENCE, got ObjectType.INTEGER")),
+            ('map([1, true], fn(x) { x + 1 })', Error("type mismatch: ObjectType.BOOLEAN + ObjectType.INTEGER")),
+            ('reduce([1], fn(a, x) { len(x) }, 0)', Error("argument to 'len' not supported, got=ObjectType.INTEGER")),
+            ('range("a")', Error("argument to 'range' must be ObjectType.INTEGER, got ObjectType.STRING")),
+            ('sort([1, "a"])', Error("argument to 'sort' must hold only integers or only strings")),
+            ('sort([1, 2], fn(a, b) { a + true })', Error("type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN")),
+        )
+
+        for (code, expected) in builtin_functions_tests:
+            evaluated = self._test_eval(code)
+
+            if type(expected) is bool:
+                self._test_boolean_object(evaluated, expected)
+            elif type(expected) is int:
+                self._test_integer_object(evaluated, expected)
+            elif type(expected) is list:
+                self._test_array_object(evaluated, expected)
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
+    def test_builtin_map_matches_monkey_map(self):
+        code = """
+        let monkey_map = fn(a, f, acc) { if (len(a) == 0) { acc } else { monkey_map(rest(a), f, push(acc, f(first(a)))) } };
+        let f = fn(x) { x * x - 1 };
+        let numbers = collect(range(50));
+        [map(numbers, f), monkey_map(numbers, f, [])]
+        """
+        native, monkey = self._test_eval(code).elements
+        self._test_array_object(native, [element.value for element in monkey.elements])
+
+    def test_sequences(self):
+        sequence_tests = (
+            ('len(range(5))', 5),
+            ('range(3, 10)[2]', 5),
+            ('range(3)[3]', None),
+            ('reduce(filter(map(range(10), fn(x) { x * x }), fn(x) { x > 10 }), fn(acc, x) { acc + x }, 0)', 271),
+            ('collect(filter(map(lazy([1, 2, 3]), fn(x) { x * 2 }), fn(x) { x != 4 }))', [2, 6]),
+            ('let s = map(range(3), fn(x) { x + 1 }); [len(s), s[0], collect(s)[2]]', [3, 1, 3]),
+            ('collect([1, 2])', [1, 2]),
+            ('let s = map(range(3), fn(x) { x + true }); 5', 5),
+            ('len(map(range(3), fn(x) { x + true }))',
+             Error("type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN")),
+            ('map(range(3), fn(x) { -true })[0]', Error("unknown operator: -ObjectType.BOOLEAN")),
+            ('reduce(map(range(3), fn(x) { len(x) }), fn(acc, x) { acc }, 0)',
+             Error("argument to 'len' not supported, got=ObjectType.INTEGER")),
+            ('collect(1)', Error("argument to 'collect' must be ObjectType.SEQUENCE, got ObjectType.INTEGER")),
+            ('lazy(range(2))', Error("argument to 'lazy' must be ObjectType.ARRAY, got ObjectType.SEQUENCE")),
+        )
+
+        for (code, expected) in sequence_tests:
+            evaluated = self._test_eval(code)
+
+            if expected is None:
+                self._test_null_object(evaluated)
+            elif type(expected) is int:
+                self._test_integer_object(evaluated, expected)
+            elif type(expected) is list:
+                self._test_array_object(evaluated, expected)
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
+    def test_sequence_stages_run_once_per_element(self):
+        code = """
+        let calls = fn(x) { puts(x); x };
+        let s = map(range(3), calls);
+        [len(s), reduce(s, fn(acc, x) { acc + x }, 0)]
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            evaluated = self._test_eval(code)
+
+        self._test_array_object(evaluated, [3, 3])
+        self.assertEqual(output.getvalue(), "0\n1\n2\n", f"stages ran again. got={output.getvalue()!r}")
+
+    def test_int_arrays(self):
+        int_array_tests = (
+            ('[1, 2, 3] + [10, 20, 30]', [11, 22, 33]),
+            ('[1, 2, 3] * [2, 2, 2]', [2, 4, 6]),
+            ('[9223372036854775807] + [1]', [9223372036854775808]),
+            ('let a = [1, 2, 3]; [a[0], a[2], len(a), first(a), last(push(a, 4))]', [1, 3, 3, 1, 4]),
+            ('[5, 6][2]', None),
+            ('sum([1, 2, 3])', 6),
+            ('sum(ints(range(101)))', 5050),
+            ('sum([])', 0),
+            ('min([3, -1, 2])', -1),
+            ('max(ints([3, -1, 2]))', 3),
+            ('max([])', None),
+            ('dot([1, 2, 3], [4, 5, 6])', 32),
+            ('len(ints(range(5)) * ints(range(5)))', 5),
+            ('ints(map([1, 2], fn(x) { x * 2 })) + [1, 1]', [3, 5]),
+            ('push([1, 2], 3) + [1, 1, 1]', [2, 3, 4]),
+            ('map([1, 2], fn(x) { x }) + [1, 1]', [2, 3]),
+            ('[1, 2] * rest([0, 3, 4])', [3, 8]),
+            ('filter([1, 2, 3], fn(x) { x > 1 }) * [2, 2]', [4, 6]),
+            ('([9223372036854775807] + [1]) + [1]', [9223372036854775809]),
+            ('[1, 2, 3] * 3', Error("type mismatch: ObjectType.ARRAY * ObjectType.INTEGER")),
+            ('1 + [1, 2]', Error("type mismatch: ObjectType.INTEGER + ObjectType.ARRAY")),
+            ('["a"] + 1', Error("type mismatch: ObjectType.ARRAY + ObjectType.INTEGER")),
+            ('[1, 2] + [1]', Error("length mismatch: 2 + 1")),
+            ('[1, 2] + [true, 1]', Error("unknown operator: ObjectType.ARRAY + ObjectType.ARRAY")),
+            ('[1, 2] - [1, 2]', Error("unknown operator: ObjectType.ARRAY - ObjectType.ARRAY")),
+            ('sum([1, "a"])', Error("argument to 'sum' must hold only integers, got ObjectType.STRING")),
+            ('dot([1], [1, 2])', Error("arguments to 'dot' must have the same length, got 1 and 2")),
+            ('ints([9223372036854775807 + 1])', Error("argument to 'ints' must hold only 64-bit integers")),
+            ('min(1)', Error("argument to 'min' must be ObjectType.ARRAY, got ObjectType.INTEGER")),
+        )
+
+        for (code, expected) in int_array_tests:
+            evaluated = self._test_eval(code)
+
+            if expected is None:
+                self._test_null_object(evaluated)
+            elif type(expected) is int:
+                self._test_integer_object(evaluated, expected)
+            elif type(expected) is list:
+                self._test_array_object(evaluated, expected)
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
+        self.assertIsInstance(self._test_eval("[1, 2 * 2]"), IntArray, "integer literal array is boxed")
+        self.assertIsInstance(self._test_eval("[1, 2] * [3, 4]"), IntArray, "element-wise result is boxed")
+        self.assertNotIsInstance(self._test_eval("[1, true]"), IntArray, "mixed array is unboxed")
+
+    def test_builtin_memo(self):
+        memo_tests = (
+            ('let f = memo(fn(x) { x * 2 }); [f(1), f(1), f(2)]', [2, 2, 4]),
+            ('let f = memo(fn(n) { if (n < 2) { n } else { f(n - 1) + f(n - 2) } }); f(20)', 6765),
+            ('let f = memo(fn(x) { x }); f(1); f(1); f(2); let s = memo_stats(f); [s["hits"], s["misses"]]',
+             [1, 2]),
+            ('let f = memo(fn(x) { x }, 2); f(1); f(2); f(3); f(1); let s = memo_stats(f); [s["evictions"], s["size"]]',
+             [2, 2]),
+            ('let f = memo(fn(x) { x }, 2); f(1); f(2); f(1); f(3); f(1); memo_stats(f)["hits"]', 2),
+            ('let f = memo(fn(a) { len(a) }); f([1]); f([1]); memo_stats(f)["misses"]', 0),
+            ('let f = memo(len); [f("ab"), f("ab"), memo_stats(f)["hits"]]', [2, 2, 1]),
+            ('let f = memo(fn(x) { x + true }); f(1)', Error("type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN")),
+            ('memo(1)', Error("not a function: ObjectType.INTEGER")),
+            ('memo(len, 0)', Error("cache size for 'memo' must be a positive ObjectType.INTEGER, got 0")),
+            ('memo_stats(len)', Error("argument to 'memo_stats' must be a memoized function, got ObjectType.BUILTIN")),
+        )
+
+        for (code, expected) in memo_tests:
+            evaluated = self._test_eval(code)
+
+            if type(expected) is int:
+                self._test_integer_object(evaluated, expected)
+            elif type(expected) is list:
+                self._test_array_object(evaluated, expected)
+            else:
+                self.assertIsInstance(evaluated, Error,
+                                      f"object is not Error. got={type(evaluated)}")
+                self.assertEqual(evaluated.message, expected.message,
+                                 f"wrong error message. got={evaluated.message}, expected={expected.message}")
+
     def test_array_literals(self):
         code = "[1, 2 * 2, 3 + 3]"
         evaluated = self._test_eval(code)
@@ -454,6 +879,8 @@ class TestEvaluator(unittest.TestCase):
             pair = evaluated.pairs[expected_key]
             if not pair:
                 self.fail("no pair for given key in pairs")
+            self.assertEqual(pair.key.hash_key(), expected_key,
+                             f"pair has wrong key. got={pair.key.inspect()}")
             self._test_integer_object(pair.value, expected_value)
 
     def test_hash_index_expressions(self):
@@ -495,6 +922,21 @@ class TestEvaluator(unittest.TestCase):
         self.assertEqual(evaluated.value, expected,
                          f"object has wrong value. got={evaluated.value}, want={expected}")
 
+    def _test_array_object(self, evaluated, expected):
+        self.assertIsInstance(evaluated, Array,
+                              f"object is not Array. got={type(evaluated)}")
+        self.assertEqual(len(evaluated.elements), len(expected),
+                         f"wrong num of elements. got={len(evaluated.elements)}, want={len(expected)}")
+
+        for element, expected_element in zip(evaluated.elements, expected):
+            if type(expected_element) is bool:
+                self._test_boolean_object(element, expected_element)
+            elif type(expected_element) is int:
+                self._test_integer_object(element, expected_element)
+            else:
+                self.assertEqual(element.value, expected_element,
+                                 f"wrong string value. got={element.value}, expected={expected_element}")
+
     def _test_null_object(self, evaluated):
         self.assertEqual(
             evaluated, NULL, f"object is not NULL. got={evaluated.value}")
@@ -0,0 +1,90 @@
+from monkey.hamt import EMPTY, PersistentMap
+import unittest
+
+
+class CollidingKey:
+    def __init__(self, value, key_hash):
+        self.value = value
+        self.key_hash = key_hash
+
+    def __hash__(self):
+        return self.key_hash
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and other.value == self.value
+
+
+class TestHamt(unittest.TestCase):
+
+    def test_set_and_get(self):
+        count = 5000
+        hash_map = EMPTY
+        for key in range(count):
+            hash_map = hash_map.set(key, key * 2)
+
+        self.assertEqual(len(hash_map), count, f"wrong length. got={len(hash_map)}, want={count}")
+        for key in range(count):
+            self.assertEqual(hash_map.get(key), key * 2, f"wrong value for {key}. got={hash_map.get(key)}")
+        self.assertIsNone(hash_map.get(count), "missing key has a value")
+        self.assertEqual(dict(hash_map.items()), {key: key * 2 for key in range(count)}, "items are wrong")
+
+    def test_persistence(self):
+        original = PersistentMap.from_dict({"a": 1, "b": 2})
+        updated = original.set("a", 3).set("c", 4)
+        deleted = original.delete("b")
+
+        self.assertEqual(dict(original.items()), {"a": 1, "b": 2}, "set or delete changed the original")
+        self.assertEqual(dict(updated.items()), {"a": 3, "b": 2, "c": 4}, "wrong items after set")
+        self.assertEqual(dict(deleted.items()), {"a": 1}, "wrong items after delete")
+        self.assertIs(original.delete("missing"), original, "deleting a missing key copied the map")
+
+    def test_delete(self):
+        hash_map = PersistentMap.from_dict({key: key for key in range(2000)})
+        for key in range(0, 2000, 2):
+            hash_map = hash_map.delete(key)
+
+        self.assertEqual(len(hash_map), 1000, f"wrong length. got={len(hash_map)}, want=1000")
+        self.assertEqual(sorted(hash_map), list(range(1, 2000, 2)), "wrong keys after delete")
+
+        for key in range(1, 2000, 2):
+            hash_map = hash_map.delete(key)
+        self.assertEqual(len(hash_map), 0, f"map is not empty. got={len(hash_map)}")
+        self.assertIsNone(hash_map.root, "empty map still has nodes")
+
+    def test_insertion_order(self):
+        words = ["pear", "apple", "fig", "banana", "kiwi", "cherry", "date"] + [f"key{index}" for index in range(100)]
+        hash_map = PersistentMap.from_dict({word: index for index, word in enumerate(words)})
+
+        self.assertEqual(list(hash_map), words, f"keys not in insertion order. got={list(hash_map)}")
+
+        hash_map = hash_map.set("fig", -1).delete("pear").set("pear", -2)
+        want = words[1:] + ["pear"]
+        self.assertEqual(list(hash_map), want, f"wrong order after set and delete. got={list(hash_map)}")
+        self.assertEqual(hash_map["fig"], -1, f"wrong value for fig. got={hash_map['fig']}")
+
+    def test_deletes_renumber_insertion_order(self):
+        hash_map = PersistentMap.from_dict({"first": 0, "second": 1})
+        for index in range(1000):
+            hash_map = hash_map.set(index, index).delete(index)
+
+        self.assertEqual(list(hash_map), ["first", "second"], f"wrong order. got={list(hash_map)}")
+        self.assertLess(hash_map.next_order, 100, f"counter not renumbered. got={hash_map.next_order}")
+
+    def test_hash_collisions(self):
+        keys = [CollidingKey(value, 42) for value in range(5)] + [CollidingKey(5, 42 + 32)]
+        hash_map = EMPTY
+        for key in keys:
+            hash_map = hash_map.set(key, key.value)
+
+        for key in keys:
+            self.assertEqual(hash_map[CollidingKey(key.value, key.key_hash)], key.value,
+                             f"wrong value for colliding key {key.value}")
+
+        hash_map = hash_map.delete(CollidingKey(2, 42))
+        self.assertNotIn(CollidingKey(2, 42), hash_map, "deleted colliding key is still present")
+        self.assertEqual(len(hash_map), 5, f"wrong length. got={len(hash_map)}, want=5")
+        self.assertEqual(hash_map[CollidingKey(3, 42)], 3, "delete removed the wrong colliding key")
+
+
+if __name__ == '__main__':
+    unittest.main()
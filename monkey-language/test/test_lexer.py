@@ -5,9 +5,12 @@ import unittest
 
 class TestLexer(unittest.TestCase):
 
+    def _new_lexer(self, code):
+        return Lexer(code)
+
     def test_basic_operators(self):
         code = '=+(){},;'
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.ASSIGN.name, "="),
@@ -39,7 +42,7 @@ class TestLexer(unittest.TestCase):
             };
             let result = add(five, ten);
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.LET.name, "let"),
@@ -92,7 +95,7 @@ class TestLexer(unittest.TestCase):
 
     def test_advanced_operators(self):
         code = "!-/*5;"
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.BANG.name, "!"),
@@ -121,7 +124,7 @@ class TestLexer(unittest.TestCase):
                 return false;
             }
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.IF.name, "if"),
@@ -159,7 +162,7 @@ class TestLexer(unittest.TestCase):
             10 == 10;
             10 != 9;
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.INT.name, "5"),
@@ -194,7 +197,7 @@ class TestLexer(unittest.TestCase):
             "foo bar"
             ""
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.STRING.name, "foobar"),
@@ -217,7 +220,7 @@ class TestLexer(unittest.TestCase):
             [1, 2];
             [];
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.LBRACKET.name, "["),
@@ -247,7 +250,7 @@ class TestLexer(unittest.TestCase):
             {true: 1};
             {1: "hello"};
         '''
-        lexer = Lexer(code)
+        lexer = self._new_lexer(code)
 
         expected_values = (
             (TokenType.LBRACE.name, "{"),
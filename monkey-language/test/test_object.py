@@ -16,3 +16,61 @@ class TestObject(unittest.TestCase):
                          "strings with same content have different hash keys")
         self.assertNotEqual(hello1.hash_key().value, diff1.hash_key().value,
                             "strings with different content have same hash keys")
+
+    def test_hash_key_cached(self):
+        hello = obj.String("Hello World")
+        self.assertIs(hello.hash_key(), hello.hash_key(), "string hash key computed twice")
+
+        one = obj.Integer(1)
+        self.assertIs(one.hash_key(), one.hash_key(), "integer hash key computed twice")
+
+    def test_hash_keys_tagged_with_type(self):
+        keys = [obj.Integer(1).hash_key(), obj.Boolean(True).hash_key(), obj.String("1").hash_key()]
+
+        for index, key in enumerate(keys):
+            for other in keys[index + 1:]:
+                self.assertNotEqual(key, other, f"{key.type} and {other.type} keys are equal")
+        self.assertEqual(len(set(keys)), 3, f"keys collide in a set. got={len(set(keys))}")
+
+    def test_small_integer_cache(self):
+        self.assertIs(obj.new_integer(5), obj.new_integer(5), "small integers are not shared")
+        self.assertIs(obj.new_integer(obj.SMALL_INTEGER_MIN), obj.SMALL_INTEGERS[0], "wrong cached integer")
+
+        large = obj.SMALL_INTEGER_MAX + 1
+        self.assertIsNot(obj.new_integer(large), obj.new_integer(large), "large integers are shared")
+        self.assertEqual(obj.new_integer(2.5).value, 2.5, "non-integer values are not kept")
+        self.assertIsInstance(obj.new_integer(2.0).value, float, "float values are taken from the cache")
+
+    def test_string_rope(self):
+        left = obj.String("a" * obj.ROPE_THRESHOLD)
+        rope = obj.String("")
+        for _ in range(1000):
+            rope = obj.concat_strings(rope, left)
+        rope = obj.concat_strings(rope, obj.String("b"))
+
+        self.assertIsNone(rope.flat, "long concatenation was flattened eagerly")
+        self.assertEqual(rope.length, 1000 * obj.ROPE_THRESHOLD + 1, f"wrong rope length. got={rope.length}")
+        self.assertEqual(rope.value, "a" * 1000 * obj.ROPE_THRESHOLD + "b", "rope flattened to wrong value")
+        self.assertIsNone(rope.left, "flattened rope keeps its children")
+        self.assertEqual(rope.hash_key(), obj.String(rope.value).hash_key(), "rope hashes differently")
+
+        short = obj.concat_strings(obj.String("a"), obj.String("b"))
+        self.assertEqual(short.flat, "ab", f"short concatenation became a rope. got={short.flat}")
+
+    def test_new_array(self):
+        integers = obj.new_array([obj.Integer(1), obj.Integer(-2)])
+        self.assertIsInstance(integers, obj.IntArray, f"integer array is boxed. got={type(integers)}")
+        self.assertEqual(list(integers.values), [1, -2], f"wrong values. got={list(integers.values)}")
+        self.assertEqual([element.value for element in integers.elements], [1, -2], "elements boxed wrongly")
+        self.assertEqual(integers.inspect(), "[1, -2]", f"wrong inspect. got={integers.inspect()}")
+
+        for elements in ([], [obj.Integer(1), obj.String("a")], [obj.Integer(2 ** 64)], [obj.Integer(0.5)]):
+            array = obj.new_array(elements)
+            self.assertIs(type(array), obj.Array, f"array of {len(elements)} elements is {type(array)}")
+
+    def test_slots(self):
+        samples = [obj.Integer(1), obj.Boolean(True), obj.String("a"), obj.ReturnValue(obj.Integer(1)),
+                   obj.Array([]), obj.Hash({}), obj.Error("error")]
+
+        for sample in samples:
+            self.assertFalse(hasattr(sample, "__dict__"), f"{type(sample).__name__} has a __dict__")
@@ -0,0 +1,103 @@
+from monkey.environment import Environment
+from monkey.evaluator import evaluate
+from monkey.lexer import Lexer
+from monkey.optimizer import optimize
+from monkey.parser import Parser
+import unittest
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_constant_folding(self):
+        tests = [
+            ("60 * 60 * 24", "86400", 4),
+            ("-5 + 10", "5", 3),
+            ("!true", "false", 1),
+            ("!!5", "true", 2),
+            ("1 < 2 == true", "true", 4),
+            ('"foo" + "bar"', "foobar", 2),
+            ("a + 2 * 3", "(a + 6)", 2),
+            ("[1 + 1, f(2 * 2)]", "[2, f(4)]", 4),
+        ]
+
+        for code, want, removed in tests:
+            program, got_removed = self._optimize(code)
+            self.assertEqual(str(program), want, f"wrong program. got={program}, want={want}")
+            self.assertEqual(got_removed, removed, f"wrong removed count for {code}. got={got_removed}, want={removed}")
+
+    def test_errors_not_folded(self):
+        tests = [
+            ("-true", "(-true)"),
+            ("5 + true", "(5 + true)"),
+            ('"a" - "b"', "(a - b)"),
+            ("1 / 0", "(1 / 0)"),
+            ("let f = fn() { 1 / 0 }; 5", "let f = fn (  ) (1 / 0);5"),
+        ]
+
+        for code, want in tests:
+            program, removed = self._optimize(code)
+            self.assertEqual(str(program), want, f"wrong program. got={program}, want={want}")
+            self.assertEqual(removed, 0, f"wrong removed count. got={removed}, want=0")
+
+    def test_dead_branch_elimination(self):
+        tests = [
+            ("let x = if (true) { 1 } else { 2 };", "let x = 1;"),
+            ("let x = if (1 > 2) { 1 } else { 2 };", "let x = 2;"),
+            ("let x = if (5) { 1 };", "let x = 1;"),
+            ("let x = if (false) { 1 };", "let x = if false ;"),
+            ("let x = if (true) { let y = 1; y } else { 2 };", "let x = if true let y = 1;y;"),
+            ("if (true) { let y = 1; y } else { 2 }", "let y = 1;y"),
+            ("let x = if (y) { 1 } else { 2 };", "let x = if y 1else 2 ;"),
+        ]
+
+        for code, want in tests:
+            program, _ = self._optimize(code)
+            self.assertEqual(str(program), want, f"wrong program. got={program}, want={want}")
+
+    def test_statements_after_return(self):
+        program, removed = self._optimize("fn() { return 1; 2; 3 + 4; }")
+
+        body = program.statements[0].expression.body
+        self.assertEqual(len(body.statements), 1, f"wrong number of statements. got={len(body.statements)}")
+        self.assertEqual(removed, 6, f"wrong removed count. got={removed}, want=6")
+
+    def test_hash_literals_counted_once(self):
+        program, removed = self._optimize('if (false) { {"a": 1} }')
+
+        self.assertEqual(str(program), "if false ", f"wrong program. got={program}")
+        self.assertEqual(removed, 4, f"wrong removed count. got={removed}, want=4")
+
+    def test_optimized_programs_evaluate_the_same(self):
+        tests = [
+            "let day = 60 * 60 * 24; day / 3600",
+            "let f = fn(x) { if (true) { return x * 2; } x }; f(21)",
+            "let f = fn(x) { if (1 == 2) { 0 } else { x + 1 } }; f(41)",
+            "let g = fn(n) { if (n == 0) { return 0; } if (true) { return g(n - 1); } 99 }; g(10)",
+            'let s = "hello" + " " + "world"; len(s)',
+            "if (false) { 1 }",
+            "[1 + 2, !false][0]",
+            "{1 + 1: 2}[2]",
+            "5; if (true) {}",
+            "5; if (true) { let y = 1; }",
+            "let x = if (true) { return 5; }; 7",
+        ]
+
+        for code in tests:
+            evaluated = evaluate(self._parse(code), Environment())
+            want = evaluated.inspect() if evaluated is not None else None
+            program, _ = self._optimize(code)
+            evaluated = evaluate(program, Environment())
+            got = evaluated.inspect() if evaluated is not None else None
+            self.assertEqual(got, want, f"wrong result for {code}. got={got}, want={want}")
+
+    def _optimize(self, code):
+        program = self._parse(code)
+        removed = optimize(program)
+        return program, removed
+
+    def _parse(self, code):
+        return Parser(Lexer(code)).parse_program()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,16 @@ from monkey.ast import (
     Statement, LetStatement, ReturnStatement, ExpressionStatement,
 )
 from monkey.lexer import Lexer
+from monkey.object import Boolean
 from monkey.parser import Parser
 import unittest
 
 
 class TestParser(unittest.TestCase):
 
+    def _new_parser(self, lexer):
+        return Parser(lexer)
+
     def test_parsing_let_statements(self):
         let_statements_tests = (
             ("let x = 5;", "x", 5),
@@ -20,7 +24,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected_identifier, expected_value) in let_statements_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -43,7 +47,7 @@ class TestParser(unittest.TestCase):
 
         for test in let_statements_tests:
             lexer = Lexer(test)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             parser.parse_program()
             with self.assertRaises(AssertionError):
@@ -58,7 +62,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected) in return_statements_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -77,7 +81,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_identifier_expression(self):
         code = "foobar;"
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -93,7 +97,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_integer_literal_expression(self):
         code = "5;"
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -114,7 +118,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected) in boolean_literal_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -130,7 +134,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_string_literal_expression(self):
         code = '"hello world";'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -146,7 +150,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_array_literal_expression(self):
         code = "[1, 2 * 2, 3 + 3]"
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -168,7 +172,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_hash_literal_string_keys(self):
         code = '{"one": 1, "two": 2, "three": 3}'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -194,10 +198,31 @@ class TestParser(unittest.TestCase):
                                   f"key is not an instance of StringLiteral. got={type(key)}")
             self._test_integer_literal(value, expected[str(key)])
 
+    def test_parsing_literal_objects(self):
+        code = '{"one": 1, 2: "two", true: 3, "fo" + "ur": 4}'
+        lexer = Lexer(code)
+        parser = self._new_parser(lexer)
+
+        program = parser.parse_program()
+        self._check_parser_errors(parser)
+
+        hash_expression = program.statements[0].expression
+        for key, value in hash_expression.pairs.items():
+            for literal in (key, value):
+                if type(literal) in (IntegerLiteral, StringLiteral):
+                    self.assertEqual(literal.object.value, literal.value,
+                                     f"literal.object has wrong value. got={literal.object.value}, want={literal.value}")
+
+        self.assertEqual(len(hash_expression.constant_keys), 3,
+                         f"hash.constant_keys does not contain 3 keys. got={len(hash_expression.constant_keys)}")
+        for key, hash_key in hash_expression.constant_keys.items():
+            want = Boolean(key.value).hash_key() if type(key) is BooleanLiteral else key.object.hash_key()
+            self.assertEqual(hash_key, want, f"wrong hash key for {key}")
+
     def test_parsing_hash_literal_integer_keys(self):
         code = '{1: 1, 2: 2, 3: 3}'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -226,7 +251,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_hash_literal_boolean_keys(self):
         code = '{true: 1, false: 2}'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -254,7 +279,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_empty_hash_literal(self):
         code = '{}'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -273,7 +298,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_hash_literals_with_expressions(self):
         code = '{"one": 0 + 1, "two": 10 - 8, "three": 15 / 5}'
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -305,7 +330,7 @@ class TestParser(unittest.TestCase):
         code = "fn(x, y) { x + y; }"
 
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -343,7 +368,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected) in function_parameters_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -365,7 +390,7 @@ class TestParser(unittest.TestCase):
         code = "add(1, 2 * 3, 4 + 5);"
 
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -400,7 +425,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected_operator, expected_value) in prefix_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -431,7 +456,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected_left_value, expected_operator, expected_right_value) in infix_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -449,7 +474,7 @@ class TestParser(unittest.TestCase):
         code = "if (x < y) { x }"
 
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -482,7 +507,7 @@ class TestParser(unittest.TestCase):
         code = "if (x < y) { x } else { y }"
 
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -548,7 +573,7 @@ class TestParser(unittest.TestCase):
 
         for (code, expected) in infix_tests:
             lexer = Lexer(code)
-            parser = Parser(lexer)
+            parser = self._new_parser(lexer)
 
             program = parser.parse_program()
             self._check_parser_errors(parser)
@@ -559,7 +584,7 @@ class TestParser(unittest.TestCase):
     def test_parsing_index_expressions(self):
         code = "myArray[1 + 1]"
         lexer = Lexer(code)
-        parser = Parser(lexer)
+        parser = self._new_parser(lexer)
 
         program = parser.parse_program()
         self._check_parser_errors(parser)
@@ -575,6 +600,28 @@ class TestParser(unittest.TestCase):
         self._test_identifier(expression.left, "myArray")
         self._test_infix_expression(expression.index, 1, "+", 1)
 
+    def test_iter_statements(self):
+        code = "let a = 5; a + 1; let b = fn(x) { a * x }; b(2);"
+        parser = self._new_parser(Lexer(code))
+        statements = parser.iter_statements()
+
+        first = next(statements)
+        self._test_let_statement(first, "a")
+        self.assertNotEqual(parser.current_token.token_type.name, "EOF",
+                            "parser read the whole program before yielding the first statement")
+
+        rest = [str(statement) for statement in statements]
+        want = ["(a + 1)", "let b = fn ( x ) (a * x);", "b(2)"]
+        self.assertEqual(rest, want, f"statements wrong. got={rest}, want={want}")
+        self._check_parser_errors(parser)
+
+    def test_iter_statements_stops_at_errors(self):
+        parser = self._new_parser(Lexer("let a = 5; let = 10; a;"))
+        statements = list(parser.iter_statements())
+
+        self.assertEqual(len(statements), 1, f"statements wrong. got={len(statements)}, want=1")
+        self.assertEqual(len(parser.errors), 1, f"errors wrong. got={parser.errors}")
+
     def _test_let_statement(self, statement: Statement, name: str) -> None:
         self.assertEqual(statement.token_literal(),
                          'let', f"statement.token_literal not 'let'. got={statement.token_literal()}")
@@ -0,0 +1,102 @@
+import sys
+
+from monkey import compile_to_closure
+from monkey.compiler import Compiler
+from monkey.environment import Environment
+from monkey.evaluator import evaluate
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.purity import memoize, pure_functions
+import monkey.stack_evaluator as stack_evaluator
+from monkey.vm import VM
+import unittest
+
+
+class TestPurity(unittest.TestCase):
+
+    def test_pure_functions(self):
+        tests = [
+            ("let f = fn(x) { x * 2 };", ["f"]),
+            ("let f = fn(x) { let y = len(x); [y, first(x)] };", ["f"]),
+            ("let f = fn(n) { if (n < 2) { n } else { f(n - 1) + f(n - 2) } };", ["f"]),
+            ("let f = fn(x) { g(x) }; let g = fn(x) { x + 1 };", ["f", "g"]),
+            ("let even = fn(n) { if (n == 0) { true } else { odd(n - 1) } };"
+             "let odd = fn(n) { if (n == 0) { false } else { even(n - 1) } };", ["even", "odd"]),
+            ("let f = fn(x) { puts(x); x };", []),
+            ("let f = fn(x) { g(x) }; let g = fn(x) { puts(x) };", []),
+            ("let f = fn(x) { x(1) };", []),
+            ("let f = fn(x) { let g = len; g(x) };", []),
+            ("let f = fn(x) { map(x, fn(y) { y }) };", []),
+            ("let n = 1; let f = fn(x) { x + n };", []),
+            ("let f = fn(x) { x }; let f = fn(x) { puts(x) };", []),
+            ("let len = fn(x) { puts(x) }; let f = fn(x) { len(x) };", []),
+            ("let f = fn(x) { fn() { x } };", []),
+            ("let f = 5;", []),
+        ]
+
+        for code, want in tests:
+            program = Parser(Lexer(code)).parse_program()
+            got = pure_functions(program)
+            self.assertEqual(got, want, f"wrong pure functions for {code}. got={got}, want={want}")
+
+    def test_memoize(self):
+        code = '''
+            let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };
+            let show = fn(x) { puts(x) };
+            [fib(30), memo_stats(fib)["misses"], memo_stats(fib)["hits"]];
+        '''
+        runs = [
+            lambda program: evaluate(program, Environment()),
+            lambda program: compile_to_closure(program)(Environment()),
+        ]
+
+        for run in runs:
+            program = Parser(Lexer(code)).parse_program()
+            names = memoize(program)
+            self.assertEqual(names, ["fib"], f"wrong memoized functions. got={names}")
+
+            evaluated = run(program)
+            values = [element.value for element in evaluated.elements]
+            self.assertEqual(values, [832040, 31, 28], f"wrong result. got={values}")
+
+    def test_memoize_skips_tail_recursion(self):
+        depth = sys.getrecursionlimit() * 20
+        code = f'''
+            let sum = fn(n, acc) {{
+                if (n == 0) {{
+                    return acc;
+                }}
+                return sum(n - 1, acc + n);
+            }};
+            sum({depth}, 0);
+        '''
+
+        def run_vm(program):
+            compiler = Compiler()
+            compiler.compile(program)
+            return VM(compiler.bytecode()).run()
+
+        runs = [
+            lambda program: evaluate(program, Environment()),
+            lambda program: compile_to_closure(program)(Environment()),
+            lambda program: stack_evaluator.evaluate(program, Environment()),
+            run_vm,
+        ]
+
+        for run in runs:
+            program = Parser(Lexer(code)).parse_program()
+            self.assertEqual(pure_functions(program), ["sum"], "sum is not pure")
+            self.assertEqual(memoize(program), [], "memoized a tail-recursive function")
+
+            evaluated = run(program)
+            self.assertEqual(evaluated.value, depth * (depth + 1) // 2,
+                             f"wrong result. got={evaluated.inspect()}, want={depth * (depth + 1) // 2}")
+
+    def test_memoize_skips_shadowed_memo(self):
+        program = Parser(Lexer("let memo = 1; let f = fn(x) { x };")).parse_program()
+        self.assertEqual(memoize(program), [], "memoized although memo is not the builtin")
+        self.assertEqual(str(program), "let memo = 1;let f = fn ( x ) x;", f"program changed. got={program}")
+
+
+if __name__ == '__main__':
+    unittest.main()
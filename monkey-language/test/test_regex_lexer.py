@@ -0,0 +1,36 @@
+from monkey.lexer import Lexer
+from monkey.regex_lexer import RegexLexer
+from monkey.token import TokenType
+import test.test_lexer as test_lexer
+
+
+class TestRegexLexer(test_lexer.TestLexer):
+    """Runs the whole lexer suite through the regex lexer."""
+
+    def _new_lexer(self, code):
+        return RegexLexer(code)
+
+    def test_same_tokens_as_lexer(self):
+        code = '''
+            let _add = fn(x, y) { x + y; };
+            let résumé = ["a b", 10 != 9, {"k": -5 / 2 * 3}];
+            if (5 < 10 >= 2) { return true == !false; } else { @ }
+        '''
+        lexer, regex_lexer = Lexer(code), RegexLexer(code)
+        while True:
+            want, got = lexer.next_token(), regex_lexer.next_token()
+            self.assertEqual((want.token_type, want.literal), (got.token_type, got.literal),
+                             f"token wrong. got={got.token_type.name} {got.literal!r}, "
+                             f"want={want.token_type.name} {want.literal!r}")
+            if want.token_type == TokenType.EOF:
+                break
+
+    def test_unterminated_string(self):
+        lexer = self._new_lexer('let s = "abc')
+        tokens = [lexer.next_token() for _ in range(6)]
+
+        self.assertEqual([token.token_type for token in tokens],
+                         [TokenType.LET, TokenType.IDENT, TokenType.ASSIGN, TokenType.STRING,
+                          TokenType.EOF, TokenType.EOF],
+                         f"token types wrong. got={[token.token_type.name for token in tokens]}")
+        self.assertEqual(tokens[3].literal, "abc", f"string literal wrong. got={tokens[3].literal}, want=abc")
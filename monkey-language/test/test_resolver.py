@@ -0,0 +1,125 @@
+from monkey.ast import ExpressionStatement, Identifier, Program
+from monkey.builtins import BUILTINS
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.resolver import GLOBAL, BUILTIN, resolve
+from monkey.token import Token, TokenType
+import unittest
+
+
+class TestResolver(unittest.TestCase):
+
+    def test_local_addresses(self):
+        code = "fn(a, b) { let c = a; fn(d) { a + c + d } }"
+        program = self._parse(code)
+
+        outer = program.statements[0].expression
+        self.assertEqual(outer.num_slots, 3, f"wrong number of slots. got={outer.num_slots}")
+
+        let_statement = outer.body.statements[0]
+        self._test_address(let_statement.name, 0, 2)
+        self._test_address(let_statement.value, 0, 0)
+
+        inner = outer.body.statements[1].expression
+        self.assertEqual(inner.num_slots, 1, f"wrong number of slots. got={inner.num_slots}")
+
+        infix = inner.body.statements[0].expression
+        self._test_address(infix.left.left, 1, 0)   # a
+        self._test_address(infix.left.right, 1, 2)  # c
+        self._test_address(infix.right, 0, 0)       # d
+
+    def test_global_and_builtin_addresses(self):
+        program = self._parse("let x = 1; fn() { x + len(y) }")
+
+        self._test_address(program.statements[0].name, GLOBAL, program.resolver.global_slots["x"])
+
+        call = program.statements[1].expression.body.statements[0].expression.right
+        self._test_address(call.function, BUILTIN, list(BUILTINS).index("len"))
+        self._test_address(call.arguments[0], GLOBAL, program.resolver.global_slots["y"])
+
+    def test_let_value_resolved_before_binding(self):
+        program = self._parse("let x = 1; fn() { let x = x; }")
+
+        let_statement = program.statements[1].expression.body.statements[0]
+        self._test_address(let_statement.value, GLOBAL, program.resolver.global_slots["x"])
+        self._test_address(let_statement.name, 0, 0)
+
+    def test_function_lets_bound_before_values(self):
+        program = self._parse("fn() { let f = fn() { g() }; let g = fn() { f() }; }")
+
+        body = program.statements[0].expression.body
+        f_body = body.statements[0].value.body
+        self._test_address(f_body.statements[0].expression.function, 1, 1)  # g
+
+    def test_tail_calls(self):
+        code = '''
+            fn(n) {
+                if (n == 0) { return f(n); }
+                g(n);
+                let x = h(n);
+                if (n == 1) { i(n) } else { j(n) + k(n) }
+            }
+        '''
+        program = self._parse(code)
+        body = program.statements[0].expression.body
+
+        first_if, g_statement, let_statement, last_if = body.statements
+        self.assertTrue(first_if.expression.consequence.statements[0].return_value.tail, "return f(n) is a tail call")
+        self.assertFalse(g_statement.expression.tail, "g(n) is not a tail call")
+        self.assertFalse(let_statement.value.tail, "h(n) is not a tail call")
+        self.assertTrue(last_if.expression.consequence.statements[0].expression.tail, "i(n) is a tail call")
+
+        infix = last_if.expression.alternative.statements[0].expression
+        self.assertFalse(infix.left.tail or infix.right.tail, "operands of + are not tail calls")
+
+    def test_rebinding_reuses_slot(self):
+        program = self._parse("fn() { let a = 1; let a = 2; }")
+
+        function = program.statements[0].expression
+        self.assertEqual(function.num_slots, 1, f"wrong number of slots. got={function.num_slots}")
+
+    def test_unbound_lets_fall_back_to_enclosing_binding(self):
+        program = self._parse("let x = 1; let f = fn(c) { if (c) { let x = 2; } x };")
+
+        body = program.statements[1].value.body
+        identifier = body.statements[1].expression
+        self._test_address(identifier, 0, 1)
+        self._test_address(identifier.fallback, GLOBAL, program.resolver.global_slots["x"])
+
+        program = self._parse("let f = fn() { 1 }; let g = fn() { let a = f(); let f = fn() { 2 }; a + f() };")
+
+        body = program.statements[1].value.body
+        call = body.statements[0].value
+        self._test_address(call.function, 0, 0)
+        self._test_address(call.function.fallback, GLOBAL, program.resolver.global_slots["f"])
+
+    def test_parameters_have_no_fallback(self):
+        program = self._parse("let x = 1; fn(x) { fn() { x } }")
+
+        inner = program.statements[1].expression.body.statements[0].expression
+        identifier = inner.body.statements[0].expression
+        self._test_address(identifier, 1, 0)
+        self.assertIsNone(identifier.fallback, f"parameter has a fallback. got={identifier.fallback}")
+
+    def test_resolve_built_program(self):
+        program = Program()
+        statement = ExpressionStatement(Token(TokenType.IDENT, "first"))
+        statement.expression = Identifier(Token(TokenType.IDENT, "first"), "first")
+        program.statements.append(statement)
+
+        self.assertIsNone(program.resolver)
+        resolve(program)
+        self.assertIsNotNone(program.resolver)
+        self._test_address(statement.expression, BUILTIN, list(BUILTINS).index("first"))
+
+    def _parse(self, code):
+        parser = Parser(Lexer(code))
+        program = parser.parse_program()
+        self.assertEqual(parser.errors, [], f"parser has errors: {parser.errors}")
+        return program
+
+    def _test_address(self, identifier, depth, slot):
+        self.assertIsInstance(identifier, Identifier, f"node is not Identifier. got={type(identifier)}")
+        self.assertEqual((identifier.depth, identifier.slot), (depth, slot),
+                         f"wrong address for {identifier.value}. got={(identifier.depth, identifier.slot)}, "
+                         f"want={(depth, slot)}")
@@ -0,0 +1,43 @@
+import sys
+
+from monkey.environment import Environment
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.stack_evaluator import evaluate
+import test.test_evaluator as test_evaluator
+
+
+class TestStackEvaluator(test_evaluator.TestEvaluator):
+    """Runs the whole evaluator suite through the explicit-stack evaluator."""
+
+    def test_deep_non_tail_recursion(self):
+        depth = sys.getrecursionlimit() * 20
+        code = f"let sum = fn(n) {{ if (n == 0) {{ 0 }} else {{ n + sum(n - 1) }} }}; sum({depth});"
+
+        self._test_integer_object(self._test_eval(code), depth * (depth + 1) // 2)
+
+    def test_return_unwinds_to_function(self):
+        code = '''
+            let f = fn(n) {
+                let g = fn() { if (true) { return 1; } 2; };
+                if (n > 0) { return g() + 10; }
+                3;
+            };
+            [f(1), f(0)];
+        '''
+        evaluated = self._test_eval(code)
+        self._test_integer_object(evaluated.elements[0], 11)
+        self._test_integer_object(evaluated.elements[1], 3)
+
+    def test_error_aborts_nested_calls(self):
+        code = "let f = fn(n) { if (n == 0) { 1 + true } else { 1 + f(n - 1) } }; f(100); 5;"
+        evaluated = self._test_eval(code)
+        self.assertEqual(evaluated.message, "type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN")
+
+    def _test_eval(self, code):
+        lexer = Lexer(code)
+        parser = Parser(lexer)
+        program = parser.parse_program()
+        env = Environment()
+
+        return evaluate(program, env)
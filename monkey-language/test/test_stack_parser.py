@@ -0,0 +1,57 @@
+import sys
+
+from monkey.environment import Environment
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.stack_evaluator import evaluate
+from monkey.stack_parser import StackParser
+import test.test_parser as test_parser
+
+
+class TestStackParser(test_parser.TestParser):
+    """Runs the whole parser suite through the explicit-stack parser."""
+
+    def _new_parser(self, lexer):
+        return StackParser(lexer)
+
+    def test_same_program_as_parser(self):
+        inputs = (
+            "let add = fn(a, b) { return a + b * -c; }; add(1, 2)[0] + [1, [2, 3], {\"k\": !true}][1][0];",
+            "if ((a + b) * c < d == !e) { f(g(h(1)), [], x[y[z]]) } else { -(-(-1)) }",
+            "a + b + c - d * e / f; (((1))); len(\"abc\") != 3; f()(1)(2, 3);",
+        )
+
+        for code in inputs:
+            parser, stack_parser = Parser(Lexer(code)), StackParser(Lexer(code))
+            want, got = parser.parse_program(), stack_parser.parse_program()
+
+            self._check_parser_errors(stack_parser)
+            self.assertEqual(str(got), str(want), f"program wrong for {code}. got={got}, want={want}")
+
+    def test_same_errors_as_parser(self):
+        inputs = ("(1 + 2;", "[1, 2;", "f(1, 2;", "x[1;", ") + 1;", "1 + ;", "[1, , 2];", "let = 5; -;")
+
+        for code in inputs:
+            parser, stack_parser = Parser(Lexer(code)), StackParser(Lexer(code))
+            parser.parse_program()
+            stack_parser.parse_program()
+
+            self.assertEqual(stack_parser.errors, parser.errors,
+                             f"errors wrong for {code}. got={stack_parser.errors}, want={parser.errors}")
+
+    def test_deep_nesting(self):
+        depth = sys.getrecursionlimit() * 20
+        nesting_tests = (
+            ("(" * depth + "1" + ")" * depth, 1),
+            ("(1 + " * depth + "1" + ")" * depth, depth + 1),
+            ("-" * (depth - depth % 2) + "5", 5),
+            ("[" * depth + "7" + "]" * depth + "[0]" * depth, 7),
+        )
+
+        for (code, expected) in nesting_tests:
+            parser = StackParser(Lexer(code))
+            program = parser.parse_program()
+            self._check_parser_errors(parser)
+
+            evaluated = evaluate(program, Environment())
+            self.assertEqual(evaluated.value, expected, f"wrong value. got={evaluated.value}, want={expected}")
@@ -0,0 +1,44 @@
+import io
+import mmap
+import tempfile
+
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.stream_lexer import StreamLexer, read_tokens
+from monkey.token import TokenType
+import test.test_lexer as test_lexer
+
+
+class TestStreamLexer(test_lexer.TestLexer):
+    """Runs the whole lexer suite through the stream lexer, three characters at a time."""
+
+    def _new_lexer(self, code):
+        return StreamLexer(io.StringIO(code), chunk_size=3)
+
+    def test_tokens_across_chunk_boundaries(self):
+        code = 'let résumé = "a string longer than a chunk"; 12345 == foo_bar != 6;\n'
+        lexer = Lexer(code)
+        want = [lexer.next_token()]
+        while want[-1].token_type != TokenType.EOF:
+            want.append(lexer.next_token())
+        want = [(token.token_type, token.literal) for token in want]
+
+        for chunk_size in range(1, 12):
+            for stream in (io.StringIO(code), io.BytesIO(code.encode())):
+                got = [(token.token_type, token.literal) for token in read_tokens(stream, chunk_size)]
+                self.assertEqual(got, want, f"tokens wrong for chunk_size={chunk_size}, {type(stream).__name__}. "
+                                            f"got={got}, want={want}")
+
+    def test_parse_memory_mapped_file(self):
+        code = 'let add = fn(x, y) { x + y; }; add("ab", "cd"); [1, 2][0];'
+
+        with tempfile.TemporaryFile() as file:
+            file.write(code.encode())
+            file.flush()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                parser = Parser(StreamLexer(source, chunk_size=4))
+                program = parser.parse_program()
+
+        want = Parser(Lexer(code)).parse_program()
+        self.assertEqual(parser.errors, [], f"parser errors. got={parser.errors}")
+        self.assertEqual(str(program), str(want), f"program wrong. got={program}, want={want}")
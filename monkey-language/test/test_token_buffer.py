@@ -0,0 +1,47 @@
+import sys
+
+from monkey.lexer import Lexer
+from monkey.parser import Parser
+from monkey.token import TokenType
+from monkey.token_buffer import tokenize
+import test.test_lexer as test_lexer
+
+
+class TestTokenBuffer(test_lexer.TestLexer):
+    """Runs the whole lexer suite through a token buffer."""
+
+    def _new_lexer(self, code):
+        return tokenize(code)
+
+    def test_packed_tokens(self):
+        code = 'let name = "a b"; name + 10;\n'
+        buffer = tokenize(code)
+
+        self.assertEqual(len(buffer), 10, f"token count wrong. got={len(buffer)}, want=10")
+        self.assertEqual(buffer.nbytes(), 100, f"buffer size wrong. got={buffer.nbytes()}, want=100")
+        self.assertEqual(buffer.token_type(3), TokenType.STRING,
+                         f"token type wrong. got={buffer.token_type(3)}, want={TokenType.STRING}")
+        self.assertEqual(buffer.literal(3), "a b", f"literal wrong. got={buffer.literal(3)!r}, want='a b'")
+
+        first, second = buffer.literal(1), buffer.literal(5)
+        self.assertIs(first, second, "identifier literals are not interned")
+        self.assertIs(first, sys.intern("name"), "identifier literals are not interned")
+
+        # Past the end the buffer keeps returning EOF
+        tokens = [buffer.next_token() for _ in range(12)]
+        self.assertEqual([token.token_type for token in tokens[9:]], [TokenType.EOF] * 3,
+                         f"tokens past the end wrong. got={[token.token_type.name for token in tokens[9:]]}")
+
+    def test_parser_consumes_buffer(self):
+        code = '''
+            let add = fn(x, y) { x + y; };
+            let values = [1, 2 * 3, add(4, 5)];
+            if (values[0] < 2) { {"one": 1, true: !false} } else { -values[1] };
+            return "done";
+        '''
+        want = Parser(Lexer(code)).parse_program()
+        parser = Parser(tokenize(code))
+        got = parser.parse_program()
+
+        self.assertEqual(parser.errors, [], f"parser errors. got={parser.errors}")
+        self.assertEqual(str(got), str(want), f"program wrong. got={got}, want={want}")
@@ -0,0 +1,93 @@
+from monkey.vector import EMPTY, WIDTH, PersistentVector
+import unittest
+
+
+class TestVector(unittest.TestCase):
+
+    def test_push_and_index(self):
+        # Enough elements for a three-level trie
+        count = WIDTH * WIDTH * 2 + 5
+        vector = EMPTY
+        for value in range(count):
+            vector = vector.push(value)
+
+        self.assertEqual(len(vector), count, f"wrong length. got={len(vector)}, want={count}")
+        for index in range(0, count, 97):
+            self.assertEqual(vector[index], index, f"wrong element. got={vector[index]}, want={index}")
+        self.assertEqual(vector[-1], count - 1, f"wrong last element. got={vector[-1]}")
+        self.assertEqual(list(vector), list(range(count)), "iteration yields wrong elements")
+
+    def test_persistence(self):
+        original = PersistentVector.from_list(list(range(WIDTH)))
+        pushed = original.push(WIDTH)
+
+        self.assertEqual(len(original), WIDTH, f"push changed the original. got={len(original)}")
+        self.assertEqual(list(pushed), list(range(WIDTH + 1)), "wrong elements after push")
+
+        branched = original.push(-1)
+        self.assertEqual(pushed[WIDTH], WIDTH, f"push changed a sibling vector. got={pushed[WIDTH]}")
+        self.assertEqual(branched[WIDTH], -1, f"wrong element. got={branched[WIDTH]}")
+
+    def test_push_extends_owned_tail_in_place(self):
+        first = EMPTY.push(1)
+        second = first.push(2)
+        third = second.push(3)
+        self.assertIs(third.tail, first.tail, "push onto the newest vector copied its tail")
+
+        # `second` no longer ends where the shared tail ends, so this copies
+        branched = second.push(-3)
+        self.assertIsNot(branched.tail, third.tail, "push onto an older vector reused the shared tail")
+        self.assertEqual(list(branched), [1, 2, -3], f"wrong elements after branching. got={list(branched)}")
+        self.assertEqual(list(third), [1, 2, 3], f"branching changed a newer vector. got={list(third)}")
+        self.assertEqual(list(first), [1], f"push changed an older vector. got={list(first)}")
+        self.assertEqual(len(second), 2, f"push changed an older vector. got={len(second)}")
+
+    def test_from_list_matches_push(self):
+        for count in (0, 1, WIDTH, WIDTH + 1, WIDTH * WIDTH, WIDTH * WIDTH + WIDTH + 1):
+            elements = list(range(count))
+            pushed = EMPTY
+            for element in elements:
+                pushed = pushed.push(element)
+            built = PersistentVector.from_list(elements)
+
+            self.assertEqual((built.shift, built.root, built.tail), (pushed.shift, pushed.root, pushed.tail),
+                             f"from_list builds a different trie for {count} elements")
+
+    def test_rest(self):
+        vector = PersistentVector.from_list(list(range(100)))
+
+        self.assertEqual(list(vector.rest()), list(range(1, 100)), "wrong elements after rest")
+        self.assertEqual(len(vector), 100, f"rest changed the original. got={len(vector)}")
+
+    def test_rest_views(self):
+        count = WIDTH * 3 + 7
+        vector = PersistentVector.from_list(list(range(count)))
+
+        view = vector
+        for dropped in range(1, count + 1):
+            view = view.rest()
+            self.assertIs(view.root, vector.root, "rest copied the trie")
+            self.assertEqual(len(view), count - dropped, f"wrong length. got={len(view)}, want={count - dropped}")
+            if len(view) > 0:
+                self.assertEqual((view[0], view[-1]), (dropped, count - 1), f"wrong first or last element. got={view[0]}, {view[-1]}")
+            self.assertEqual(list(view), list(range(dropped, count)), "iteration yields wrong elements")
+
+        self.assertEqual(len(view.rest()), 0, f"rest of an empty view is not empty. got={len(view.rest())}")
+
+    def test_push_onto_view(self):
+        view = PersistentVector.from_list(list(range(WIDTH * 2))).rest().rest()
+        pushed = view.push(-1)
+
+        self.assertEqual(list(pushed), list(range(2, WIDTH * 2)) + [-1], "wrong elements after push")
+        self.assertEqual(pushed[len(pushed) - 1], -1, f"wrong last element. got={pushed[len(pushed) - 1]}")
+
+    def test_index_out_of_range(self):
+        vector = PersistentVector.from_list([1, 2, 3])
+
+        for index in (3, -4):
+            with self.assertRaises(IndexError):
+                vector[index]
+
+
+if __name__ == '__main__':
+    unittest.main()
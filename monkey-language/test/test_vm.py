@@ -0,0 +1,277 @@
+from monkey.builtins import BUILTINS
+from monkey.compiler import Compiler
+from monkey.evaluator import NULL
+from monkey.lexer import Lexer
+from monkey.object import Integer, Boolean, String, Array, Hash, Error
+from monkey.parser import Parser
+from monkey.vm import VM
+import test.test_evaluator as test_evaluator
+import unittest
+
+
+class TestVM(unittest.TestCase):
+
+    def test_integer_arithmetic(self):
+        vm_tests = (
+            ("5", 5),
+            ("-10", -10),
+            ("5 + 5 + 5 + 5 - 10", 10),
+            ("2 * 2 * 2 * 2 * 2", 32),
+            ("5 * 2 + 10", 20),
+            ("20 + 2 * -10", 0),
+            ("50 / 2 * 2 + 10", 60),
+            ("(5 + 10 * 2 + 15 / 3) * 2 + -10", 50),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_boolean_expressions(self):
+        vm_tests = (
+            ("true", True),
+            ("1 < 2", True),
+            ("1 > 2", False),
+            ("1 == 1", True),
+            ("1 != 2", True),
+            ("true == false", False),
+            ("(1 < 2) == true", True),
+            ("!true", False),
+            ("!5", False),
+            ("!!5", True),
+            ("!(if (false) { 5; })", True),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_conditionals(self):
+        vm_tests = (
+            ("if (true) { 10 }", 10),
+            ("if (false) { 10 }", None),
+            ("if (1) { 10 }", 10),
+            ("if (1 > 2) { 10 } else { 20 }", 20),
+            ("if (1 < 2) { 10 } else { 20 }", 10),
+            ("if ((if (false) { 10 })) { 10 } else { 20 }", 20),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_return_and_let_statements(self):
+        vm_tests = (
+            ("return 10; 9;", 10),
+            ("9; return 2 * 5; 9;", 10),
+            ("if (10 > 1) { if (10 > 1) { return 10; } return 1; }", 10),
+            ("let a = 5; let b = a; let c = a + b + 5; c;", 15),
+            ("let a = 1; let a = a + 1; a", 2),
+            ("let x = if (true) { return 5; }; 7", 5),
+            ("let f = fn() { let x = if (true) { return 5; }; 7 }; f() + 1", 6),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_strings_arrays_and_hashes(self):
+        vm_tests = (
+            ('"mon" + "key" + "banana"', "monkeybanana"),
+            ("[1, 2 * 2, 3 + 3]", [1, 4, 6]),
+            ("[1, 2, 3][1 + 1]", 3),
+            ("[1, 2, 3][3]", None),
+            ('{"foo": 5}["foo"]', 5),
+            ('{"foo": 5}["bar"]', None),
+            ('{true: 5}[true]', 5),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+        evaluated = self._run_vm('{1: 2, 2: 3}')
+        self.assertIsInstance(evaluated, Hash, f"object is not Hash. got={type(evaluated)}")
+        self.assertEqual(len(evaluated.pairs), 2)
+
+    def test_calling_functions(self):
+        vm_tests = (
+            ("let fivePlusTen = fn() { 5 + 10; }; fivePlusTen();", 15),
+            ("let earlyExit = fn() { return 99; 100; }; earlyExit();", 99),
+            ("let noReturn = fn() { }; noReturn();", None),
+            ("let sum = fn(a, b) { let c = a + b; c; }; sum(1, 2) + sum(3, 4);", 10),
+            ("let add = fn(x, y) { x + y; }; add(5 + 5, add(5, 5));", 20),
+            ("fn(x) { x; }(5)", 5),
+            ('len("four")', 4),
+            ("first([1, 2, 3])", 1),
+            ("len([1, 2, 3])", 3),
+            ("let f = fn(a) { let b = 2; a + b }; f(1, 5);", 3),
+            ("let f = fn(a) { a }; map([1, 2], fn(x) { f(x, x) });", [1, 2]),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_shadowing_builtins(self):
+        vm_tests = (
+            ("let f = fn(x) { max(x) }; let max = fn(x) { x * 10 }; f(2);", 20),
+            ('let a = len("ab"); let len = fn(x) { 99 }; a + len(1);', 101),
+            ("if (true) { let first = fn(x) { 7 }; } first([1]);", 7),
+            ("let g = fn() { rest }; g()([1, 2]);", [2]),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_closures(self):
+        vm_tests = (
+            ("let newAdder = fn(x) { fn(y) { x + y }; }; let addTwo = newAdder(2); addTwo(2);", 4),
+            (
+                '''
+                let newAdderOuter = fn(a, b) {
+                    let c = a + b;
+                    fn(d) {
+                        let e = d + c;
+                        fn(f) { e + f; };
+                    };
+                };
+                let newAdderInner = newAdderOuter(1, 2);
+                let adder = newAdderInner(3);
+                adder(8);
+                ''',
+                14
+            ),
+            (
+                '''
+                let wrapper = fn() {
+                    let countDown = fn(x) {
+                        if (x == 0) { return 0; } else { countDown(x - 1); }
+                    };
+                    countDown(1);
+                };
+                wrapper();
+                ''',
+                0
+            ),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+    def test_recursive_fibonacci(self):
+        code = '''
+            let fibonacci = fn(x) {
+                if (x < 2) { x } else { fibonacci(x - 1) + fibonacci(x - 2) }
+            };
+            fibonacci(15);
+        '''
+        self._test_expected_object(self._run_vm(code), 610)
+
+    def test_higher_order_builtins(self):
+        vm_tests = (
+            ("map([1, 2, 3], fn(x) { x * 2 })", [2, 4, 6]),
+            ("let n = 1; collect(filter(range(5), fn(x) { x > n }))", [2, 3, 4]),
+            ("len(map(range(4), fn(x) { x }))", 4),
+            ("reduce(range(5), fn(acc, x) { acc + x }, 0)", 10),
+            ("sort([2, 3, 1], fn(a, b) { a > b })", [3, 2, 1]),
+            ("map([1, 2], fn(x) { map([x], fn(y) { y + x }) })", [[2], [4]]),
+            ("let f = fn(x) { if (x > 1) { return x; } }; map([1, 2], f)", [None, 2]),
+            ("let r = map([1], fn(x) { x }); 5", 5),
+            ("[1, 2] * [3, 4] + [1, 1]", [4, 9]),
+            ("dot([1, 2], ints(range(1, 3)))", 5),
+            ("let f = memo(fn(n) { if (n < 2) { n } else { f(n - 1) + f(n - 2) } }); [f(30), memo_stats(f)[\"hits\"]]",
+             [832040, 28]),
+        )
+
+        self._run_vm_tests(vm_tests)
+
+        for (code, expected) in (
+            ("map([1], fn(x, y) { x })", "wrong number of arguments: want=2, got=1"),
+            ("map([true], fn(x) { -x })", "unknown operator: -ObjectType.BOOLEAN"),
+        ):
+            evaluated = self._run_vm(code)
+            self.assertIsInstance(evaluated, Error, f"no error object returned. got={type(evaluated)}")
+            self.assertEqual(evaluated.message, expected,
+                             f"wrong error message. got={evaluated.message}, expected={expected}")
+
+    def test_closures_called_after_run(self):
+        double = self._run_vm("let k = 2; fn(x) { x * k }")
+        self._run_vm("1")
+
+        evaluated = BUILTINS["map"].function([self._run_vm("[1, 2]"), double])
+        self._test_expected_object(evaluated, [2, 4])
+
+    def test_error_handling(self):
+        error_handling_tests = (
+            ("5 + true;", "type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN"),
+            ("5 + true; 5;", "type mismatch: ObjectType.INTEGER + ObjectType.BOOLEAN"),
+            ("-true", "unknown operator: -ObjectType.BOOLEAN"),
+            ("5; true + false; 5", "unknown operator: ObjectType.BOOLEAN + ObjectType.BOOLEAN"),
+            ("if (10 > 1) { true + false; }", "unknown operator: ObjectType.BOOLEAN + ObjectType.BOOLEAN"),
+            ("foobar", "identifier not found: foobar"),
+            ('"Hello" - "World"', "unknown operator: ObjectType.STRING - ObjectType.STRING"),
+            ('{"name": "Monkey"}[fn(x) { x }];', "unusable as hash key: ObjectType.FUNCTION"),
+            ('len(1)', "argument to 'len' not supported, got=ObjectType.INTEGER"),
+            ("1(2)", "not a function: ObjectType.INTEGER"),
+            ("fn(a) { a }()", "wrong number of arguments: want=1, got=0"),
+        )
+
+        for (code, expected) in error_handling_tests:
+            evaluated = self._run_vm(code)
+            self.assertIsInstance(evaluated, Error,
+                                  f"no error object returned. got={type(evaluated)}")
+            self.assertEqual(evaluated.message, expected,
+                             f"wrong error message. got={evaluated.message}, expected={expected}")
+
+    def _run_vm(self, code):
+        program = Parser(Lexer(code)).parse_program()
+        compiler = Compiler()
+        compiler.compile(program)
+
+        return VM(compiler.bytecode()).run()
+
+    def _run_vm_tests(self, vm_tests):
+        for (code, expected) in vm_tests:
+            self._test_expected_object(self._run_vm(code), expected)
+
+    def _test_expected_object(self, evaluated, expected):
+        if expected is None:
+            self.assertIs(evaluated, NULL, f"object is not NULL. got={evaluated}")
+        elif type(expected) is bool:
+            self.assertIsInstance(evaluated, Boolean,
+                                  f"object is not Boolean. got={type(evaluated)}")
+            self.assertEqual(evaluated.value, expected,
+                             f"object has wrong value. got={evaluated.value}, want={expected}")
+        elif type(expected) is int:
+            self.assertIsInstance(evaluated, Integer,
+                                  f"object is not Integer. got={type(evaluated)}")
+            self.assertEqual(evaluated.value, expected,
+                             f"object has wrong value. got={evaluated.value}, want={expected}")
+        elif type(expected) is str:
+            self.assertIsInstance(evaluated, String,
+                                  f"object is not String. got={type(evaluated)}")
+            self.assertEqual(evaluated.value, expected,
+                             f"object has wrong value. got={evaluated.value}, want={expected}")
+        elif type(expected) is list:
+            self.assertIsInstance(evaluated, Array,
+                                  f"object is not Array. got={type(evaluated)}")
+            self.assertEqual(len(evaluated.elements), len(expected),
+                             f"wrong num of elements. got={len(evaluated.elements)}, want={len(expected)}")
+            for (element, expected_element) in zip(evaluated.elements, expected):
+                self._test_expected_object(element, expected_element)
+
+
+class TestVMEvaluatorSuite(test_evaluator.TestEvaluator):
+    """
+    Runs the whole evaluator suite through the compiler and VM, but for the
+    differences listed in the VM docstring.
+    """
+
+    @unittest.skip("functions inspect as Closure[...] on the VM")
+    def test_function_object(self):
+        pass
+
+    @unittest.skip("closures capture free variables by value on the VM")
+    def test_closures_see_later_lets(self):
+        pass
+
+    @unittest.skip("closures capture free variables by value on the VM")
+    def test_recursive_local_functions(self):
+        pass
+
+    @unittest.skip("unbound locals are not found on the VM")
+    def test_unbound_lets_read_enclosing_binding(self):
+        pass
+
+    def _test_eval(self, code):
+        program = Parser(Lexer(code)).parse_program()
+        compiler = Compiler()
+        compiler.compile(program)
+        return VM(compiler.bytecode()).run()